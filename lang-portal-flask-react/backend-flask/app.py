@@ -1,63 +1,98 @@
 import routes.dashboard
+import routes.export
 import routes.groups
+import routes.metrics
 import routes.study_activities
+import routes.study_queue
 import routes.study_sessions
+import routes.users
 import routes.words
 from flask import Flask
-from flask_cors import CORS
+from lib.cors import OriginRegistry
 from lib.db import Db
-
-
-def get_allowed_origins(app):
-    try:
-        cursor = app.db.cursor()
-        cursor.execute('SELECT url FROM study_activities')
-        urls = cursor.fetchall()
-        # Convert URLs to origins (e.g., https://example.com/app -> https://example.com)
-        origins = set()
-        for url in urls:
-            try:
-                from urllib.parse import urlparse
-                parsed = urlparse(url['url'])
-                origin = f"{parsed.scheme}://{parsed.netloc}"
-                origins.add(origin)
-            except:
-                continue
-        return list(origins) if origins else ["*"]
-    except:
-        return ["*"]  # Fallback to allow all origins if there's an error
+from lib.http_cache import ResponseCache
+from lib.lookup_cache import LookupCache
+from lib.metrics import Metrics
+from lib.retention import HistoryResets
+from lib.review_buffer import ReviewBuffer
+from lib.serialization import JSONProvider
+from lib.users import Users
 
 
 def create_app(test_config=None):
     app = Flask(__name__)
+    # Encode JSON responses with orjson when it is installed
+    app.json = JSONProvider(app)
 
     if test_config is None:
         app.config.from_mapping(
-            DATABASE='words.db'
+            DATABASE='words.db',
+            DB_POOL_SIZE=8,
+            DB_POOL_TIMEOUT=30.0,
+            RESPONSE_CACHE_SIZE=512,
+            LOOKUP_CACHE_SIZE=1024,
+            LOOKUP_CACHE_REFRESH_INTERVAL=1.0,
+            SLOW_QUERY_MS=100,
+            # The frontend dev server; study activity origins are added from the database
+            CORS_ORIGINS=["http://localhost:8080", "http://127.0.0.1:8080"],
+            CORS_REFRESH_INTERVAL=1.0,
+            # Write-behind review queue, off by default (see lib/review_buffer.py)
+            REVIEW_BUFFER=False,
+            REVIEW_BUFFER_INTERVAL_MS=50,
+            REVIEW_BUFFER_MAX_ROWS=1000
         )
+        # FLASK_DATABASE=bench.db etc. override the defaults
+        app.config.from_prefixed_env()
     else:
         app.config.update(test_config)
 
-    # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    # Route latencies, per-statement SQL timings and the slow query log
+    app.metrics = Metrics(slow_query_threshold=app.config.get('SLOW_QUERY_MS', 100) / 1000)
+    app.metrics.init_app(app)
+
+    # Initialize database first since the caches and CORS origins read from it
+    app.db = Db(
+        database=app.config['DATABASE'],
+        pool_size=app.config.get('DB_POOL_SIZE', 8),
+        pool_timeout=app.config.get('DB_POOL_TIMEOUT', 30.0),
+        metrics=app.metrics
+    )
+
+    # Conditional-GET cache for read-mostly endpoints, invalidated by data version
+    app.response_cache = ResponseCache(app.db, max_entries=app.config.get('RESPONSE_CACHE_SIZE', 512))
 
-    # Get allowed origins from study_activities table
-    allowed_origins = get_allowed_origins(app)
+    # LRU caches for group, study activity and word lookups (entries per table)
+    app.lookup_cache = LookupCache(
+        app.db,
+        max_entries=app.config.get('LOOKUP_CACHE_SIZE', 1024),
+        refresh_interval=app.config.get('LOOKUP_CACHE_REFRESH_INTERVAL', 1.0)
+    )
+
+    # Allowed CORS origins, kept in memory and reloaded when study_activities change
+    app.origins = OriginRegistry(
+        app.db,
+        static_origins=app.config.get('CORS_ORIGINS', []),
+        refresh_interval=app.config.get('CORS_REFRESH_INTERVAL', 1.0)
+    )
+    app.origins.init_app(app)
+
+    # Optionally queue review submissions and write them with group commits
+    app.review_buffer = None
+    if app.config.get('REVIEW_BUFFER', False):
+        app.review_buffer = ReviewBuffer(
+            app.db,
+            flush_interval=app.config.get('REVIEW_BUFFER_INTERVAL_MS', 50) / 1000,
+            max_rows=app.config.get('REVIEW_BUFFER_MAX_ROWS', 1000)
+        )
 
-    # In development, add localhost to allowed origins
-    if app.debug:
-        allowed_origins.extend(["http://localhost:8080", "http://127.0.0.1:8080"])
+    # History resets run in background threads (POST /api/study-sessions/reset)
+    app.history_resets = HistoryResets(app.db)
 
-    # Configure CORS with combined origins
-    CORS(app, resources={
-        r"/*": {
-            "origins": allowed_origins,
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
-        }
-    })
+    # Resolve the X-User-Id header of every request into g.user_id
+    app.users = Users(app.db)
+    app.users.init_app(app)
 
-    # Close database connection
+    # Return the request's database connection to the pool
     @app.teardown_appcontext
     def close_db(exception):
         app.db.close()
@@ -68,6 +103,10 @@ def create_app(test_config=None):
     routes.study_sessions.load(app)
     routes.dashboard.load(app)
     routes.study_activities.load(app)
+    routes.export.load(app)
+    routes.study_queue.load(app)
+    routes.users.load(app)
+    routes.metrics.load(app)
 
     return app
 
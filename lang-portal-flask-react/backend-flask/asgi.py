@@ -0,0 +1,161 @@
+"""ASGI entry point serving the same Flask app, e.g.
+
+    uvicorn asgi:application --port 8000
+
+The event loop only handles the HTTP protocol. Each request runs the WSGI app
+on a dedicated thread pool sized to the database connection pool, so blocking
+SQLite calls never stall the loop and threads never queue for a connection.
+Streamed responses (the exports) are sent chunk by chunk as the app yields
+them. On lifespan shutdown the review buffer, if enabled, is flushed before
+exit.
+
+The adapter only relies on the ASGI and WSGI specifications, not on the
+internals of an adapter library.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from app import app
+
+# Request bodies above this size are spooled to a temporary file
+MAX_MEMORY_BODY = 512 * 1024
+
+
+def build_environ(scope, body):
+    """The WSGI environ for an ASGI http scope and its (file-like) request body."""
+    # WSGI strings are bytes decoded as latin-1 (PEP 3333)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').lower()
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in environ:
+            # Repeated headers are joined, cookies with their own separator
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+
+async def read_body(receive):
+    """The request body as a file, or None if the client disconnected first."""
+    body = SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            body.close()
+            return None
+        body.write(message.get('body', b''))
+        if not message.get('more_body', False):
+            body.seek(0)
+            return body
+
+
+class PooledWsgiToAsgi:
+    def __init__(self, wsgi_application, threads, on_shutdown=()):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self.on_shutdown = list(on_shutdown)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Servers such as uvicorn re-raise SIGTERM afterwards, so atexit hooks never run
+                loop = asyncio.get_running_loop()
+                for hook in self.on_shutdown:
+                    await loop.run_in_executor(self.executor, hook)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            # Websocket scopes are not supported by the Flask app
+            return
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.executor, self.run_wsgi_app, loop, build_environ(scope, body), send)
+        finally:
+            body.close()
+
+    def run_wsgi_app(self, loop, environ, send):
+        """Run the WSGI app on an executor thread, sending each chunk through the loop."""
+        response = {}
+
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def send_start():
+            if not response.get('sent'):
+                response['sent'] = True
+                send_sync({'type': 'http.response.start', 'status': response['status'],
+                           'headers': response['headers']})
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info is not None and response.get('sent'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+            def write(data):
+                send_start()
+                send_sync({'type': 'http.response.body', 'body': data, 'more_body': True})
+            return write
+
+        iterable = self.wsgi_application(environ, start_response)
+        try:
+            for chunk in iterable:
+                # The status line goes out with the first non-empty chunk, as WSGI allows
+                if chunk:
+                    send_start()
+                    send_sync({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            send_start()
+            send_sync({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+
+
+application = PooledWsgiToAsgi(
+    app,
+    threads=app.config.get('ASGI_THREADS', app.config.get('DB_POOL_SIZE', 8)),
+    on_shutdown=[app.review_buffer.close] if app.review_buffer is not None else []
+)
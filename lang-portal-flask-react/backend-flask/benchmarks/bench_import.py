@@ -0,0 +1,69 @@
+"""Import a synthetic vocabulary file with the bulk importer.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.bench_import --words 1000000 --format csv
+"""
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import create_database
+from lib.importer import import_vocabulary
+
+
+def write_vocabulary(path, words, duplicate_every):
+    records = ({'german': f'Wort {i}', 'english': f'word {i}'}
+               for i in range(words))
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            writer = csv.DictWriter(file, fieldnames=['german', 'english'])
+            writer.writeheader()
+            for i, record in enumerate(records):
+                writer.writerow(record)
+                if duplicate_every and i % duplicate_every == 0:
+                    writer.writerow(record)
+        else:
+            file.write('[\n')
+            for i, record in enumerate(records):
+                file.write(('' if i == 0 else ',\n') + json.dumps(record, ensure_ascii=False))
+                if duplicate_every and i % duplicate_every == 0:
+                    file.write(',\n' + json.dumps(record, ensure_ascii=False))
+            file.write('\n]\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=1000000)
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    parser.add_argument('--duplicate-every', type=int, default=100,
+                        help='repeat every Nth word to exercise deduplication (0 disables)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, f'vocabulary.{args.format}')
+        write_vocabulary(source, args.words, args.duplicate_every)
+        connection = create_database(os.path.join(directory, 'import.db'))
+
+        start = time.perf_counter()
+        result = import_vocabulary(connection, 'Benchmark', source)
+        connection.commit()
+        elapsed = time.perf_counter() - start
+        print(f"first import: {result['read']:,} rows, {result['new_words']:,} new words "
+              f"in {elapsed:.2f}s ({result['read'] / elapsed:,.0f} rows/sec)")
+
+        # Re-running the same file must not add anything
+        start = time.perf_counter()
+        result = import_vocabulary(connection, 'Benchmark', source)
+        connection.commit()
+        elapsed = time.perf_counter() - start
+        print(f"re-import:    {result['read']:,} rows, {result['new_words']:,} new words "
+              f"in {elapsed:.2f}s ({result['read'] / elapsed:,.0f} rows/sec)")
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
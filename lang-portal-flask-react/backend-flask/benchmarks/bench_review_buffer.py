@@ -0,0 +1,100 @@
+"""Compare one commit per review request with the write-behind review buffer.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.bench_review_buffer --requests 5000 --concurrency 8
+
+Each of --concurrency threads submits small review requests as the API does:
+either inserting and committing them on a pooled connection, or handing them
+to a ReviewBuffer that group-commits. The buffered run is timed until its
+final flush, so both numbers count reviews that are on disk.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.common import create_database
+from lib.db import Db
+from lib.review_buffer import ReviewBuffer
+from lib.reviews import insert_reviews
+
+
+def create_benchmark_database(path, words, sessions):
+    connection = create_database(path)
+    connection.executemany('INSERT INTO words (english, german) VALUES (?, ?)',
+                           [(f'word {i}', f'Wort {i}') for i in range(words)])
+    connection.executemany('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)',
+                           [()] * sessions)
+    connection.commit()
+    connection.close()
+
+
+def direct_submit(db):
+    def submit(user_id, session_id, reviews):
+        connection = db.pool.acquire()
+        try:
+            cursor = connection.cursor()
+            insert_reviews(cursor, user_id, session_id, reviews)
+            db.bump_data_version(cursor)
+            connection.commit()
+        finally:
+            db.pool.release(connection)
+    return submit
+
+
+def run(submit, requests, concurrency):
+    def worker(chunk):
+        for session_id, reviews in chunk:
+            submit(1, session_id, reviews)
+
+    threads = [threading.Thread(target=worker, args=(requests[i::concurrency],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=10, help='reviews per request')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--interval-ms', type=float, default=50)
+    parser.add_argument('--max-rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    requests = [(rng.randint(1, args.sessions),
+                 [(rng.randint(1, args.words), rng.random() < 0.7) for _ in range(args.reviews)])
+                for _ in range(args.requests)]
+    total = args.requests * args.reviews
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('commit per request', 'review buffer'):
+            path = os.path.join(directory, f'{name.replace(" ", "_")}.db')
+            create_benchmark_database(path, args.words, args.sessions)
+            db = Db(path, pool_size=args.concurrency + 1)
+
+            start = time.perf_counter()
+            if name == 'review buffer':
+                buffer = ReviewBuffer(db, flush_interval=args.interval_ms / 1000, max_rows=args.max_rows)
+                run(buffer.submit, requests, args.concurrency)
+                buffer.close()
+                commits = buffer.stats()['batches']
+            else:
+                run(direct_submit(db), requests, args.concurrency)
+                commits = args.requests
+            elapsed = time.perf_counter() - start
+            db.pool.close_all()
+
+            print(f'{name:>18}: {total:,} reviews in {elapsed:.3f}s '
+                  f'({total / elapsed:,.0f} reviews/sec, {commits:,} commits)')
+
+
+if __name__ == '__main__':
+    main()
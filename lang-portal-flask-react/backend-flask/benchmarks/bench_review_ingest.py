@@ -0,0 +1,64 @@
+"""Compare per-row review inserts with the executemany ingestion path.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.bench_review_ingest --reviews 50000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import create_database
+from lib.reviews import insert_reviews, update_word_reviews
+
+def create_benchmark_database(path, words):
+    connection = create_database(path)
+    connection.executemany('INSERT INTO words (english, german) VALUES (?, ?)',
+                           [(f'word {i}', f'Wort {i}') for i in range(words)])
+    connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)')
+    connection.commit()
+    return connection
+
+
+def loop_ingest(connection, reviews):
+    # The previous implementation: one execute per review item, then the counters
+    cursor = connection.cursor()
+    for word_id, is_correct in reviews:
+        cursor.execute('''
+            INSERT INTO word_review_items (study_session_id, word_id, correct, created_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (1, word_id, 1 if is_correct else 0))
+    update_word_reviews(cursor, 1, reviews)
+    connection.commit()
+
+
+def bulk_ingest(connection, reviews):
+    insert_reviews(connection.cursor(), 1, 1, reviews)
+    connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=50000)
+    parser.add_argument('--words', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=5000, help='reviews per request')
+    args = parser.parse_args()
+
+    reviews = [(random.randint(1, args.words), random.random() < 0.7) for _ in range(args.reviews)]
+    batches = [reviews[i:i + args.batch] for i in range(0, len(reviews), args.batch)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, ingest in (('loop', loop_ingest), ('executemany', bulk_ingest)):
+            connection = create_benchmark_database(os.path.join(directory, f'{name}.db'), args.words)
+            start = time.perf_counter()
+            for batch in batches:
+                ingest(connection, batch)
+            elapsed = time.perf_counter() - start
+            connection.close()
+            print(f'{name:>12}: {args.reviews} reviews in {elapsed:.3f}s ({args.reviews / elapsed:,.0f} rows/sec)')
+
+
+if __name__ == '__main__':
+    main()
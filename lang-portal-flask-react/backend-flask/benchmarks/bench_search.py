@@ -0,0 +1,73 @@
+"""Measure word search latency on a large synthetic vocabulary.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.bench_search --words 500000
+
+Exits with an error when the p95 of type-ahead (prefix) searches is above
+--target-ms.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import create_database
+from lib.search import search_words
+
+SYLLABLES = ['ab', 'be', 'ch', 'de', 'ein', 'fa', 'ge', 'hö', 'ig', 'ka', 'lu', 'mä',
+             'ne', 'or', 'pf', 'qu', 'ra', 'sch', 'ß', 'te', 'ü', 've', 'wa', 'zi']
+
+
+def make_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=500000)
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--target-ms', type=float, default=5.0, help="p95 target for prefix searches")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_database(os.path.join(directory, 'search.db'))
+        words = [(f'{make_word(rng)} {i}', f'word {i}') for i in range(args.words)]
+        start = time.perf_counter()
+        connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)', words)
+        connection.commit()
+        print(f"indexed {args.words:,} words in {time.perf_counter() - start:.2f}s")
+
+        cursor = connection.cursor()
+        p95 = {}
+        for mode, make_query in [
+            ('prefix', lambda german: german.split()[0][:rng.randint(2, 4)]),
+            ('fuzzy', lambda german: german.split()[0][1:]),
+        ]:
+            latencies = []
+            for _ in range(args.queries):
+                query = make_query(rng.choice(words)[0])
+                start = time.perf_counter()
+                search_words(cursor, 1, query, 10, mode)
+                latencies.append((time.perf_counter() - start) * 1000)
+            p95[mode] = percentile(latencies, 0.95)
+            print(f"{mode:>6}: p50 {statistics.median(latencies):.2f}ms  "
+                  f"p95 {p95[mode]:.2f}ms  "
+                  f"p99 {percentile(latencies, 0.99):.2f}ms")
+        connection.close()
+
+    if p95['prefix'] > args.target_ms:
+        raise SystemExit(f"prefix p95 {p95['prefix']:.2f}ms is above the {args.target_ms}ms target")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Compare JSON response building for large pages of word rows.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.bench_serialization --rows 1000
+
+Each variant fetches the same page of words and builds a complete Flask JSON
+response from it:
+
+    dict copy + jsonify    sqlite3.Row copied field by field, Flask's provider
+    records + json         records() and JSONProvider with the stdlib encoder
+    records + orjson       records() and JSONProvider with orjson (if installed)
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import lib.serialization
+from benchmarks.common import create_database
+from lib.serialization import JSONProvider, records
+
+QUERY = '''
+    SELECT w.id, w.english, w.german,
+           COALESCE(r.correct_count, 0) AS correct_count,
+           COALESCE(r.wrong_count, 0) AS wrong_count
+    FROM words w
+    LEFT JOIN word_reviews r ON r.user_id = 1 AND r.word_id = w.id
+    ORDER BY w.german
+    LIMIT ?
+'''
+
+
+def dict_copy(cursor, rows):
+    cursor.execute(QUERY, (rows,))
+    return [{
+        "id": word["id"],
+        "english": word["english"],
+        "german": word["german"],
+        "correct_count": word["correct_count"],
+        "wrong_count": word["wrong_count"]
+    } for word in cursor.fetchall()]
+
+
+def from_records(cursor, rows):
+    cursor.execute(QUERY, (rows,))
+    return records(cursor)
+
+
+def measure(app, provider, build, connection, rows, seconds):
+    app.json = provider
+    cursor = connection.cursor()
+    responses = 0
+    total_bytes = 0
+    started = time.perf_counter()
+    with app.app_context():
+        while time.perf_counter() - started < seconds:
+            response = app.json.response({"words": build(cursor, rows), "count": rows})
+            total_bytes += len(response.get_data())
+            responses += 1
+    elapsed = time.perf_counter() - started
+    return responses / elapsed, total_bytes / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help='rows per page')
+    parser.add_argument('--seconds', type=float, default=3.0, help='per variant')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    orjson = lib.serialization.orjson
+    variants = [
+        ('dict copy + jsonify', DefaultJSONProvider(app), dict_copy, orjson),
+        ('records + json', JSONProvider(app), from_records, None),
+    ]
+    if orjson is not None:
+        variants.append(('records + orjson', JSONProvider(app), from_records, orjson))
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_database(os.path.join(directory, 'serialization.db'))
+        connection.executemany('INSERT INTO words (english, german) VALUES (?, ?)',
+                               [(f'word {i}', f'Wört {i}') for i in range(args.rows)])
+        connection.commit()
+
+        for name, provider, build, encoder in variants:
+            lib.serialization.orjson = encoder
+            per_second, bytes_per_second = measure(app, provider, build, connection, args.rows, args.seconds)
+            print(f'{name:>20}: {per_second:,.0f} responses/sec, {bytes_per_second / 1e6:,.1f} MB/sec')
+        lib.serialization.orjson = orjson
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import os
+import sqlite3
+
+from lib.db import CONNECTION_PRAGMAS, SETUP_FILES
+from lib.migrations import run_migrations
+
+
+def create_database(path):
+    """Create an empty database at `path` with the full, migrated schema."""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        connection.execute(pragma)
+    for filename in SETUP_FILES:
+        with open(os.path.join('sql', filename)) as file:
+            connection.executescript(file.read())
+    run_migrations(connection, log=None)
+    return connection
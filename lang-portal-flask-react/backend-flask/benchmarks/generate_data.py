@@ -0,0 +1,151 @@
+"""Generate a synthetic lang-portal database at a configurable scale.
+
+Usage (from backend-flask/):
+
+    python -m benchmarks.generate_data --out bench.db --words 100000 --sessions 100000 --reviews 5000000
+
+Rows are generated inside SQLite with recursive CTEs, so all triggers (word
+counter, search index, session summaries, dashboard stats) fire exactly as for
+API writes. The derived tables that the API maintains in Python (word_reviews,
+word_schedules, study rollups, group word counts) are rebuilt once at the end.
+"""
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.common import create_database
+from lib.reviews import rebuild_word_reviews
+from lib.rollups import rebuild_rollups
+
+CHUNK_SIZE = 100000
+
+# German-looking words, including umlauts and ß, so search sees realistic tokens
+SYLLABLES = ['ab', 'be', 'ch', 'de', 'ein', 'fa', 'ge', 'hö', 'ig', 'ka', 'lu', 'mä',
+             'ne', 'or', 'pf', 'qu', 'ra', 'sch', 'ß', 'te', 'ü', 've', 'wa', 'zi']
+
+ACTIVITIES = [
+    ('Flashcards', 'http://localhost:8081'),
+    ('Typing Tutor', 'http://localhost:8082'),
+    ('Listening Quiz', 'http://localhost:8083'),
+]
+
+
+def syllable_expression(seed_expression):
+    """SQL picking a syllable from SYLLABLES based on an integer expression."""
+    cases = ' '.join(f"WHEN {i} THEN '{s}'" for i, s in enumerate(SYLLABLES))
+    return f'CASE ({seed_expression}) % {len(SYLLABLES)} {cases} END'
+
+
+def numbers(start, stop):
+    """A recursive CTE yielding i in [start, stop)."""
+    return f'WITH RECURSIVE n(i) AS (SELECT {int(start)} UNION ALL SELECT i + 1 FROM n WHERE i + 1 < {int(stop)})'
+
+
+def insert_in_chunks(connection, label, total, statement):
+    """Run `statement(start, stop)` for consecutive chunks, committing each."""
+    started = time.perf_counter()
+    for start in range(0, total, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, total)
+        connection.execute(statement(start, stop))
+        connection.commit()
+        elapsed = time.perf_counter() - started
+        print(f'\r{label}: {stop:,}/{total:,} ({stop / elapsed:,.0f} rows/sec)', end='', file=sys.stderr)
+    print(file=sys.stderr)
+
+
+def generate(connection, words, groups, sessions, reviews, days, users):
+    # User 1 is created by the migrations
+    connection.executemany('INSERT INTO users (name) VALUES (?)',
+                           [(f'User {i}',) for i in range(2, users + 1)])
+    connection.executemany('INSERT INTO study_activities (name, url) VALUES (?, ?)', ACTIVITIES)
+    connection.executemany('INSERT INTO groups (name) VALUES (?)',
+                           [(f'Group {i}',) for i in range(1, groups + 1)])
+    connection.commit()
+
+    german = ' || '.join(syllable_expression(f'(i * {prime}) / {len(SYLLABLES) ** k}')
+                         for k, prime in enumerate([7919, 104729, 1299709]))
+    insert_in_chunks(connection, 'words', words, lambda start, stop: f'''
+        {numbers(start, stop)}
+        INSERT INTO words (german, english)
+        SELECT {german} || ' ' || i, 'word ' || i FROM n
+    ''')
+
+    # Every word belongs to one group, every tenth also to a second one (the
+    # word_groups triggers keep groups.words_count)
+    insert_in_chunks(connection, 'word_groups', words, lambda start, stop: f'''
+        {numbers(start, stop)}
+        INSERT INTO word_groups (word_id, group_id)
+        SELECT i + 1, i % {groups} + 1 FROM n
+        UNION ALL
+        SELECT i + 1, (i / 10) % {groups} + 1 FROM n WHERE i % 10 = 0 AND {groups} > 1 AND (i / 10) % {groups} != i % {groups}
+    ''')
+    connection.commit()
+
+    # Sessions are spread over the last `days` days, in creation order, and
+    # dealt round-robin to users
+    insert_in_chunks(connection, 'study_sessions', sessions, lambda start, stop: f'''
+        {numbers(start, stop)}
+        INSERT INTO study_sessions (user_id, group_id, study_activity_id, created_at)
+        SELECT i % {users} + 1, abs(random()) % {groups} + 1, abs(random()) % {len(ACTIVITIES)} + 1,
+               datetime('now', '-{days} days', '+' || (i * {days * 86400} / {sessions}) || ' seconds')
+        FROM n
+    ''')
+
+    # Reviews are dealt round-robin to sessions, a few seconds apart, 70% correct
+    insert_in_chunks(connection, 'word_review_items', reviews, lambda start, stop: f'''
+        {numbers(start, stop)}
+        INSERT INTO word_review_items (user_id, word_id, study_session_id, correct, created_at)
+        SELECT s.user_id, abs(random()) % {words} + 1, s.id, abs(random()) % 10 < 7,
+               datetime(s.created_at, '+' || (i / {sessions} * 5) || ' seconds')
+        FROM n JOIN study_sessions s ON s.id = i % {sessions} + 1
+    ''')
+
+    print('rebuilding word_reviews, word_schedules and study rollups', file=sys.stderr)
+    cursor = connection.cursor()
+    rebuild_word_reviews(cursor)
+    # Replaying SM-2 over millions of reviews is too slow here; a plausible
+    # spread of intervals and due dates is enough for the study queue.
+    cursor.execute('''
+        INSERT INTO word_schedules (user_id, word_id, ease, interval_days, repetitions, due_at, last_reviewed_at)
+        SELECT user_id, word_id, 2.5, correct_count % 30 + 1, correct_count % 5,
+               datetime('now', '-7 days', '+' || (abs(random()) % (21 * 86400)) || ' seconds'),
+               last_reviewed
+        FROM word_reviews
+    ''')
+    rebuild_rollups(cursor)
+    connection.commit()
+    connection.execute('ANALYZE')
+    connection.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default='bench.db')
+    parser.add_argument('--words', type=int, default=100000)
+    parser.add_argument('--groups', type=int, default=None, help='default: one per 100 words')
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=1, help='learners the sessions are spread over')
+    parser.add_argument('--days', type=int, default=365, help='history the sessions are spread over')
+    parser.add_argument('--force', action='store_true', help='overwrite an existing --out file')
+    args = parser.parse_args()
+    groups = args.groups or max(1, args.words // 100)
+
+    if os.path.exists(args.out):
+        if not args.force:
+            parser.error(f'{args.out} exists, pass --force to overwrite it')
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists(args.out + suffix):
+                os.remove(args.out + suffix)
+
+    started = time.perf_counter()
+    connection = create_database(args.out)
+    generate(connection, args.words, groups, args.sessions, args.reviews, args.days, args.users)
+    connection.close()
+    print(f'{args.out}: {args.words:,} words, {groups:,} groups, {args.users:,} users, {args.sessions:,} sessions, '
+          f'{args.reviews:,} reviews in {time.perf_counter() - started:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Replay a weighted mix of API requests against a running server.
+
+Usage (from backend-flask/, with the API serving the same database):
+
+    python -m benchmarks.generate_data --out bench.db --words 1000000
+    FLASK_DATABASE=bench.db python app.py    # or: uvicorn asgi:application --port 8000
+    python -m benchmarks.load_test --database bench.db --duration 30 --concurrency 8
+
+Ids and search terms are sampled from --database so every request hits real
+rows. Reports p50/p95/p99 latency per endpoint and overall throughput; with
+--max-p95 the exit status is non-zero when any endpoint is slower than that.
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+
+class Sample:
+    """Ids and terms drawn from the database under test."""
+
+    def __init__(self, database):
+        connection = sqlite3.connect(f'file:{database}?mode=ro', uri=True)
+        ids = lambda sql: [row[0] for row in connection.execute(sql)]
+        self.max_word_id = connection.execute('SELECT MAX(id) FROM words').fetchone()[0] or 1
+        self.max_session_id = connection.execute('SELECT MAX(id) FROM study_sessions').fetchone()[0] or 1
+        self.max_review_item_id = connection.execute('SELECT MAX(id) FROM word_review_items').fetchone()[0] or 0
+        self.user_ids = ids('SELECT id FROM users')
+        self.group_ids = ids('SELECT id FROM groups ORDER BY random() LIMIT 1000')
+        self.activity_ids = ids('SELECT id FROM study_activities')
+        self.german = [row[0] for row in connection.execute('SELECT german FROM words ORDER BY random() LIMIT 1000')]
+        connection.close()
+
+    def word_id(self, rng):
+        return rng.randint(1, self.max_word_id)
+
+    def session_id(self, rng):
+        return rng.randint(1, self.max_session_id)
+
+    def user_id(self, rng):
+        return rng.choice(self.user_ids)
+
+    def group_id(self, rng):
+        return rng.choice(self.group_ids)
+
+    def activity_id(self, rng):
+        return rng.choice(self.activity_ids)
+
+    def search_term(self, rng):
+        word = rng.choice(self.german).split()[0]
+        return word[:rng.randint(2, max(2, len(word)))]
+
+
+# (weight, name, method, build(sample, rng) -> (path, json body or None))
+READ_MIX = [
+    (10, 'GET /api/words', 'GET', lambda s, r: (f'/api/words?page={r.randint(1, 20)}', None)),
+    (5, 'GET /api/words?cursor', 'GET', lambda s, r: ('/api/words?cursor=&sort_by=german', None)),
+    (10, 'GET /api/words/<id>', 'GET', lambda s, r: (f'/api/words/{s.word_id(r)}', None)),
+    (8, 'GET /api/words/search', 'GET', lambda s, r: (f'/api/words/search?q={s.search_term(r)}', None)),
+    (5, 'GET /api/groups', 'GET', lambda s, r: (f'/api/groups?page={r.randint(1, 5)}', None)),
+    (5, 'GET /api/groups/<id>', 'GET', lambda s, r: (f'/api/groups/{s.group_id(r)}', None)),
+    (8, 'GET /api/groups/<id>/words', 'GET', lambda s, r: (f'/api/groups/{s.group_id(r)}/words', None)),
+    (3, 'GET /api/groups/<id>/words/raw', 'GET', lambda s, r: (f'/api/groups/{s.group_id(r)}/words/raw', None)),
+    (3, 'GET /api/groups/<id>/study_sessions', 'GET',
+     lambda s, r: (f'/api/groups/{s.group_id(r)}/study_sessions', None)),
+    (3, 'GET /api/study-sessions', 'GET', lambda s, r: (f'/api/study-sessions?page={r.randint(1, 20)}', None)),
+    (4, 'GET /api/study-sessions/<id>', 'GET', lambda s, r: (f'/api/study-sessions/{s.session_id(r)}', None)),
+    (2, 'GET /api/study-activities', 'GET', lambda s, r: ('/api/study-activities', None)),
+    (2, 'GET /api/study-activities/<id>', 'GET', lambda s, r: (f'/api/study-activities/{s.activity_id(r)}', None)),
+    (2, 'GET /api/study-activities/<id>/sessions', 'GET',
+     lambda s, r: (f'/api/study-activities/{s.activity_id(r)}/sessions?page={r.randint(1, 20)}', None)),
+    (1, 'GET /api/study-activities/<id>/launch', 'GET',
+     lambda s, r: (f'/api/study-activities/{s.activity_id(r)}/launch', None)),
+    (6, 'GET /api/study-queue', 'GET', lambda s, r: (f'/api/study-queue?group_id={s.group_id(r)}', None)),
+    (5, 'GET /dashboard/stats', 'GET', lambda s, r: ('/dashboard/stats', None)),
+    (5, 'GET /dashboard/recent-session', 'GET', lambda s, r: ('/dashboard/recent-session', None)),
+    # Exports stream everything after since_id, so only the tail is requested
+    (1, 'GET /api/export/words', 'GET', lambda s, r: (f'/api/export/words?since_id={s.max_word_id - 500}', None)),
+    (1, 'GET /api/export/study-sessions', 'GET',
+     lambda s, r: (f'/api/export/study-sessions?since_id={s.max_session_id - 500}', None)),
+    (1, 'GET /api/export/review-items', 'GET',
+     lambda s, r: (f'/api/export/review-items?since_id={s.max_review_item_id - 500}', None)),
+]
+
+WRITE_MIX = [
+    (2, 'POST /api/study-sessions', 'POST', lambda s, r: ('/api/study-sessions', {
+        'group_id': s.group_id(r), 'study_activity_id': s.activity_id(r)})),
+    (4, 'POST /api/study-sessions/<id>/review', 'POST', lambda s, r: (
+        f'/api/study-sessions/{s.session_id(r)}/review',
+        {'reviews': [{'word_id': s.word_id(r), 'is_correct': r.random() < 0.7} for _ in range(10)]})),
+]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def worker(base_url, sample, mix, deadline, seed, results, lock):
+    rng = random.Random(seed)
+    weights = [entry[0] for entry in mix]
+    session = requests.Session()
+    local = []
+    while time.perf_counter() < deadline:
+        _, name, method, build = rng.choices(mix, weights)[0]
+        path, body = build(sample, rng)
+        # Each request acts as a random learner, see lib/users.py
+        headers = {'X-User-Id': str(sample.user_id(rng))}
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, json=body, headers=headers)
+            response.content
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        local.append((name, time.perf_counter() - start, ok))
+    with lock:
+        results.extend(local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--database', default='words.db', help='database the server is using, to sample ids from')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--writes', action='store_true', help='include session and review writes')
+    parser.add_argument('--max-p95', type=float, default=None, help='fail if any endpoint p95 exceeds this (ms)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    sample = Sample(args.database)
+    mix = READ_MIX + (WRITE_MIX if args.writes else [])
+    results = []
+    lock = threading.Lock()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [threading.Thread(target=worker, args=(args.url, sample, mix, deadline, args.seed + i, results, lock))
+               for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    by_endpoint = {}
+    for name, latency, ok in results:
+        by_endpoint.setdefault(name, []).append((latency * 1000, ok))
+
+    failed = False
+    print(f"{'endpoint':<42} {'count':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, samples in sorted(by_endpoint.items()):
+        latencies = [latency for latency, _ in samples]
+        errors = sum(1 for _, ok in samples if not ok)
+        p95 = percentile(latencies, 0.95)
+        slow = args.max_p95 is not None and p95 > args.max_p95
+        failed = failed or slow or errors > 0
+        print(f"{name:<42} {len(samples):>7} {errors:>6} {statistics.median(latencies):>8.1f} "
+              f"{p95:>8.1f} {percentile(latencies, 0.99):>8.1f}{'  <- slow' if slow else ''}")
+    latencies = [latency * 1000 for _, latency, _ in results]
+    print(f"\n{len(results):,} requests in {elapsed:.1f}s: {len(results) / elapsed:,.0f} req/s, "
+          f"p50 {statistics.median(latencies):.1f} ms, p95 {percentile(latencies, 0.95):.1f} ms, "
+          f"p99 {percentile(latencies, 0.99):.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
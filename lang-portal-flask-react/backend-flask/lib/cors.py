@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import request
+
+log = logging.getLogger(__name__)
+
+ALLOWED_METHODS = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+ALLOWED_HEADERS = ["Content-Type", "Authorization", "X-User-Id"]
+PREFLIGHT_MAX_AGE = 600
+
+
+def url_origin(url):
+    """https://example.com/app -> https://example.com; None for relative URLs."""
+    parsed = urlparse(url or '')
+    if not parsed.scheme or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+class OriginRegistry:
+    """Allowed CORS origins: the configured ones plus every study activity's origin.
+
+    The origins live in an in-memory set, so checking a request does not touch
+    SQLite. At most every `refresh_interval` seconds a request reads the
+    'study_activities_version' counter, which triggers bump on any change to
+    study_activities, and the set is reloaded only when it moved. If the
+    database cannot be read the previous set is kept (the configured origins
+    on startup); it never falls back to allowing every origin.
+    """
+
+    def __init__(self, db, static_origins=(), refresh_interval=1.0):
+        self.db = db
+        self.static_origins = frozenset(origin.lower() for origin in static_origins)
+        self.refresh_interval = refresh_interval
+        self._origins = self.static_origins
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def origins(self):
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= self.refresh_interval:
+            self._refresh()
+        return self._origins
+
+    def is_allowed(self, origin):
+        origins = self.origins()
+        return '*' in origins or origin.lower() in origins
+
+    def invalidate(self):
+        """Reload on the next check, for writers in this process."""
+        self._checked_at = None
+
+    def _refresh(self):
+        # Only one thread refreshes; the others keep using the current set
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            cursor = self.db.cursor()
+            row = cursor.execute(
+                "SELECT value FROM counters WHERE name = 'study_activities_version'").fetchone()
+            version = row[0] if row else None
+            if version is None or version != self._version:
+                cursor.execute('SELECT url FROM study_activities')
+                origins = {url_origin(row['url']) for row in cursor.fetchall()}
+                origins.discard(None)
+                self._origins = self.static_origins | frozenset(origins)
+                self._version = version
+        except Exception:
+            log.exception('could not refresh the allowed CORS origins')
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+
+    def init_app(self, app):
+        @app.after_request
+        def add_cors_headers(response):
+            # Responses differ per Origin, so shared caches must key on it
+            response.vary.add('Origin')
+            origin = request.headers.get('Origin')
+            if not origin or not self.is_allowed(origin):
+                return response
+
+            response.headers['Access-Control-Allow-Origin'] = origin
+            if request.method == 'OPTIONS':
+                response.headers['Access-Control-Allow-Methods'] = ', '.join(ALLOWED_METHODS)
+                response.headers['Access-Control-Allow-Headers'] = ', '.join(ALLOWED_HEADERS)
+                response.headers['Access-Control-Max-Age'] = str(PREFLIGHT_MAX_AGE)
+            return response
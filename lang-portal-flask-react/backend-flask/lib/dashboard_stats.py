@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+
+# Each user's dashboard_stats row is maintained incrementally by triggers (see
+# sql/migrations/0010_add_users.sql). The functions below recompute the same
+# values from the user's raw rows to verify or repair it.
+
+STAT_COLUMNS = [
+    'total_words_studied',
+    'mastered_words',
+    'total_reviews',
+    'correct_reviews',
+    'total_sessions',
+    'current_streak',
+    'last_study_date',
+]
+
+
+def read_dashboard_stats(cursor, user_id):
+    cursor.execute(f"SELECT {', '.join(STAT_COLUMNS)} FROM dashboard_stats WHERE user_id = ?", (user_id,))
+    row = cursor.fetchone()
+    return dict(zip(STAT_COLUMNS, row)) if row else None
+
+
+def compute_dashboard_stats(cursor, user_id):
+    """Recompute every materialized statistic from the user's reviews and sessions."""
+    cursor.execute('''
+        WITH word_stats AS (
+            SELECT
+                word_id,
+                COUNT(*) as total_attempts,
+                SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
+            FROM word_review_items
+            WHERE user_id = ?
+            GROUP BY word_id
+        )
+        SELECT
+            COUNT(*) as total_words_studied,
+            COALESCE(SUM(total_attempts >= 5 AND success_rate >= 0.8), 0) as mastered_words
+        FROM word_stats
+    ''', (user_id,))
+    words = cursor.fetchone()
+
+    cursor.execute('''
+        SELECT
+            COUNT(*) as total_reviews,
+            COALESCE(SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END), 0) as correct_reviews
+        FROM word_review_items
+        WHERE user_id = ?
+    ''', (user_id,))
+    reviews = cursor.fetchone()
+
+    cursor.execute('SELECT COUNT(*) FROM study_sessions WHERE user_id = ?', (user_id,))
+    total_sessions = cursor.fetchone()[0]
+
+    # Walk the distinct study days backwards from the latest one
+    cursor.execute('SELECT DISTINCT date(created_at) FROM study_sessions WHERE user_id = ? ORDER BY 1 DESC',
+                   (user_id,))
+    study_dates = [date.fromisoformat(row[0]) for row in cursor.fetchall()]
+    current_streak = 0
+    for expected, study_date in zip((study_dates[0] - timedelta(days=n) for n in range(len(study_dates))),
+                                    study_dates):
+        if study_date != expected:
+            break
+        current_streak += 1
+
+    return {
+        'total_words_studied': words[0],
+        'mastered_words': words[1],
+        'total_reviews': reviews[0],
+        'correct_reviews': reviews[1],
+        'total_sessions': total_sessions,
+        'current_streak': current_streak,
+        'last_study_date': study_dates[0].isoformat() if study_dates else None,
+    }
+
+
+def refresh_dashboard_stats(cursor, user_id):
+    """Overwrite the user's materialized row with freshly computed values."""
+    stats = compute_dashboard_stats(cursor, user_id)
+    cursor.execute(f'''
+        INSERT INTO dashboard_stats (user_id, {', '.join(STAT_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in STAT_COLUMNS)})
+        ON CONFLICT (user_id) DO UPDATE SET
+            {', '.join(f'{column} = excluded.{column}' for column in STAT_COLUMNS)}
+    ''', [user_id] + [stats[column] for column in STAT_COLUMNS])
+    return stats
+
+
+def check_dashboard_stats(cursor, user_id):
+    """Return {column: (stored, expected)} for every statistic of the user that has drifted."""
+    stored = read_dashboard_stats(cursor, user_id) or {}
+    expected = compute_dashboard_stats(cursor, user_id)
+    return {
+        column: (stored.get(column), expected[column])
+        for column in STAT_COLUMNS
+        if stored.get(column) != expected[column]
+    }
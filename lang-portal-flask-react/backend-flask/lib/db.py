@@ -1,30 +1,198 @@
+import os
+import queue
 import sqlite3
 import json
+import threading
+import time
 from flask import g
 
+from lib.importer import import_vocabulary
+from lib.metrics import InstrumentedCursor
+from lib.migrations import run_migrations
+
+# Applied once to every new connection. WAL lets readers run alongside the
+# single writer, and NORMAL sync is durable in WAL mode except on power loss.
+CONNECTION_PRAGMAS = [
+  # Lets purges hand free pages back (lib/retention.py). Only takes effect on a
+  # new database, so it has to come before the first write (journal_mode)
+  'PRAGMA auto_vacuum = INCREMENTAL',
+  'PRAGMA journal_mode = WAL',
+  'PRAGMA synchronous = NORMAL',
+  'PRAGMA cache_size = -16000',     # 16 MB page cache per connection
+  'PRAGMA mmap_size = 268435456',   # 256 MB memory-mapped I/O
+  'PRAGMA temp_store = MEMORY',
+]
+
+
+# Base tables, created in this order before the migrations run
+SETUP_FILES = [
+  'setup/create_table_words.sql',
+  'setup/create_table_word_reviews.sql',
+  'setup/create_table_word_review_items.sql',
+  'setup/create_table_groups.sql',
+  'setup/create_table_word_groups.sql',
+  'setup/create_table_study_activities.sql',
+  'setup/create_table_study_sessions.sql',
+]
+
+
+def bump_data_version(cursor):
+  # Call inside the writing transaction so the new version commits with the data
+  cursor.execute("UPDATE counters SET value = value + 1 WHERE name = 'data_version'")
+
+
+class PoolTimeout(Exception):
+  pass
+
+
+class ConnectionPool:
+  """A bounded, per-process pool of SQLite connections.
+
+  Connections are opened lazily up to `size`; once all of them are checked
+  out, `acquire` blocks for up to `timeout` seconds waiting for a release.
+  """
+
+  def __init__(self, database, size=5, timeout=30.0):
+    self.database = database
+    self.size = size
+    self.timeout = timeout
+    self._lock = threading.Lock()
+    self._reset()
+
+  def _reset(self):
+    # Also used after a fork: connections must never be shared across processes
+    self._pid = os.getpid()
+    self._idle = queue.LifoQueue()
+    self._created = 0
+    self.checked_out = 0
+    self.checkouts = 0
+    self.timeouts = 0
+    self.wait_time_total = 0.0
+    self.wait_time_max = 0.0
+
+  def _connect(self):
+    connection = sqlite3.connect(self.database, timeout=self.timeout, check_same_thread=False)
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+    for pragma in CONNECTION_PRAGMAS:
+      connection.execute(pragma)
+    return connection
+
+  def acquire(self):
+    if self._pid != os.getpid():
+      with self._lock:
+        if self._pid != os.getpid():
+          self._reset()
+
+    start = time.perf_counter()
+    try:
+      connection = self._idle.get_nowait()
+    except queue.Empty:
+      with self._lock:
+        can_open = self._created < self.size
+        if can_open:
+          self._created += 1
+      if can_open:
+        try:
+          connection = self._connect()
+        except Exception:
+          with self._lock:
+            self._created -= 1
+          raise
+      else:
+        try:
+          connection = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+          with self._lock:
+            self.timeouts += 1
+          raise PoolTimeout(f"No database connection available after {self.timeout}s")
+    waited = time.perf_counter() - start
+
+    with self._lock:
+      self.checked_out += 1
+      self.checkouts += 1
+      self.wait_time_total += waited
+      self.wait_time_max = max(self.wait_time_max, waited)
+    return connection
+
+  def release(self, connection):
+    if self._pid != os.getpid():
+      return
+    # Never hand out a connection with a half-finished transaction
+    if connection.in_transaction:
+      connection.rollback()
+    with self._lock:
+      self.checked_out -= 1
+    self._idle.put(connection)
+
+  def stats(self):
+    with self._lock:
+      return {
+        "size": self.size,
+        "open": self._created,
+        "checked_out": self.checked_out,
+        "idle": self._idle.qsize(),
+        "checkouts": self.checkouts,
+        "timeouts": self.timeouts,
+        "wait_time_total": self.wait_time_total,
+        "wait_time_max": self.wait_time_max,
+      }
+
+  def close_all(self):
+    while True:
+      try:
+        connection = self._idle.get_nowait()
+      except queue.Empty:
+        break
+      connection.close()
+      with self._lock:
+        self._created -= 1
+
+
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', pool_size=5, pool_timeout=30.0, metrics=None):
     self.database = database
-    self.connection = None
+    self.metrics = metrics
+    self.pool = ConnectionPool(database, size=pool_size, timeout=pool_timeout)
 
   def get(self):
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      g.db = self.pool.acquire()
     return g.db
 
   def commit(self):
     self.get().commit()
 
+  def rollback(self):
+    self.get().rollback()
+
   def cursor(self):
     # Ensure the connection is valid before getting a cursor
     connection = self.get()
-    return connection.cursor()
+    if self.metrics is None:
+      return connection.cursor()
+    # Timed cursor, finished (and recorded) in close() at the latest
+    cursor = InstrumentedCursor(connection.cursor(), self.metrics)
+    g.setdefault('db_cursors', []).append(cursor)
+    return cursor
 
   def close(self):
+    # Return the request's connection to the pool instead of closing it
+    for cursor in g.pop('db_cursors', []):
+      cursor.finish()
     db = g.pop('db', None)
     if db is not None:
-      db.close()
+      self.pool.release(db)
+
+  def pool_stats(self):
+    return self.pool.stats()
+
+  def data_version(self):
+    # Global version of the data behind cached API responses
+    row = self.cursor().execute("SELECT value FROM counters WHERE name = 'data_version'").fetchone()
+    return row[0] if row else 0
+
+  def bump_data_version(self, cursor):
+    bump_data_version(cursor)
 
   # Function to load SQL from a file
   def sql(self, filepath):
@@ -38,82 +206,41 @@ class Db:
 
   def setup_tables(self,cursor):
     # Create the necessary tables
-    cursor.execute(self.sql('setup/create_table_words.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_word_reviews.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_word_review_items.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_groups.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_word_groups.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_study_activities.sql'))
-    self.get().commit()
-
-    cursor.execute(self.sql('setup/create_table_study_sessions.sql'))
-    self.get().commit()
+    for filename in SETUP_FILES:
+      # executescript so a setup file can also hold its indexes and triggers
+      cursor.executescript(self.sql(filename))
+      self.get().commit()
 
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
+      # Skip activities that are already there so the seed can be re-run
       cursor.execute('''
-      INSERT INTO study_activities (name,url,preview_url) VALUES (?,?,?)
-      ''', (activity['name'],activity['url'],activity['preview_url'],))
+      INSERT INTO study_activities (name,url,preview_url)
+      SELECT ?,?,? WHERE NOT EXISTS (SELECT 1 FROM study_activities WHERE name = ? AND url = ?)
+      ''', (activity['name'],activity['url'],activity['preview_url'],activity['name'],activity['url'],))
+    self.bump_data_version(cursor)
     self.get().commit()
 
   def import_word_json(self,cursor,group_name,data_json_path):
-      # Insert a new group
-      cursor.execute('''
-        INSERT INTO groups (name) VALUES (?)
-      ''', (group_name,))
-      self.get().commit()
-
-      # Get the ID of the group
-      cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-      core_verbs_group_id = cursor.fetchone()[0]
-
-      # Insert some sample words (verbs) from JSON file and associate with the group
-      words = self.load_json(data_json_path)
-
-      for word in words:
-        # Insert the word into the words table
-        cursor.execute('''
-          INSERT INTO words (english, german) VALUES (?, ?)
-        ''', (word['english'], word['german']))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
-
-        # Insert the word-group relationship into word_groups table
-        cursor.execute('''
-          INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, core_verbs_group_id))
-      self.get().commit()
-
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
-
-      self.get().commit()
+    # Streams the file and batches the inserts; words and memberships are deduplicated
+    result = import_vocabulary(self.get(), group_name, data_json_path)
+    self.bump_data_version(cursor)
+    self.get().commit()
 
-      print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
+    print(f"Successfully added {result['new_memberships']} of {result['read']} words "
+          f"({result['new_words']} new) to the '{group_name}' group.")
+    return result
 
   # Initialize the database with sample data
   def init(self, app):
     with app.app_context():
       cursor = self.cursor()
       self.setup_tables(cursor)
+
+      # Bring the fresh schema up to the latest migration before seeding
+      run_migrations(self.get())
+
       self.import_word_json(
         cursor=cursor,
         group_name='Core Verbs',
@@ -0,0 +1,93 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+
+class CacheEntry:
+    def __init__(self, version, body, mimetype):
+        self.version = version
+        self.body = body
+        self.mimetype = mimetype
+        # Strong ETag derived from the body, so every worker process agrees on it
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class ResponseCache:
+    """Caches serialized GET responses keyed on path + query args.
+
+    Entries are tagged with the database data version (see Db.data_version)
+    read before the view runs; any write that bumps the version makes older
+    entries misses. Responses carry a strong ETag and Last-Modified, and
+    conditional requests are answered with 304 Not Modified.
+    """
+
+    def __init__(self, db, max_entries=512):
+        self.db = db
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def cached(self, view=None, per_user=False):
+        """Decorate a view; pass per_user=True when its response depends on the user."""
+        if view is None:
+            return lambda view: self.cached(view, per_user=per_user)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Read the version first: a write racing with the view then only causes an extra miss
+            version = self.db.data_version()
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            if per_user:
+                key = (g.user_id,) + key
+
+            entry = self._get(key)
+            if entry is None or entry.version != version:
+                response = make_response(view(*args, **kwargs))
+                # Only successful, fully buffered responses are cached
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = CacheEntry(version, response.get_data(), response.mimetype)
+                self._put(key, entry)
+                with self._lock:
+                    self.misses += 1
+            else:
+                with self._lock:
+                    self.hits += 1
+
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.last_modified = entry.last_modified
+            # Clients may keep the body but must revalidate it on every use
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+
+        return wrapper
@@ -0,0 +1,105 @@
+import csv
+import json
+from itertools import islice
+
+# Bulk vocabulary import. Words are streamed from the source file, deduplicated
+# on (german, english) by the database and written in executemany batches; the
+# caller owns the transaction, so a whole file imports atomically.
+
+IMPORT_BATCH_SIZE = 5000
+READ_CHUNK_SIZE = 1 << 16
+
+
+def iter_json_array(file):
+    """Yield the items of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators between items
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer):
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array')
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A value ending exactly at the buffer end may continue in the next chunk
+                if end < len(buffer) or eof:
+                    yield item
+                    position = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        elif eof:
+            raise ValueError('Unexpected end of JSON array')
+
+        chunk = file.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_vocabulary(path):
+    """Yield (german, english) pairs from a JSON array or CSV file with those keys/columns."""
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        records = csv.DictReader(file) if path.endswith('.csv') else iter_json_array(file)
+        for record in records:
+            yield record['german'].strip(), record['english'].strip()
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_vocabulary(connection, group_name, path, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Import a vocabulary file into `group_name`, creating the group if needed.
+
+    Safe to re-run: existing words and group memberships are left untouched.
+    The group's words_count is kept by the word_groups triggers. Does not commit.
+    Returns a dict with the group id and the number of rows read and added.
+    """
+    cursor = connection.cursor()
+    cursor.execute('INSERT INTO groups (name) VALUES (?) ON CONFLICT (name) DO NOTHING', (group_name,))
+    cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
+    group_id = cursor.fetchone()[0]
+
+    read = new_words = new_memberships = 0
+    for batch in batched(iter_vocabulary(path), batch_size):
+        cursor.executemany('''
+            INSERT INTO words (german, english) VALUES (?, ?)
+            ON CONFLICT (german, english) DO NOTHING
+        ''', batch)
+        new_words += cursor.rowcount
+
+        cursor.executemany('''
+            INSERT INTO word_groups (group_id, word_id)
+            SELECT ?, w.id
+            FROM words w
+            WHERE w.german = ? AND w.english = ?
+            ON CONFLICT (group_id, word_id) DO NOTHING
+        ''', [(group_id, german, english) for german, english in batch])
+        new_memberships += cursor.rowcount
+
+        read += len(batch)
+        if progress:
+            progress(read)
+
+    return {
+        'group_id': group_id,
+        'read': read,
+        'new_words': new_words,
+        'new_memberships': new_memberships,
+    }
@@ -0,0 +1,171 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+# The cached tables and the counters their triggers bump (migrations 0009 and 0014)
+TABLE_VERSIONS = {
+    'groups': 'groups_version',
+    'study_activities': 'study_activities_version',
+    'words': 'words_version',
+}
+
+_MISSING = object()
+
+
+class LRUCache:
+    """A size-bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions}
+
+
+class LookupCache:
+    """Per-process LRU caches for lookups in the small, rarely written tables.
+
+    There is one LRUCache per table in TABLE_VERSIONS. Missing rows are cached
+    too (as None), so repeated lookups of unknown ids do not reach SQLite
+    either. Writers in this process call `invalidate` after committing. At
+    most every `refresh_interval` seconds a lookup also reads the tables'
+    version counters and clears the caches whose version moved, which picks
+    up writes from other processes (e.g. `invoke import-words`) and any
+    entry loaded by a request that raced with a write.
+    """
+
+    def __init__(self, db, max_entries=1024, refresh_interval=1.0):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self.caches = {table: LRUCache(max_entries) for table in TABLE_VERSIONS}
+        self._versions = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, table, key, load):
+        """The cached value for `key`, else `load()`, which is cached."""
+        self._check()
+        cache = self.caches[table]
+        value = cache.get(key, _MISSING)
+        if value is _MISSING:
+            value = load()
+            cache.put(key, value)
+        return value
+
+    def get_many(self, table, keys, load):
+        """Cached values for all `keys`; `load(missing_keys)` returns a dict of the rest.
+
+        Keys that `load` leaves out are cached as None.
+        """
+        self._check()
+        cache = self.caches[table]
+        values = {}
+        missing = []
+        for key in keys:
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                values[key] = value
+        if missing:
+            loaded = load(missing)
+            for key in missing:
+                values[key] = loaded.get(key)
+                cache.put(key, values[key])
+        return values
+
+    def group(self, cursor, group_id):
+        """{"id", "name"} of the group, or None if it does not exist."""
+        def load():
+            row = cursor.execute('SELECT id, name FROM groups WHERE id = ?', (group_id,)).fetchone()
+            return {'id': row[0], 'name': row[1]} if row else None
+        return self.get('groups', group_id, load)
+
+    def groups(self, cursor):
+        """All groups as {"id", "name"} dicts, in id order."""
+        def load():
+            cursor.execute('SELECT id, name FROM groups ORDER BY id')
+            return tuple({'id': row[0], 'name': row[1]} for row in cursor.fetchall())
+        return self.get('groups', 'all', load)
+
+    def study_activity(self, cursor, activity_id):
+        """The study activity's id, name, url and preview_url, or None."""
+        def load():
+            row = cursor.execute('SELECT id, name, url, preview_url FROM study_activities WHERE id = ?',
+                                 (activity_id,)).fetchone()
+            return dict(zip(('id', 'name', 'url', 'preview_url'), row)) if row else None
+        return self.get('study_activities', activity_id, load)
+
+    def existing_words(self, cursor, word_ids):
+        """The subset of `word_ids` that are words, with one query for the uncached ids."""
+        def load(missing):
+            cursor.execute('SELECT id FROM words WHERE id IN (SELECT value FROM json_each(?))',
+                           (json.dumps(missing),))
+            return {row[0]: True for row in cursor.fetchall()}
+        found = self.get_many('words', word_ids, load)
+        return {word_id for word_id, exists in found.items() if exists}
+
+    def invalidate(self, *tables):
+        """Drop the cached entries of `tables` (all tables if none are given)."""
+        for table in tables or TABLE_VERSIONS:
+            self.caches[table].clear()
+
+    def _check(self):
+        checked_at = self._checked_at
+        if checked_at is not None and time.monotonic() - checked_at < self.refresh_interval:
+            return
+        # Only one thread checks; the others keep using the current entries
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            placeholders = ', '.join('?' * len(TABLE_VERSIONS))
+            rows = self.db.cursor().execute(f'SELECT name, value FROM counters WHERE name IN ({placeholders})',
+                                            list(TABLE_VERSIONS.values())).fetchall()
+            versions = {name: value for name, value in rows}
+            for table, counter in TABLE_VERSIONS.items():
+                if versions.get(counter) != self._versions.get(counter):
+                    self.caches[table].clear()
+            self._versions = versions
+        except Exception:
+            # Without the counters nothing can be trusted
+            log.exception('could not read the lookup cache versions')
+            self.invalidate()
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+
+    def stats(self):
+        return {table: cache.stats() for table, cache in self.caches.items()}
@@ -0,0 +1,268 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from flask import g, request
+
+slow_query_log = logging.getLogger('lang_portal.slow_queries')
+
+# Upper bounds in seconds, as in Prometheus' default client buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def samples(self):
+        """Yield (le, cumulative count) pairs, ending with +Inf."""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield repr(bound), cumulative
+        yield '+Inf', self.count
+
+
+def normalize_sql(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.sha1(sql.encode('utf-8')).hexdigest()[:10]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+class Metrics:
+    """Per-process request and SQL instrumentation.
+
+    Route latencies are recorded per (method, URL rule, status). Every statement
+    run through an InstrumentedCursor (see Db.cursor) is recorded per route and
+    statement fingerprint, with the rows it returned. Statements slower than
+    `slow_query_threshold` seconds are logged with their EXPLAIN QUERY PLAN.
+    """
+
+    def __init__(self, slow_query_threshold=0.1):
+        self.slow_query_threshold = slow_query_threshold
+        self.requests = {}
+        self.queries = {}
+        self.query_rows = {}
+        self.statements = {}
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def record_request(response):
+            # Streamed responses are timed up to the first byte
+            started = g.pop('request_started', None)
+            if started is not None:
+                self.observe_request(request.method, current_route(), response.status_code,
+                                     time.perf_counter() - started)
+            return response
+
+    def observe_request(self, method, route, status, elapsed):
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self.requests.get(key)
+            if histogram is None:
+                histogram = self.requests[key] = Histogram()
+            histogram.observe(elapsed)
+
+    def observe_query(self, route, sql, elapsed, rows):
+        statement = normalize_sql(sql)
+        query_id = fingerprint(statement)
+        key = (route, query_id)
+        with self._lock:
+            self.statements.setdefault(query_id, statement)
+            histogram = self.queries.get(key)
+            if histogram is None:
+                histogram = self.queries[key] = Histogram()
+            histogram.observe(elapsed)
+            self.query_rows[key] = self.query_rows.get(key, 0) + rows
+            if elapsed >= self.slow_query_threshold:
+                self.slow_queries += 1
+        return elapsed >= self.slow_query_threshold
+
+    def render(self, extra=()):
+        """Render all metrics in the Prometheus text exposition format.
+
+        `extra` is an iterable of (name, type, help, [(labels, value)]) families,
+        used for gauges owned by other components such as the connection pool.
+        """
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, labels, histogram):
+            for le, count in histogram.samples():
+                lines.append(f'{name}_bucket{format_labels(labels + [("le", le)])} {count}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+            lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+
+        with self._lock:
+            family('http_request_duration_seconds', 'histogram', 'Request latency by route.')
+            for (method, route, status), value in sorted(self.requests.items()):
+                histogram('http_request_duration_seconds',
+                          [('method', method), ('route', route), ('status', status)], value)
+
+            family('sql_query_duration_seconds', 'histogram', 'SQL statement latency including fetches.')
+            for (route, query_id), value in sorted(self.queries.items()):
+                histogram('sql_query_duration_seconds', [('route', route), ('query', query_id)], value)
+
+            family('sql_query_rows_total', 'counter', 'Rows fetched by SQL statements.')
+            for (route, query_id), value in sorted(self.query_rows.items()):
+                lines.append(f'sql_query_rows_total{format_labels([("route", route), ("query", query_id)])} {value}')
+
+            family('sql_statement_info', 'gauge', 'Statement text by query fingerprint.')
+            for query_id, statement in sorted(self.statements.items()):
+                labels = [('query', query_id), ('statement', statement[:300])]
+                lines.append(f'sql_statement_info{format_labels(labels)} 1')
+
+            family('sql_slow_queries_total', 'counter', 'Statements slower than the slow query threshold.')
+            lines.append(f'sql_slow_queries_total {self.slow_queries}')
+
+        for name, kind, help_text, samples in extra:
+            family(name, kind, help_text)
+            for labels, value in samples:
+                lines.append(f'{name}{format_labels(labels) if labels else ""} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def current_route():
+    try:
+        rule = request.url_rule
+    except RuntimeError:
+        # Outside of a request, e.g. invoke tasks
+        return 'none'
+    return rule.rule if rule is not None else 'unmatched'
+
+
+class InstrumentedCursor:
+    """Wraps a sqlite3 cursor and records each statement with Metrics.
+
+    SQLite does most of the work while rows are stepped through, so a statement
+    is timed from execute() through its fetches and recorded when the cursor
+    moves on to the next statement or is finished by Db.close().
+    """
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+        # Captured now: the request is gone by the time Db.close() finishes the cursor
+        self._route = current_route()
+        self._sql = None
+        self._params = None
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def _begin(self, sql, params):
+        self.finish()
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def execute(self, sql, params=()):
+        self._begin(sql, params)
+        self._timed(self._cursor.execute, sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        # The rows are only needed again for the slow query plan
+        seq_of_params = list(seq_of_params)
+        self._begin(sql, seq_of_params[0] if seq_of_params else None)
+        self._timed(self._cursor.executemany, sql, seq_of_params)
+        return self
+
+    def executescript(self, script):
+        self._begin(script, None)
+        self._timed(self._cursor.executescript, script)
+        return self
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(self._cursor.fetchmany, size if size is not None else self._cursor.arraysize)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def finish(self):
+        if self._sql is None:
+            return
+        sql, params = self._sql, self._params
+        self._sql = self._params = None
+        slow = self._metrics.observe_query(self._route, sql, self._elapsed, self._rows)
+        if slow:
+            self._log_slow_query(sql, params)
+
+    def close(self):
+        self.finish()
+        self._cursor.close()
+
+    def _log_slow_query(self, sql, params):
+        plan = []
+        if params is not None:
+            try:
+                plan = [row[3] for row in self._cursor.connection.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+            except Exception as e:
+                plan = [f'unavailable: {e}']
+        slow_query_log.warning('slow query on %s: %.1f ms, %d rows\n%s\nplan:\n  %s',
+                               self._route, self._elapsed * 1000, self._rows,
+                               normalize_sql(sql), '\n  '.join(plan))
@@ -0,0 +1,67 @@
+import os
+import re
+
+# Versioned schema migrations. Every file in sql/migrations is applied once, in
+# file name order, and recorded in schema_migrations together with its version
+# (the file name without the .sql extension).
+#
+# A migration that only matters for databases older than a later one (added
+# after the fact to repair their upgrade path) names that migration in a
+# `-- superseded-by: <version>` line. Databases that already applied it record
+# the older migration without running it.
+SUPERSEDED_BY = re.compile(r'^-- superseded-by: (\S+)$', re.MULTILINE)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'migrations')
+
+
+def applied_versions(connection):
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version    TEXT PRIMARY KEY,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    connection.commit()
+    return {row[0] for row in connection.execute('SELECT version FROM schema_migrations')}
+
+
+def pending_migrations(connection):
+    applied = applied_versions(connection)
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
+    return [f for f in files if f[:-len('.sql')] not in applied]
+
+
+def run_migrations(connection, log=print):
+    """Apply all pending migrations, each in its own transaction.
+
+    Returns the list of versions that were applied.
+    """
+    applied = []
+    done = applied_versions(connection)
+    for migration_file in pending_migrations(connection):
+        version = migration_file[:-len('.sql')]
+        with open(os.path.join(MIGRATIONS_DIR, migration_file)) as f:
+            migration_sql = f.read()
+
+        superseded_by = SUPERSEDED_BY.search(migration_sql)
+        if superseded_by and superseded_by.group(1) in done:
+            if log:
+                log(f"Skipping migration: {migration_file} (superseded by {superseded_by.group(1)})")
+            connection.execute('INSERT INTO schema_migrations (version) VALUES (?)', (version,))
+            connection.commit()
+            continue
+
+        if log:
+            log(f"Running migration: {migration_file}")
+        try:
+            # executescript commits anything pending first, so the migration opens
+            # its own transaction and records its version inside it
+            connection.executescript(
+                'BEGIN;\n' + migration_sql +
+                f"\n;INSERT INTO schema_migrations (version) VALUES ('{version}');\nCOMMIT;"
+            )
+        except Exception:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+        applied.append(version)
+    return applied
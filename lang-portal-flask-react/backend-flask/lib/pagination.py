@@ -0,0 +1,42 @@
+import base64
+import json
+
+# Keyset ("cursor") pagination helpers. A cursor is an opaque token holding the
+# sort column, direction and the sort key + id of the last row on a page, so
+# the next page is an index range scan instead of LIMIT/OFFSET.
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_by, order, sort_value, row_id):
+    payload = json.dumps([sort_by, order, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_by, order):
+    """Return the (sort_value, row_id) stored in `token`, or None for the first page."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        cursor_sort_by, cursor_order, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+    if cursor_sort_by != sort_by or cursor_order != order or not isinstance(row_id, int):
+        raise InvalidCursor('Cursor does not match the requested sort order')
+    return sort_value, row_id
+
+
+def keyset_condition(sort_expression, id_expression, order, position):
+    """SQL condition (and its params) selecting rows after `position`.
+
+    Rows must be ordered by `sort_expression {order}, id_expression {order}`.
+    The row value comparison lets SQLite start an index range at `position`.
+    """
+    if position is None:
+        return '1 = 1', ()
+    sort_value, row_id = position
+    op = '>' if order == 'asc' else '<'
+    return f'({sort_expression}, {id_expression}) {op} (?, ?)', (sort_value, row_id)
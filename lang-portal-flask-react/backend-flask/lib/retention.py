@@ -0,0 +1,293 @@
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+
+from lib.dashboard_stats import refresh_dashboard_stats
+from lib.db import bump_data_version
+from lib.reviews import subtract_word_reviews
+from lib.rollups import delete_user_rollups, prune_rollup_words, recount_rollups, subtract_rollups
+from lib.serialization import dumps
+from lib.srs import now_timestamp
+
+log = logging.getLogger('lang_portal.retention')
+
+# Purging study history in bounded batches. Every batch is its own short
+# transaction, so a purge of a long history never holds the write lock for
+# more than one batch, and readers and review writes interleave with it.
+# Deleted rows can be archived to a gzip-compressed NDJSON file first.
+#
+# The word_reviews counters, the study rollups and the dashboard statistics
+# follow the deleted rows, in the same transaction as each batch. The
+# spaced-repetition schedules are kept, except by reset_history.
+#
+# Reviews still queued in an API process's review buffer are never written
+# into a purged session: the buffer drops reviews whose session is gone when
+# it writes them (lib/review_buffer.py). Callers in the API process flush it
+# first so that the purge covers them too.
+
+PURGE_BATCH_SIZE = 5000
+
+SESSION_COLUMNS = ['id', 'user_id', 'group_id', 'study_activity_id', 'created_at', 'ended_at',
+                   'review_count', 'correct_count', 'wrong_count', 'first_activity_at', 'last_activity_at']
+REVIEW_ITEM_COLUMNS = ['id', 'user_id', 'study_session_id', 'word_id', 'correct', 'created_at']
+
+
+class Archive:
+    """Appends rows as NDJSON lines ({"table": ..., column: value, ...}) to a gzip file."""
+
+    def __init__(self, path):
+        self.path = path
+        # Appending adds a gzip member; gzip readers concatenate them
+        self.file = gzip.open(path, 'ab')
+
+    def write(self, table, columns, rows):
+        self.file.write(b''.join(dumps(dict(zip(columns, row), table=table)) + b'\n' for row in rows))
+        # Each batch is on disk before its rows are deleted
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def session_filter(user_id, group_id=None, study_activity_id=None, before=None):
+    """WHERE clause and parameters selecting the user's sessions to purge."""
+    conditions = ['user_id = ?']
+    params = [user_id]
+    if group_id is not None:
+        conditions.append('group_id = ?')
+        params.append(group_id)
+    if study_activity_id is not None:
+        conditions.append('study_activity_id = ?')
+        params.append(study_activity_id)
+    if before is not None:
+        conditions.append('created_at < ?')
+        params.append(before)
+    return ' AND '.join(conditions), params
+
+
+def purge_history(connection, user_id, group_id=None, study_activity_id=None, before=None,
+                  batch_size=PURGE_BATCH_SIZE, archive_path=None, progress=None, update_counters=True):
+    """Delete the user's matching sessions (started before `before`, if given) and their reviews.
+
+    Commits after every batch of at most `batch_size` rows. `progress` is
+    called with the running totals after each one. Returns the totals.
+    Without `update_counters`, the caller replaces the word_reviews counters
+    and the rollups itself.
+    """
+    where, params = session_filter(user_id, group_id, study_activity_id, before)
+    archive = Archive(archive_path) if archive_path else None
+    totals = {'sessions': 0, 'review_items': 0}
+    cursor = connection.cursor()
+    try:
+        while True:
+            cursor.execute(f'SELECT {", ".join(SESSION_COLUMNS)} FROM study_sessions WHERE {where} '
+                           f'ORDER BY id LIMIT ?', params + [batch_size])
+            sessions = cursor.fetchall()
+            if not sessions:
+                break
+            session_ids = json.dumps([session[0] for session in sessions])
+            # (group_id, study_activity_id) of each session, for the rollup buckets
+            session_keys = {session[0]: (session[2], session[3]) for session in sessions}
+            # The rollup counts follow every batch; the distinct words of the
+            # buckets changed are recounted once, with the sessions' batch
+            changed = set()
+
+            # A session can hold any number of reviews, so they go in batches of their own
+            while True:
+                cursor.execute(f'''
+                    SELECT {", ".join(REVIEW_ITEM_COLUMNS)}
+                    FROM word_review_items
+                    WHERE study_session_id IN (SELECT value FROM json_each(?))
+                    LIMIT ?
+                ''', (session_ids, batch_size))
+                items = cursor.fetchall()
+                if not items:
+                    break
+                if archive:
+                    archive.write('word_review_items', REVIEW_ITEM_COLUMNS, items)
+                if update_counters:
+                    subtract_word_reviews(cursor, user_id, [(item[3], item[4] == 1) for item in items])
+                cursor.execute('DELETE FROM word_review_items WHERE id IN (SELECT value FROM json_each(?))',
+                               (json.dumps([item[0] for item in items]),))
+                if update_counters:
+                    reviews = [(*session_keys[item[2]], item[5], item[4] == 1) for item in items]
+                    changed |= subtract_rollups(cursor, user_id, reviews=reviews)
+                bump_data_version(cursor)
+                connection.commit()
+                totals['review_items'] += len(items)
+                if progress:
+                    progress(totals)
+
+            if archive:
+                archive.write('study_sessions', SESSION_COLUMNS, sessions)
+            cursor.execute('DELETE FROM study_sessions WHERE id IN (SELECT value FROM json_each(?))', (session_ids,))
+            if update_counters:
+                changed |= subtract_rollups(cursor, user_id,
+                                            sessions=[(session[2], session[3], session[4]) for session in sessions])
+                recount_rollups(cursor, changed)
+            bump_data_version(cursor)
+            connection.commit()
+            totals['sessions'] += len(sessions)
+            if progress:
+                progress(totals)
+    except Exception:
+        connection.rollback()
+        # The batches committed before the failure are gone, so the streak and
+        # last study date are refreshed anyway; the purge's own error is raised
+        refresh_after_failure(connection, user_id)
+        raise
+    finally:
+        if archive:
+            archive.close()
+    # The streak and last study date depend on which sessions are left
+    refresh_dashboard_stats(cursor, user_id)
+    prune_rollup_words(cursor, user_id=user_id)
+    bump_data_version(cursor)
+    connection.commit()
+    return totals
+
+
+def refresh_after_failure(connection, user_id):
+    """Refresh the user's dashboard statistics after a failed purge, logging any error of its own."""
+    try:
+        cursor = connection.cursor()
+        refresh_dashboard_stats(cursor, user_id)
+        bump_data_version(cursor)
+        connection.commit()
+    except Exception:
+        # E.g. the database is still locked; the caller raises the original error
+        log.exception('refreshing the dashboard statistics of user %s after a failed purge failed', user_id)
+        if connection.in_transaction:
+            connection.rollback()
+
+
+def delete_user_words(connection, table, user_id, batch_size=PURGE_BATCH_SIZE):
+    """Delete all of the user's rows of a per-(user, word) table in batches. Returns the count."""
+    cursor = connection.cursor()
+    deleted = 0
+    while True:
+        cursor.execute(f'''
+            DELETE FROM {table}
+            WHERE user_id = ? AND word_id IN (SELECT word_id FROM {table} WHERE user_id = ? LIMIT ?)
+        ''', (user_id, user_id, batch_size))
+        rows = cursor.rowcount
+        connection.commit()
+        if not rows:
+            return deleted
+        deleted += rows
+
+
+def reset_history(connection, user_id, batch_size=PURGE_BATCH_SIZE, archive_path=None, progress=None):
+    """Delete all of the user's study history, including the state derived from it."""
+    # The per-word counters and rollups are deleted below rather than taken apart review by review
+    totals = purge_history(connection, user_id, batch_size=batch_size, archive_path=archive_path,
+                           progress=progress, update_counters=False)
+
+    # The per-word counters, schedules and rollups are derived from the review items
+    cursor = connection.cursor()
+    try:
+        totals['word_reviews'] = delete_user_words(connection, 'word_reviews', user_id, batch_size)
+        totals['word_schedules'] = delete_user_words(connection, 'word_schedules', user_id, batch_size)
+        delete_user_rollups(cursor, user_id)
+        refresh_dashboard_stats(cursor, user_id)
+        bump_data_version(cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        refresh_after_failure(connection, user_id)
+        raise
+    return totals
+
+
+class HistoryResets:
+    """Runs reset_history for users in background threads.
+
+    Resetting a long history takes seconds to minutes, longer than a request
+    should hold a worker and a pooled connection (or than proxies wait), so
+    the API only starts it and reports its progress. Afterwards the freed
+    pages are returned with incremental_vacuum. Each user has at most one
+    reset running. The status of a user's latest reset is kept in this
+    process only.
+    """
+
+    def __init__(self, db, batch_size=PURGE_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self._resets = {}  # user_id -> status
+        self._lock = threading.Lock()
+
+    def start(self, user_id):
+        """Start resetting the user's history unless it already runs. Returns its status."""
+        with self._lock:
+            status = self._resets.get(user_id)
+            if status is not None and status['state'] == 'running':
+                return dict(status)
+            status = self._resets[user_id] = {
+                'state': 'running',
+                'sessions': 0,
+                'review_items': 0,
+                'vacuumed_pages': None,
+                'started_at': now_timestamp(),
+                'finished_at': None,
+                'error': None,
+            }
+            snapshot = dict(status)
+        threading.Thread(target=self._run, args=(user_id, status), name=f'history-reset-{user_id}',
+                         daemon=True).start()
+        return snapshot
+
+    def status(self, user_id):
+        """The status of the user's latest reset, or None."""
+        with self._lock:
+            status = self._resets.get(user_id)
+            return dict(status) if status is not None else None
+
+    def _update(self, status, **values):
+        with self._lock:
+            status.update(values)
+
+    def _run(self, user_id, status):
+        connection = None
+        result = {'state': 'failed'}
+        try:
+            connection = self.db.pool.acquire()
+            totals = reset_history(connection, user_id, batch_size=self.batch_size,
+                                   progress=lambda totals: self._update(status, **totals))
+            result = {'state': 'done', 'sessions': totals['sessions'], 'review_items': totals['review_items']}
+            self._update(status, sessions=totals['sessions'], review_items=totals['review_items'])
+            # The freed pages go back to the file system in short steps, each its own write.
+            # The history is gone either way, so a failed vacuum only reports its error.
+            try:
+                result['vacuumed_pages'] = incremental_vacuum(connection)
+            except sqlite3.Error as e:
+                log.exception('vacuuming after the reset of user %s failed', user_id)
+                result['error'] = str(e)
+        except Exception as e:
+            log.exception('resetting the history of user %s failed', user_id)
+            result['error'] = str(e)
+        finally:
+            if connection is not None:
+                self.db.pool.release(connection)
+            self._update(status, finished_at=now_timestamp(), **result)
+
+
+def incremental_vacuum(connection, max_pages=None, step=1000):
+    """Return free pages to the file system, `step` pages per statement.
+
+    Only works on databases with auto_vacuum = INCREMENTAL (new databases are
+    created that way; `invoke enable-incremental-vacuum` converts an existing
+    one). Returns the number of pages freed, or None if it is not enabled.
+    """
+    if connection.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+        return None
+    freed = 0
+    while max_pages is None or freed < max_pages:
+        free_pages = connection.execute('PRAGMA freelist_count').fetchone()[0]
+        if not free_pages:
+            break
+        pages = min(step, free_pages) if max_pages is None else min(step, free_pages, max_pages - freed)
+        connection.execute(f'PRAGMA incremental_vacuum({pages})').fetchall()
+        freed += pages
+    return freed
@@ -0,0 +1,198 @@
+import atexit
+import json
+import logging
+import threading
+import time
+
+from lib.reviews import insert_reviews
+from lib.srs import now_timestamp
+
+log = logging.getLogger('lang_portal.review_buffer')
+
+
+class ReviewBuffer:
+    """Write-behind queue for review submissions, written with group commits.
+
+    Review requests are validated as usual and then only appended to memory
+    (the API answers 202). A background thread writes everything pending in
+    one transaction once the oldest submission is `flush_interval` seconds
+    old or `max_rows` reviews are waiting, so a burst of requests shares one
+    commit (and one WAL sync) instead of paying for one each.
+
+    Durability: accepted reviews live only in this process until their batch
+    commits. A crash or SIGKILL loses at most the last `flush_interval`
+    worth of reviews; a normal shutdown flushes them (see close()). Reads
+    such as the dashboard catch up once the batch is committed. Each review
+    keeps the time it was submitted, not the time it was written.
+    """
+
+    def __init__(self, db, flush_interval=0.05, max_rows=1000, max_pending=100000):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        # Submitters block while this many reviews are waiting to be written
+        self.max_pending = max_pending
+        self._pending = []  # (user_id, session_id, reviewed_at, reviews)
+        self._pending_rows = 0
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+
+    def submit(self, user_id, session_id, reviews):
+        """Queue validated (word_id, is_correct) pairs for one of the user's sessions."""
+        if not reviews:
+            return
+        with self._condition:
+            while self._pending_rows >= self.max_pending and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                raise RuntimeError('Review buffer is closed')
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append((user_id, session_id, now_timestamp(), reviews))
+            self._pending_rows += len(reviews)
+            self._start()
+            self._condition.notify_all()
+
+    def _start(self):
+        # Started on first use so processes that never take reviews (invoke
+        # tasks, the reloader's parent process) do not run a writer thread
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='review-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                deadline = self._oldest + self.flush_interval
+                while not self._closed and self._pending_rows < self.max_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed:
+                    # close() writes what is left
+                    return
+            try:
+                self.flush()
+            except Exception:
+                log.exception('review buffer flush failed, retrying')
+                time.sleep(self.flush_interval)
+
+    def flush(self, connection=None):
+        """Write everything pending now. Returns the number of reviews written.
+
+        Requests that already hold a pooled connection pass it (with nothing
+        uncommitted on it): waiting for a second one could block until the
+        pool timeout when every connection is held by such a request.
+        """
+        with self._write_lock:
+            with self._condition:
+                batch, self._pending, self._pending_rows = self._pending, [], 0
+                self._condition.notify_all()
+            if not batch:
+                return 0
+            if connection is not None:
+                return self._write(connection, batch)
+            try:
+                connection = self.db.pool.acquire()
+            except Exception:
+                # Nothing was written: put the batch back in front of newer submissions
+                with self._condition:
+                    self._pending[:0] = batch
+                    self._pending_rows += sum(len(reviews) for *_, reviews in batch)
+                    self._oldest = time.monotonic()
+                raise
+            try:
+                return self._write(connection, batch)
+            finally:
+                self.db.pool.release(connection)
+
+    def _write(self, connection, batch):
+        try:
+            written = self._commit(connection, batch)
+        except Exception:
+            connection.rollback()
+            log.exception('review batch of %d submissions failed, writing them one by one', len(batch))
+            # Isolate the failing submissions instead of dropping the whole batch
+            written = 0
+            for entry in batch:
+                try:
+                    written += self._commit(connection, [entry])
+                except Exception:
+                    connection.rollback()
+                    self.rows_dropped += len(entry[3])
+                    log.exception('dropped %d reviews for session %s of user %s',
+                                  len(entry[3]), entry[1], entry[0])
+        self.batches += 1
+        self.rows_written += written
+        return written
+
+    def _commit(self, connection, batch):
+        # Submissions for the same session within the same second are written
+        # as one; the timestamps only have second resolution anyway
+        coalesced = {}
+        for user_id, session_id, reviewed_at, reviews in batch:
+            coalesced.setdefault((user_id, session_id, reviewed_at), []).extend(reviews)
+
+        cursor = connection.cursor()
+        # Check the sessions under the write lock: a purge (possibly from
+        # `invoke purge-history` in another process) may have deleted one since
+        # its reviews were queued, and they must not be written back into it.
+        # Nor into a closed one: the review route checks ended_at without a
+        # lock, so a close can commit between that check and the submission.
+        # Reviews queued before a close are flushed by it, so any still pending
+        # for a session that ended by their own (second-resolution) time came
+        # in after it.
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT id, ended_at FROM study_sessions WHERE id IN (SELECT value FROM json_each(?))',
+                       (json.dumps(list({session_id for _, session_id, _ in coalesced})),))
+        ended_at = {row[0]: row[1] for row in cursor.fetchall()}
+
+        written = dropped = 0
+        for (user_id, session_id, reviewed_at), reviews in coalesced.items():
+            if session_id not in ended_at:
+                dropped += len(reviews)
+                log.warning('dropped %d reviews for deleted session %s of user %s', len(reviews), session_id, user_id)
+                continue
+            if ended_at[session_id] is not None and ended_at[session_id] <= reviewed_at:
+                dropped += len(reviews)
+                log.warning('dropped %d reviews for closed session %s of user %s', len(reviews), session_id, user_id)
+                continue
+            insert_reviews(cursor, user_id, session_id, reviews, reviewed_at=reviewed_at)
+            written += len(reviews)
+        self.db.bump_data_version(cursor)
+        connection.commit()
+        self.rows_dropped += dropped
+        return written
+
+    def close(self):
+        """Stop the writer thread and write whatever is still pending."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def stats(self):
+        with self._condition:
+            pending = self._pending_rows
+        return {
+            "pending": pending,
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+        }
@@ -0,0 +1,136 @@
+import json
+
+from lib.rollups import update_review_rollups
+from lib.srs import apply_reviews as apply_schedules, now_timestamp
+
+# Review ingestion: validates incoming review payloads, writes them to
+# word_review_items in bulk and keeps the word_reviews counter cache in step
+# so that sorting words by correct/wrong counts reads precomputed rows.
+
+# Upper bound for a single bulk submission (e.g. an offline-synced session)
+MAX_BULK_REVIEWS = 10000
+
+
+def validate_reviews(cursor, reviews, lookup_cache=None):
+    """Validate a whole review payload before anything is written.
+
+    Returns `(accepted, rejected)`: `accepted` is a list of
+    `(word_id, is_correct)` pairs and `rejected` a list of
+    `{"index": ..., "error": ...}` entries pointing into `reviews`.
+    With a `lookup_cache` only words it has not seen are looked up.
+    """
+    candidates = []
+    rejected = []
+    for index, review in enumerate(reviews):
+        if not isinstance(review, dict) or 'word_id' not in review or 'is_correct' not in review:
+            rejected.append({"index": index, "error": "Invalid review format"})
+            continue
+        word_id = review['word_id']
+        is_correct = review['is_correct']
+        if isinstance(word_id, bool) or not isinstance(word_id, int):
+            rejected.append({"index": index, "error": "word_id must be an integer"})
+            continue
+        if is_correct not in (True, False):
+            rejected.append({"index": index, "error": "is_correct must be a boolean"})
+            continue
+        candidates.append((index, word_id, bool(is_correct)))
+
+    # Check all referenced words with one query instead of one per review
+    word_ids = list({word_id for _, word_id, _ in candidates})
+    if lookup_cache is not None:
+        known_ids = lookup_cache.existing_words(cursor, word_ids)
+    else:
+        cursor.execute('SELECT id FROM words WHERE id IN (SELECT value FROM json_each(?))', (json.dumps(word_ids),))
+        known_ids = {row[0] for row in cursor.fetchall()}
+
+    accepted = []
+    for index, word_id, is_correct in candidates:
+        if word_id in known_ids:
+            accepted.append((word_id, is_correct))
+        else:
+            rejected.append({"index": index, "error": "Word not found"})
+    rejected.sort(key=lambda item: item["index"])
+    return accepted, rejected
+
+
+def insert_reviews(cursor, user_id, session_id, reviews, reviewed_at=None):
+    """Write validated (word_id, is_correct) pairs for one of the user's sessions.
+
+    All rows go through a single executemany on the caller's cursor, so the
+    batch commits or rolls back as a whole together with the counter cache,
+    the spaced-repetition schedules and the study rollups. `reviewed_at`
+    defaults to now; the review buffer passes the time the reviews were
+    submitted.
+    """
+    reviewed_at = reviewed_at or now_timestamp()
+    cursor.executemany('''
+        INSERT INTO word_review_items (user_id, study_session_id, word_id, correct, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(user_id, session_id, word_id, 1 if is_correct else 0, reviewed_at) for word_id, is_correct in reviews])
+    update_word_reviews(cursor, user_id, reviews, reviewed_at)
+    apply_schedules(cursor, user_id, reviews, reviewed_at)
+    update_review_rollups(cursor, user_id, session_id, reviews, reviewed_at)
+
+
+def update_word_reviews(cursor, user_id, reviews, reviewed_at=None):
+    """Fold a batch of (word_id, is_correct) pairs into the user's word_reviews rows.
+
+    Runs on the caller's cursor so it commits (or rolls back) together with
+    the inserted review items.
+    """
+    totals = {}
+    for word_id, is_correct in reviews:
+        correct, wrong = totals.get(word_id, (0, 0))
+        if is_correct:
+            correct += 1
+        else:
+            wrong += 1
+        totals[word_id] = (correct, wrong)
+
+    cursor.executemany('''
+        INSERT INTO word_reviews (user_id, word_id, correct_count, wrong_count, last_reviewed)
+        VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        ON CONFLICT (user_id, word_id) DO UPDATE SET
+            correct_count = correct_count + excluded.correct_count,
+            wrong_count = wrong_count + excluded.wrong_count,
+            last_reviewed = excluded.last_reviewed
+    ''', [(user_id, word_id, correct, wrong, reviewed_at) for word_id, (correct, wrong) in totals.items()])
+
+
+def subtract_word_reviews(cursor, user_id, reviews):
+    """Take deleted (word_id, is_correct) pairs back out of the user's word_reviews rows.
+
+    Rows left without any review are deleted. `last_reviewed` keeps its value.
+    """
+    totals = {}
+    for word_id, is_correct in reviews:
+        correct, wrong = totals.get(word_id, (0, 0))
+        totals[word_id] = (correct + 1, wrong) if is_correct else (correct, wrong + 1)
+
+    cursor.executemany('''
+        UPDATE word_reviews
+        SET correct_count = correct_count - ?,
+            wrong_count = wrong_count - ?
+        WHERE user_id = ? AND word_id = ?
+    ''', [(correct, wrong, user_id, word_id) for word_id, (correct, wrong) in totals.items()])
+    cursor.execute('''
+        DELETE FROM word_reviews
+        WHERE user_id = ? AND word_id IN (SELECT value FROM json_each(?)) AND correct_count + wrong_count <= 0
+    ''', (user_id, json.dumps(list(totals))))
+
+
+def rebuild_word_reviews(cursor):
+    """Recompute every word_reviews row from the raw review log."""
+    cursor.execute('DELETE FROM word_reviews')
+    cursor.execute('''
+        INSERT INTO word_reviews (user_id, word_id, correct_count, wrong_count, last_reviewed)
+        SELECT
+            user_id,
+            word_id,
+            SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN correct = 0 THEN 1 ELSE 0 END),
+            MAX(created_at)
+        FROM word_review_items
+        GROUP BY user_id, word_id
+    ''')
+    return cursor.rowcount
@@ -0,0 +1,266 @@
+import json
+from datetime import date, datetime, timedelta, timezone
+
+# Day and week rollups of each user's studying (see
+# sql/migrations/0011_add_study_rollups.sql). Session counts are kept by a
+# trigger; the review counts are folded in here, on the caller's transaction,
+# once per review batch rather than once per review.
+
+GRANULARITIES = ('day', 'week')
+PERIOD_DAYS = {'day': 1, 'week': 7}
+
+# Upper bound for the points of one timeseries request
+MAX_POINTS = 1000
+
+
+def utc_today():
+    # Periods are UTC dates, like SQLite's CURRENT_TIMESTAMP
+    return datetime.now(timezone.utc).date()
+
+
+def period_start(granularity, day):
+    """The first day of the bucket containing `day` (weeks start on Monday)."""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def next_period(granularity, period):
+    return period + timedelta(days=PERIOD_DAYS[granularity])
+
+
+def period_count(granularity, start, end):
+    """Number of periods from the one containing `start` to the one containing `end`."""
+    return (period_start(granularity, end) - period_start(granularity, start)).days // PERIOD_DAYS[granularity] + 1
+
+
+def buckets(user_id, group_id, study_activity_id, reviewed_at):
+    """The (user_id, granularity, dimension, key_id, period) keys a review at `reviewed_at` counts towards."""
+    day = date.fromisoformat(reviewed_at[:10])
+    return [(user_id, granularity, dimension, key_id, period_start(granularity, day).isoformat())
+            for granularity in GRANULARITIES
+            for dimension, key_id in (('total', 0), ('group', group_id), ('activity', study_activity_id))]
+
+
+def update_review_rollups(cursor, user_id, session_id, reviews, reviewed_at):
+    """Count a batch of (word_id, is_correct) pairs of one session into its buckets."""
+    if not reviews:
+        return
+    cursor.execute('SELECT group_id, study_activity_id FROM study_sessions WHERE id = ?', (session_id,))
+    session = cursor.fetchone()
+    if session is None:
+        return
+
+    # The user's first reviews of a week make the counted words of past weeks
+    # obsolete, so they are pruned here, once per user and week
+    day = date.fromisoformat(reviewed_at[:10])
+    cursor.execute('''
+        SELECT reviews FROM study_rollups
+        WHERE user_id = ? AND granularity = 'week' AND dimension = 'total' AND key_id = 0 AND period = ?
+    ''', (user_id, period_start('week', day).isoformat()))
+    week = cursor.fetchone()
+    if week is None or week[0] == 0:
+        prune_rollup_words(cursor, day, user_id)
+
+    word_ids = json.dumps(sorted({word_id for word_id, _ in reviews}))
+    correct = sum(1 for _, is_correct in reviews if is_correct)
+    rows = []
+    for bucket in buckets(user_id, session[0], session[1], reviewed_at):
+        # The rows actually inserted are the words new to this bucket
+        cursor.execute('''
+            INSERT INTO study_rollup_words (user_id, granularity, dimension, key_id, period, word_id)
+            SELECT ?, ?, ?, ?, ?, value FROM json_each(?) WHERE true
+            ON CONFLICT DO NOTHING
+        ''', (*bucket, word_ids))
+        rows.append((*bucket, len(reviews), correct, cursor.rowcount))
+
+    cursor.executemany('''
+        INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period,
+                                   reviews, correct_reviews, words_touched)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, granularity, dimension, key_id, period) DO UPDATE SET
+            reviews         = reviews + excluded.reviews,
+            correct_reviews = correct_reviews + excluded.correct_reviews,
+            words_touched   = words_touched + excluded.words_touched
+    ''', rows)
+
+
+def prune_rollup_words(cursor, today=None, user_id=None):
+    """Forget the counted words of buckets before the current week.
+
+    Reviews are only ever added to the current day and week, so older word
+    sets are never consulted again. Without `user_id`, every user's are
+    pruned. Returns the number of rows deleted.
+    """
+    current_week = period_start('week', today or utc_today()).isoformat()
+    if user_id is None:
+        cursor.execute('DELETE FROM study_rollup_words WHERE period < ?', (current_week,))
+    else:
+        cursor.execute('DELETE FROM study_rollup_words WHERE user_id = ? AND period < ?', (user_id, current_week))
+    return cursor.rowcount
+
+
+def subtract_rollups(cursor, user_id, sessions=(), reviews=()):
+    """Take deleted sessions and review items out of the user's rollup counts.
+
+    `sessions` are (group_id, study_activity_id, created_at) and `reviews`
+    (group_id, study_activity_id, created_at, is_correct) of rows
+    deleted on the caller's transaction. Returns the buckets changed, whose
+    distinct words recount_rollups brings up to date.
+    """
+    # Counted per (group, activity, day) first; a batch spans few of them
+    days = {}  # (group_id, study_activity_id, day) -> [sessions, reviews, correct_reviews]
+    for group_id, study_activity_id, created_at in sessions:
+        days.setdefault((group_id, study_activity_id, created_at[:10]), [0, 0, 0])[0] += 1
+    for group_id, study_activity_id, created_at, is_correct in reviews:
+        day = days.setdefault((group_id, study_activity_id, created_at[:10]), [0, 0, 0])
+        day[1] += 1
+        day[2] += 1 if is_correct else 0
+
+    changes = {}  # bucket -> [sessions, reviews, correct_reviews]
+    for (group_id, study_activity_id, day), counts in days.items():
+        for bucket in buckets(user_id, group_id, study_activity_id, day):
+            change = changes.setdefault(bucket, [0, 0, 0])
+            for i, count in enumerate(counts):
+                change[i] += count
+
+    cursor.executemany('''
+        UPDATE study_rollups
+        SET sessions = sessions - ?, reviews = reviews - ?, correct_reviews = correct_reviews - ?
+        WHERE user_id = ? AND granularity = ? AND dimension = ? AND key_id = ? AND period = ?
+    ''', [(*change, *bucket) for bucket, change in changes.items()])
+    return set(changes)
+
+
+def recount_rollups(cursor, changed):
+    """Recount the distinct words of the `changed` buckets from the remaining reviews.
+
+    Buckets left without sessions and reviews are deleted, as rebuild_rollups
+    would leave them.
+    """
+    key_columns = {'total': None, 'group': 'ss.group_id', 'activity': 'ss.study_activity_id'}
+    for bucket in changed:
+        user_id, granularity, dimension, key_id, period = bucket
+        key_condition = f'AND {key_columns[dimension]} = ?' if key_columns[dimension] else ''
+        cursor.execute(f'''
+            SELECT DISTINCT wri.word_id
+            FROM word_review_items wri
+            JOIN study_sessions ss ON ss.id = wri.study_session_id
+            WHERE wri.user_id = ? AND wri.created_at >= ? AND wri.created_at < ? {key_condition}
+        ''', (user_id, period, next_period(granularity, date.fromisoformat(period)).isoformat())
+             + ((key_id,) if key_columns[dimension] else ()))
+        word_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute('''
+            UPDATE study_rollups SET words_touched = ?
+            WHERE user_id = ? AND granularity = ? AND dimension = ? AND key_id = ? AND period = ?
+        ''', (len(word_ids), *bucket))
+        # Words reviewed in the bucket again must count as touched once more
+        cursor.execute('''
+            DELETE FROM study_rollup_words
+            WHERE user_id = ? AND granularity = ? AND dimension = ? AND key_id = ? AND period = ?
+              AND word_id NOT IN (SELECT value FROM json_each(?))
+        ''', (*bucket, json.dumps(word_ids)))
+
+    cursor.executemany('''
+        DELETE FROM study_rollups
+        WHERE user_id = ? AND granularity = ? AND dimension = ? AND key_id = ? AND period = ?
+          AND sessions <= 0 AND reviews <= 0
+    ''', list(changed))
+
+
+def delete_user_rollups(cursor, user_id):
+    cursor.execute('DELETE FROM study_rollups WHERE user_id = ?', (user_id,))
+    cursor.execute('DELETE FROM study_rollup_words WHERE user_id = ?', (user_id,))
+
+
+def rebuild_rollups(cursor):
+    """Recompute every rollup from the raw sessions and review items.
+
+    Migration 0011 backfilled with the same queries, as of its schema; changes
+    to the rollups belong here, not in the migration.
+    """
+    cursor.execute('DELETE FROM study_rollups')
+    cursor.execute('DELETE FROM study_rollup_words')
+    cursor.execute('''
+        INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period,
+                                   reviews, correct_reviews, words_touched)
+        SELECT wri.user_id,
+               g.granularity,
+               d.dimension,
+               CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+               CASE g.granularity WHEN 'day' THEN date(wri.created_at)
+                                  ELSE date(wri.created_at, '-6 days', 'weekday 1') END,
+               COUNT(*),
+               SUM(wri.correct = 1),
+               COUNT(DISTINCT wri.word_id)
+        FROM word_review_items wri
+        JOIN study_sessions ss ON ss.id = wri.study_session_id
+        CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+        CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+        GROUP BY 1, 2, 3, 4, 5
+    ''')
+    cursor.execute('''
+        INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period, sessions)
+        SELECT ss.user_id,
+               g.granularity,
+               d.dimension,
+               CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+               CASE g.granularity WHEN 'day' THEN date(ss.created_at)
+                                  ELSE date(ss.created_at, '-6 days', 'weekday 1') END,
+               COUNT(*)
+        FROM study_sessions ss
+        CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+        CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+        WHERE true
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (user_id, granularity, dimension, key_id, period) DO UPDATE SET sessions = excluded.sessions
+    ''')
+    cursor.execute('''
+        INSERT INTO study_rollup_words (user_id, granularity, dimension, key_id, period, word_id)
+        SELECT DISTINCT
+               wri.user_id,
+               g.granularity,
+               d.dimension,
+               CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+               CASE g.granularity WHEN 'day' THEN date(wri.created_at)
+                                  ELSE date(wri.created_at, '-6 days', 'weekday 1') END,
+               wri.word_id
+        FROM word_review_items wri
+        JOIN study_sessions ss ON ss.id = wri.study_session_id
+        CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+        CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+        WHERE wri.created_at >= date('now', '-6 days', 'weekday 1')
+    ''')
+    cursor.execute('SELECT COUNT(*) FROM study_rollups')
+    return cursor.fetchone()[0]
+
+
+def read_timeseries(cursor, user_id, granularity, dimension, key_id, start, end):
+    """One point per period from `start` to `end` (dates, snapped to their periods).
+
+    Reads one primary key range of study_rollups, so the cost depends on the
+    number of periods requested and not on the length of the history.
+    """
+    start, end = period_start(granularity, start), period_start(granularity, end)
+    cursor.execute('''
+        SELECT period, sessions, reviews, correct_reviews, words_touched
+        FROM study_rollups
+        WHERE user_id = ? AND granularity = ? AND dimension = ? AND key_id = ?
+          AND period BETWEEN ? AND ?
+    ''', (user_id, granularity, dimension, key_id, start.isoformat(), end.isoformat()))
+    rows = {row[0]: row for row in cursor.fetchall()}
+
+    points = []
+    period = start
+    while period <= end:
+        _, sessions, reviews, correct_reviews, words_touched = rows.get(period.isoformat(), (None, 0, 0, 0, 0))
+        points.append({
+            "period": period.isoformat(),
+            "sessions": sessions,
+            "reviews": reviews,
+            "correct_reviews": correct_reviews,
+            "accuracy": correct_reviews / reviews if reviews else 0,
+            "words_touched": words_touched
+        })
+        period = next_period(granularity, period)
+    return points
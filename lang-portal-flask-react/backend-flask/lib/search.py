@@ -0,0 +1,177 @@
+import json
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Word search on top of the FTS5 indexes from sql/migrations/0008_add_words_search.sql.
+# Type-ahead ranks a bounded window of candidates rather than every match. For
+# one token the window is the first PREFIX_CANDIDATES entries of the terms it
+# prefixes, read in term order from words_fts_instance
+# (sql/migrations/0016_add_words_fts_vocab.sql), so words holding the token
+# itself come first however many words share the prefix. For several tokens it
+# is the first PREFIX_CANDIDATES words matching all of them. The window is
+# ranked in Python: exact tokens first, then the shortest completions. When
+# nothing matches, candidates sharing trigrams with the query are pulled from
+# words_trigram and re-ranked by string similarity to tolerate typos.
+PREFIX_CANDIDATES = 200
+FUZZY_RANK_CANDIDATES = 1000
+FUZZY_CANDIDATES = 50
+FUZZY_MIN_SIMILARITY = 0.5
+
+# Spelled-out umlauts, tried as an alternative so "maedchen" finds "Mädchen"
+UMLAUT_SPELLINGS = [('ae', 'a'), ('oe', 'o'), ('ue', 'u')]
+
+
+def fold(text):
+    """Apply the same folding as the index triggers, plus lower-casing."""
+    return text.replace('ß', 'ss').replace('ẞ', 'SS').lower()
+
+
+def tokens(text):
+    return re.findall(r'\w+', fold(text))
+
+
+def index_tokens(text):
+    """Tokens as words_fts stores them: folded, with diacritics removed."""
+    decomposed = unicodedata.normalize('NFKD', fold(text))
+    return re.findall(r'\w+', ''.join(c for c in decomposed if not unicodedata.combining(c)))
+
+
+def spellings(query):
+    """The query's index tokens, and again with spelled-out umlauts replaced."""
+    words = ' '.join(index_tokens(query))
+    if not words:
+        return []
+    spelled = words
+    for spelled_out, vowel in UMLAUT_SPELLINGS:
+        spelled = spelled.replace(spelled_out, vowel)
+    return [variant.split() for variant in sorted({words, spelled})]
+
+
+def prefix_query(query):
+    """FTS5 query matching every token as a prefix, in either spelling of umlauts."""
+    variants = spellings(query)
+    if not variants:
+        return None
+    return ' OR '.join(
+        '(' + ' AND '.join(f'"{token}"*' for token in variant) + ')'
+        for variant in variants
+    )
+
+
+def trigram_query(query):
+    folded = ' '.join(tokens(query))
+    trigrams = {folded[i:i + 3] for i in range(len(folded) - 2)}
+    trigrams = [t for t in trigrams if ' ' not in t]
+    if not trigrams:
+        return None
+    return ' OR '.join(f'"{trigram}"' for trigram in sorted(trigrams))
+
+
+WORD_COLUMNS = '''
+    w.id, w.english, w.german,
+    COALESCE(r.correct_count, 0) AS correct_count,
+    COALESCE(r.wrong_count, 0) AS wrong_count
+'''
+
+
+def term_candidates(cursor, variants):
+    """{word id: rank} for a bounded window of the index entries the single query token prefixes."""
+    ranks = {}
+    for (token,) in variants:
+        # The terms starting with `token` sort from it up to its successor
+        cursor.execute('SELECT term, doc, offset FROM words_fts_instance WHERE term >= ? AND term < ? LIMIT ?',
+                       (token, token[:-1] + chr(ord(token[-1]) + 1), PREFIX_CANDIDATES))
+        for term, word_id, offset in cursor.fetchall():
+            extra = len(term) - len(token)
+            rank = (extra > 0, extra, offset, word_id)
+            ranks[word_id] = min(ranks.get(word_id, rank), rank)
+    return ranks
+
+
+def prefix_rank(variants, row):
+    """Sort key of a prefix match: fewest inexact tokens, shortest completions, earliest position."""
+    word_tokens = index_tokens(row['german']) + index_tokens(row['english'])
+    ranks = []
+    for variant in variants:
+        inexact, extra, first = 0, 0, len(word_tokens)
+        for query_token in variant:
+            matches = [(len(token) - len(query_token), position) for position, token in enumerate(word_tokens)
+                       if token.startswith(query_token)]
+            if not matches:
+                break
+            token_extra, position = min(matches)
+            inexact += token_extra > 0
+            extra += token_extra
+            first = min(first, position)
+        else:
+            ranks.append((inexact, extra, first, row['id']))
+    # The tokenizers may split a word differently; such a match still ranks last
+    return min(ranks, default=(len(word_tokens) + 1, 0, 0, row['id']))
+
+
+def fetch_search_rows(cursor, user_id, word_ids):
+    cursor.execute(f'''
+        SELECT {WORD_COLUMNS}
+        FROM words w
+        LEFT JOIN word_reviews r ON r.user_id = ? AND r.word_id = w.id
+        WHERE w.id IN (SELECT value FROM json_each(?))
+    ''', (user_id, json.dumps(word_ids)))
+    return cursor.fetchall()
+
+
+def prefix_search(cursor, user_id, query, limit):
+    variants = spellings(query)
+    if not variants:
+        return []
+
+    if len(variants[0]) == 1:
+        # Ranked from the index entries alone; only the returned words are read
+        ranks = term_candidates(cursor, variants)
+        best = sorted(ranks, key=ranks.get)[:limit]
+        return sorted(fetch_search_rows(cursor, user_id, best), key=lambda row: ranks[row['id']])
+
+    cursor.execute('SELECT rowid FROM words_fts WHERE words_fts MATCH ? LIMIT ?',
+                   (prefix_query(query), PREFIX_CANDIDATES))
+    candidate_ids = [row[0] for row in cursor.fetchall()]
+    rows = fetch_search_rows(cursor, user_id, candidate_ids)
+    return sorted(rows, key=lambda row: prefix_rank(variants, row))[:limit]
+
+
+def fuzzy_search(cursor, user_id, query, limit):
+    match = trigram_query(query)
+    if not match:
+        return []
+    # Like type-ahead, only a bounded window of the trigram matches is ranked
+    cursor.execute(f'''
+        SELECT {WORD_COLUMNS}
+        FROM (
+            SELECT rowid, rank FROM words_trigram WHERE words_trigram MATCH ? LIMIT ?
+        ) t
+        JOIN words w ON w.id = t.rowid
+        LEFT JOIN word_reviews r ON r.user_id = ? AND r.word_id = w.id
+        ORDER BY t.rank
+        LIMIT ?
+    ''', (match, FUZZY_RANK_CANDIDATES, user_id, FUZZY_CANDIDATES))
+
+    folded = fold(query)
+    scored = []
+    for row in cursor.fetchall():
+        similarity = max(SequenceMatcher(None, folded, fold(row['german'])).ratio(),
+                         SequenceMatcher(None, folded, fold(row['english'])).ratio())
+        if similarity >= FUZZY_MIN_SIMILARITY:
+            scored.append((similarity, row))
+    scored.sort(key=lambda item: -item[0])
+    return [row for _, row in scored[:limit]]
+
+
+def search_words(cursor, user_id, query, limit, mode='auto'):
+    """Return (rows, mode used) with the user's review counts.
+
+    `mode` is 'prefix', 'fuzzy' or 'auto' (prefix, then fuzzy).
+    """
+    if mode in ('auto', 'prefix'):
+        rows = prefix_search(cursor, user_id, query, limit)
+        if rows or mode == 'prefix':
+            return rows, 'prefix'
+    return fuzzy_search(cursor, user_id, query, limit), 'fuzzy'
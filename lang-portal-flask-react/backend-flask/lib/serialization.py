@@ -0,0 +1,64 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used without it
+    orjson = None
+
+# Response serialization. JSONProvider replaces Flask's provider, so every
+# jsonify() call encodes straight to bytes with orjson when it is installed.
+# List routes select their columns under the names of the JSON fields and turn
+# rows into dicts with records(), instead of copying each field by hand.
+
+
+def dumps(obj, default=None):
+    """`obj` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def records(cursor, rows=None):
+    """The rows of `cursor` (or the given subset of them) as dicts.
+
+    The column names are read once from the cursor description and zipped
+    with each row, so SQL aliases become the JSON field names.
+    """
+    keys = tuple(column[0] for column in cursor.description)
+    if rows is None:
+        # Plain tuples zip faster than sqlite3.Row
+        factory = cursor.row_factory
+        cursor.row_factory = None
+        try:
+            rows = cursor.fetchall()
+        finally:
+            cursor.row_factory = factory
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding compactly, with orjson when available.
+
+    Keys keep their insertion order (Flask's default sorts them).
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs:
+            return self.dump_bytes(obj).decode()
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', False)
+        if not kwargs.get('indent'):
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def dump_bytes(self, obj):
+        return dumps(obj, default=self.default)
+
+    def response(self, *args, **kwargs):
+        # Skips the str round trip of the default implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,111 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+# SM-2 style spaced-repetition scheduling. Reviews are binary, so a correct
+# answer is graded as quality 4 and a wrong one as quality 1.
+
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# Without a cap ~25 correct answers in a row overflow datetime
+MAX_INTERVAL_DAYS = 36500
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+
+# Same format as SQLite's CURRENT_TIMESTAMP, so due times compare as strings
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def now_timestamp():
+    return datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def next_state(state, is_correct, reviewed_at):
+    """Return the schedule after one review.
+
+    `state` is a dict with ease, interval_days and repetitions (None for a
+    word that was never reviewed); `reviewed_at` is a timestamp string.
+    """
+    ease = state['ease'] if state else INITIAL_EASE
+    interval = state['interval_days'] if state else 0
+    repetitions = state['repetitions'] if state else 0
+
+    quality = CORRECT_QUALITY if is_correct else WRONG_QUALITY
+    if is_correct:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = min(MAX_INTERVAL_DAYS, round(interval * ease, 2))
+    else:
+        # A lapse restarts the word from a one day interval
+        repetitions = 0
+        interval = 1
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    due_at = datetime.strptime(reviewed_at, TIMESTAMP_FORMAT) + timedelta(days=interval)
+    return {
+        'ease': round(ease, 4),
+        'interval_days': interval,
+        'repetitions': repetitions,
+        'due_at': due_at.strftime(TIMESTAMP_FORMAT),
+        'last_reviewed_at': reviewed_at,
+    }
+
+
+def apply_reviews(cursor, user_id, reviews, reviewed_at=None):
+    """Advance the user's schedules of the reviewed words, in review order.
+
+    `reviews` is a list of (word_id, is_correct) pairs. Only the touched
+    words are read and written, on the caller's transaction.
+    """
+    if not reviews:
+        return
+    reviewed_at = reviewed_at or now_timestamp()
+
+    word_ids = list({word_id for word_id, _ in reviews})
+    cursor.execute('''
+        SELECT word_id, ease, interval_days, repetitions
+        FROM word_schedules
+        WHERE user_id = ? AND word_id IN (SELECT value FROM json_each(?))
+    ''', (user_id, json.dumps(word_ids)))
+    states = {row[0]: {'ease': row[1], 'interval_days': row[2], 'repetitions': row[3]}
+              for row in cursor.fetchall()}
+
+    for word_id, is_correct in reviews:
+        states[word_id] = next_state(states.get(word_id), is_correct, reviewed_at)
+
+    save_states(cursor, {(user_id, word_id): states[word_id] for word_id in word_ids})
+
+
+def save_states(cursor, states):
+    """Upsert schedules given as {(user_id, word_id): state}."""
+    cursor.executemany('''
+        INSERT INTO word_schedules (user_id, word_id, ease, interval_days, repetitions, due_at, last_reviewed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, word_id) DO UPDATE SET
+            ease = excluded.ease,
+            interval_days = excluded.interval_days,
+            repetitions = excluded.repetitions,
+            due_at = excluded.due_at,
+            last_reviewed_at = excluded.last_reviewed_at
+    ''', [(user_id, word_id, s['ease'], s['interval_days'], s['repetitions'], s['due_at'], s['last_reviewed_at'])
+          for (user_id, word_id), s in states.items()])
+
+
+def rebuild_schedules(cursor, batch_size=5000):
+    """Replay the whole review log to recompute every user's schedules."""
+    cursor.execute('SELECT user_id, word_id, correct, created_at FROM word_review_items ORDER BY id')
+    states = {}
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for user_id, word_id, correct, created_at in rows:
+            key = (user_id, word_id)
+            states[key] = next_state(states.get(key), correct == 1, created_at)
+
+    cursor.execute('DELETE FROM word_schedules')
+    save_states(cursor, states)
+    return len(states)
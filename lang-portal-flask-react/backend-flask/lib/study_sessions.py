@@ -0,0 +1,31 @@
+# Study session summaries. Review counts, results and activity times are kept
+# on study_sessions by the triggers of sql/migrations/0003 and 0013, and
+# ended_at is set when a session is closed, so every session listing reads the
+# same precomputed columns instead of aggregating word_review_items per row.
+
+
+def end_time(alias='ss'):
+    """SQL for a session's end: when it was closed, else its latest review, else its start."""
+    return f'COALESCE({alias}.ended_at, {alias}.last_activity_at, {alias}.created_at)'
+
+
+def summary_columns(alias='ss'):
+    """The select list shared by the session listings, for study_sessions aliased `alias`."""
+    return f'''
+          {alias}.created_at AS start_time,
+          {end_time(alias)} AS end_time,
+          {alias}.ended_at,
+          CAST(ROUND((julianday({end_time(alias)}) - julianday({alias}.created_at)) * 86400) AS INTEGER)
+            AS duration_seconds,
+          {alias}.review_count AS review_items_count,
+          {alias}.correct_count,
+          {alias}.wrong_count'''
+
+
+def close_session(cursor, session_id, ended_at):
+    """Mark the session as ended at `ended_at`; closing a closed session keeps its time.
+
+    Returns False if the session does not exist.
+    """
+    cursor.execute('UPDATE study_sessions SET ended_at = COALESCE(ended_at, ?) WHERE id = ?', (ended_at, session_id))
+    return cursor.rowcount > 0
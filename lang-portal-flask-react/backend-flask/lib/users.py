@@ -0,0 +1,65 @@
+import threading
+
+from flask import g, jsonify, request
+
+# Requests name their learner in this header; without it they act as the
+# default user, which owns all history from before users existed.
+USER_HEADER = 'X-User-Id'
+DEFAULT_USER_ID = 1
+
+
+def current_user_id():
+    """The user the current request acts for (resolved by Users before the view)."""
+    return g.user_id
+
+
+class Users:
+    """Resolves the X-User-Id header of every API request into g.user_id.
+
+    Malformed ids are rejected with 400 and unknown users with 404 before the
+    view runs. Users are never deleted, so ids that were found once are
+    remembered and later requests for them skip the lookup.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._known = {DEFAULT_USER_ID}
+        self._lock = threading.Lock()
+
+    def exists(self, user_id):
+        if user_id in self._known:
+            return True
+        cursor = self.db.cursor()
+        cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
+        if not cursor.fetchone():
+            return False
+        with self._lock:
+            self._known.add(user_id)
+        return True
+
+    def init_app(self, app, exempt_endpoints=('get_metrics', 'static')):
+        @app.before_request
+        def resolve_user():
+            # Preflight requests carry no credentials; the metrics are per process
+            if request.method == 'OPTIONS' or request.endpoint in exempt_endpoints:
+                return None
+
+            value = request.headers.get(USER_HEADER)
+            if value is None:
+                g.user_id = DEFAULT_USER_ID
+                return None
+            try:
+                user_id = int(value)
+            except ValueError:
+                user_id = 0
+            if user_id < 1:
+                return jsonify({"error": f"{USER_HEADER} must be a positive integer"}), 400
+            if not self.exists(user_id):
+                return jsonify({"error": "User not found"}), 404
+            g.user_id = user_id
+            return None
+
+        @app.after_request
+        def vary_on_user(response):
+            response.vary.add(USER_HEADER)
+            return response
@@ -0,0 +1,81 @@
+import json
+
+# Fetching words by id, for the single-word endpoint and for batch lookups by
+# study activities that already know which words they need. Only the joins
+# the requested fields need are made, and a word's groups are folded into it
+# while reading the rows instead of being concatenated in SQL and split again.
+
+# Upper bound for the ids of one batch request
+MAX_BATCH_IDS = 5000
+
+# SQL behind each field; `groups` is assembled from the joined group rows
+WORD_FIELDS = {
+    'id': 'w.id',
+    'english': 'w.english',
+    'german': 'w.german',
+    'correct_count': 'COALESCE(r.correct_count, 0)',
+    'wrong_count': 'COALESCE(r.wrong_count, 0)',
+    'groups': None
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(fields):
+    """The requested fields, from a list or a comma-separated string (None for all).
+
+    `id` is always included so the caller can match words to ids.
+    """
+    if fields is None:
+        return list(WORD_FIELDS)
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise InvalidFields("fields must be a list of field names")
+    unknown = [field for field in fields if field not in WORD_FIELDS]
+    if unknown:
+        raise InvalidFields("Unknown fields: " + ", ".join(unknown))
+    return ['id'] + [field for field in WORD_FIELDS if field in fields and field != 'id']
+
+
+def fetch_words(cursor, user_id, word_ids, fields):
+    """The words with the given ids as dicts of `fields`, keyed by id.
+
+    Unknown ids are left out. All ids go through a single json_each() list,
+    so a batch costs one query whatever its size.
+    """
+    columns = [f'{WORD_FIELDS[field]} AS {field}' for field in fields if WORD_FIELDS[field]]
+    joins = []
+    params = []
+    if 'correct_count' in fields or 'wrong_count' in fields:
+        joins.append('LEFT JOIN word_reviews r ON r.user_id = ? AND r.word_id = w.id')
+        params.append(user_id)
+    with_groups = 'groups' in fields
+    if with_groups:
+        columns += ['g.id AS group_id', 'g.name AS group_name']
+        joins.append('LEFT JOIN word_groups wg ON wg.word_id = w.id')
+        joins.append('LEFT JOIN groups g ON g.id = wg.group_id')
+
+    cursor.execute(f'''
+        SELECT {', '.join(columns)}
+        FROM words w
+        {' '.join(joins)}
+        WHERE w.id IN (SELECT value FROM json_each(?))
+        ORDER BY w.id
+    ''', params + [json.dumps(list(word_ids))])
+
+    # One row per (word, group); rows of a word are adjacent
+    names = [column[0] for column in cursor.description]
+    word_fields = len(columns) - 2 if with_groups else len(columns)
+    words = {}
+    for row in cursor.fetchall():
+        word = words.get(row[0])
+        if word is None:
+            word = words[row[0]] = dict(zip(names[:word_fields], row[:word_fields]))
+            if with_groups:
+                word['groups'] = []
+        if with_groups and row[word_fields] is not None:
+            word['groups'].append({"id": row[word_fields], "name": row[word_fields + 1]})
+    return words
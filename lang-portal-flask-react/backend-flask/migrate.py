@@ -1,33 +1,26 @@
-import os
 import sqlite3
+import sys
 
+from lib.migrations import run_migrations
 
-def run_migrations():
-    # Connect to the database
-    db_path = os.path.join(os.path.dirname(__file__), 'word_bank.db')
+
+def main(db_path='words.db'):
+    # Same database file the app and `invoke init-db` use by default
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
 
     try:
-        # Get list of migration files
-        migrations_dir = os.path.join(os.path.dirname(__file__), 'sql', 'migrations')
-        migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
-
-        # Run each migration
-        for migration_file in migration_files:
-            print(f"Running migration: {migration_file}")
-            with open(os.path.join(migrations_dir, migration_file)) as f:
-                migration_sql = f.read()
-                conn.executescript(migration_sql)
-                conn.commit()
-
-        print("Migrations completed successfully")
+        applied = run_migrations(conn)
+        if applied:
+            print(f"Applied {len(applied)} migration(s) to {db_path}")
+        else:
+            print(f"{db_path} is up to date")
     except Exception as e:
         print(f"Error running migrations: {str(e)}")
-        conn.rollback()
+        sys.exit(1)
     finally:
         conn.close()
 
 
 if __name__ == '__main__':
-    run_migrations()
+    main(*sys.argv[1:2])
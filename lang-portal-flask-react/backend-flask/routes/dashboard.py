@@ -1,30 +1,37 @@
-from flask import jsonify
-from flask_cors import cross_origin
+from datetime import date, timedelta
+
+from flask import request, jsonify
+
+from lib.dashboard_stats import read_dashboard_stats
+from lib.rollups import GRANULARITIES, MAX_POINTS, PERIOD_DAYS, period_count, read_timeseries, utc_today
+from lib.users import current_user_id
+
+# Periods shown when the request gives no `from`
+DEFAULT_POINTS = {'day': 30, 'week': 12}
 
 
 def load(app):
     @app.route('/dashboard/recent-session', methods=['GET'])
-    @cross_origin()
     def get_recent_session():
         try:
             cursor = app.db.cursor()
 
             # Get the most recent study session with activity name and results
+            # (the counts are the session's summary columns)
             cursor.execute('''
                 SELECT 
                     ss.id,
                     ss.group_id,
                     sa.name as activity_name,
                     ss.created_at,
-                    COUNT(CASE WHEN wri.correct = 1 THEN 1 END) as correct_count,
-                    COUNT(CASE WHEN wri.correct = 0 THEN 1 END) as wrong_count
+                    ss.correct_count,
+                    ss.wrong_count
                 FROM study_sessions ss
                 JOIN study_activities sa ON ss.study_activity_id = sa.id
-                LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-                GROUP BY ss.id
+                WHERE ss.user_id = ?
                 ORDER BY ss.created_at DESC
                 LIMIT 1
-            ''')
+            ''', (current_user_id(),))
 
             session = cursor.fetchone()
 
@@ -44,96 +51,91 @@ def load(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/dashboard/stats', methods=['GET'])
-    @cross_origin()
     def get_study_stats():
         try:
             cursor = app.db.cursor()
 
-            # Get total vocabulary count
-            cursor.execute('SELECT COUNT(*) as total_vocabulary FROM words')
-            total_vocabulary = cursor.fetchone()["total_vocabulary"]
-
-            # Get total unique words studied
-            cursor.execute('''
-                SELECT COUNT(DISTINCT word_id) as total_words
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            total_words = cursor.fetchone()["total_words"]
-
-            # Get mastered words (words with >80% success rate and at least 5 attempts)
-            cursor.execute('''
-                WITH word_stats AS (
-                    SELECT 
-                        word_id,
-                        COUNT(*) as total_attempts,
-                        SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                    FROM word_review_items wri
-                    JOIN study_sessions ss ON wri.study_session_id = ss.id
-                    GROUP BY word_id
-                    HAVING total_attempts >= 5
-                )
-                SELECT COUNT(*) as mastered_words
-                FROM word_stats
-                WHERE success_rate >= 0.8
-            ''')
-            mastered_words = cursor.fetchone()["mastered_words"]
-
-            # Get overall success rate
-            cursor.execute('''
-                SELECT 
-                    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            success_rate = cursor.fetchone()["success_rate"] or 0
+            # Totals are materialized in dashboard_stats and kept current by triggers
+            stats = read_dashboard_stats(cursor, current_user_id())
 
-            # Get total number of study sessions
-            cursor.execute('SELECT COUNT(*) as total_sessions FROM study_sessions')
-            total_sessions = cursor.fetchone()["total_sessions"]
+            # Get total vocabulary count from the counter cache
+            cursor.execute("SELECT value FROM counters WHERE name = 'words'")
+            total_vocabulary = cursor.fetchone()[0]
 
-            # Get number of groups with activity in the last 30 days
+            # Get number of groups with activity in the last 30 days (index range scan over recent sessions)
             cursor.execute('''
                 SELECT COUNT(DISTINCT group_id) as active_groups
                 FROM study_sessions
-                WHERE created_at >= date('now', '-30 days')
-            ''')
+                WHERE user_id = ? AND created_at >= date('now', '-30 days')
+            ''', (current_user_id(),))
             active_groups = cursor.fetchone()["active_groups"]
 
-            # Calculate current streak (consecutive days with at least one study session)
-            cursor.execute('''
-                WITH daily_sessions AS (
-                    SELECT 
-                        date(created_at) as study_date,
-                        COUNT(*) as session_count
-                    FROM study_sessions
-                    GROUP BY date(created_at)
-                ),
-                streak_calc AS (
-                    SELECT 
-                        study_date,
-                        julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
-                    FROM daily_sessions
-                )
-                SELECT COUNT(*) as streak
-                FROM (
-                    SELECT study_date
-                    FROM streak_calc
-                    WHERE days_diff = 1 OR days_diff IS NULL
-                    ORDER BY study_date DESC
-                )
-            ''')
-            current_streak = cursor.fetchone()["streak"]
+            # The streak only counts while its last study day is today or yesterday
+            cursor.execute("SELECT date('now', '-1 day')")
+            yesterday = cursor.fetchone()[0]
+            current_streak = stats["current_streak"]
+            if not stats["last_study_date"] or stats["last_study_date"] < yesterday:
+                current_streak = 0
+
+            success_rate = 0
+            if stats["total_reviews"]:
+                success_rate = stats["correct_reviews"] / stats["total_reviews"]
 
             return jsonify({
                 "total_vocabulary": total_vocabulary,
-                "total_words_studied": total_words,
-                "mastered_words": mastered_words,
+                "total_words_studied": stats["total_words_studied"],
+                "mastered_words": stats["mastered_words"],
                 "success_rate": success_rate,
-                "total_sessions": total_sessions,
+                "total_sessions": stats["total_sessions"],
                 "active_groups": active_groups,
                 "current_streak": current_streak
             })
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+
+    # Endpoint: GET /dashboard/timeseries?granularity=day|week&from=&to=&group_id=&study_activity_id=
+    # Chart data from the study_rollups table, one point per day or week
+    @app.route('/dashboard/timeseries', methods=['GET'])
+    def get_study_timeseries():
+        try:
+            cursor = app.db.cursor()
+
+            granularity = request.args.get('granularity', 'day')
+            if granularity not in GRANULARITIES:
+                return jsonify({"error": "granularity must be 'day' or 'week'"}), 400
+
+            try:
+                end = date.fromisoformat(request.args['to']) if 'to' in request.args else utc_today()
+                if 'from' in request.args:
+                    start = date.fromisoformat(request.args['from'])
+                else:
+                    start = end - timedelta(days=(DEFAULT_POINTS[granularity] - 1) * PERIOD_DAYS[granularity])
+            except ValueError:
+                return jsonify({"error": "from and to must be dates (YYYY-MM-DD)"}), 400
+            if start > end:
+                return jsonify({"error": "from must not be after to"}), 400
+            if period_count(granularity, start, end) > MAX_POINTS:
+                return jsonify({"error": f"At most {MAX_POINTS} periods per request"}), 400
+
+            # Totals, or the series of one group or one study activity
+            group_id = request.args.get('group_id', type=int)
+            study_activity_id = request.args.get('study_activity_id', type=int)
+            if group_id is not None and study_activity_id is not None:
+                return jsonify({"error": "Filter by group_id or study_activity_id, not both"}), 400
+            if group_id is not None:
+                dimension, key_id = 'group', group_id
+            elif study_activity_id is not None:
+                dimension, key_id = 'activity', study_activity_id
+            else:
+                dimension, key_id = 'total', 0
+
+            points = read_timeseries(cursor, current_user_id(), granularity, dimension, key_id, start, end)
+            return jsonify({
+                "granularity": granularity,
+                "from": points[0]["period"],
+                "to": points[-1]["period"],
+                "points": points
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -0,0 +1,175 @@
+import csv
+import io
+from datetime import datetime, timezone
+
+from flask import Response, jsonify, request, stream_with_context
+
+from lib.serialization import dumps, records
+from lib.srs import TIMESTAMP_FORMAT
+from lib.users import current_user_id
+
+# Rows are pulled from the cursor in batches of this size and written out as one chunk
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def stored_timestamp(value):
+    """An ISO 8601 date or time in the stored 'YYYY-MM-DD HH:MM:SS' (UTC) form.
+
+    created_at is compared as text, where '2024-01-01T10:00:00' sorts after
+    every time of that day. Raises ValueError for anything else.
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime(TIMESTAMP_FORMAT)
+
+
+def encode_chunk(records, columns, export_format, header=False):
+    if export_format == 'ndjson':
+        return b''.join(dumps(record) + b'\n' for record in records)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for record in records:
+        writer.writerow([record[column] for column in columns])
+    return buffer.getvalue()
+
+
+def stream_records(batches, columns, export_format):
+    """Encode an iterator of record batches, writing the CSV header once."""
+    if export_format == 'csv':
+        yield encode_chunk([], columns, export_format, header=True)
+    for records in batches:
+        if records:
+            yield encode_chunk(records, columns, export_format)
+
+
+def fetch_batches(cursor):
+    while True:
+        rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+        if not rows:
+            return
+        yield records(cursor, rows)
+
+
+def load(app):
+    def export_response(columns, generate):
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": "format must be one of: " + ", ".join(EXPORT_FORMATS)}), 400
+
+        # stream_with_context keeps the request (and its pooled connection) alive while streaming
+        return Response(
+            stream_with_context(stream_records(generate(), columns, export_format)),
+            mimetype=EXPORT_FORMATS[export_format]
+        )
+
+    def export_window():
+        """The WHERE condition, its params and the ORDER BY of an incremental export.
+
+        With `since`, rows follow (created_at, id) along the (user_id, created_at)
+        index, and a `since_id` resumes after that row of the same order.
+        Otherwise rows follow the primary key after `since_id`. Raises
+        ValueError when `since` is not an ISO 8601 date or time.
+        """
+        since = request.args.get('since', '')
+        if since:
+            since = stored_timestamp(since)
+        since_id = request.args.get('since_id', 0, type=int)
+        if since and since_id:
+            return '(created_at, id) > (?, ?)', (since, since_id), 'created_at, id'
+        if since:
+            return 'created_at >= ?', (since,), 'created_at, id'
+        return 'id > ?', (since_id,), 'id'
+
+    @app.route('/api/export/words', methods=['GET'])
+    def export_words():
+        # Words only have ids to resume from, so incremental exports use since_id
+        since_id = request.args.get('since_id', 0, type=int)
+
+        def generate():
+            cursor = app.db.cursor()
+            cursor.execute('''
+                SELECT w.id, w.english, w.german, g.id as group_id, g.name as group_name
+                FROM words w
+                LEFT JOIN word_groups wg ON wg.word_id = w.id
+                LEFT JOIN groups g ON g.id = wg.group_id
+                WHERE w.id > ?
+                ORDER BY w.id
+            ''', (since_id,))
+
+            # Rows for one word are adjacent; fold them into a single record with its groups
+            word = None
+            for rows in fetch_batches(cursor):
+                records = []
+                for row in rows:
+                    if word is None or word['id'] != row['id']:
+                        if word is not None:
+                            records.append(word)
+                        word = {'id': row['id'], 'english': row['english'], 'german': row['german'], 'groups': []}
+                    if row['group_id'] is not None:
+                        word['groups'].append({'id': row['group_id'], 'name': row['group_name']})
+                yield records
+            if word is not None:
+                yield [word]
+
+        # CSV has no nested values, so groups become a ';'-separated list of names
+        if request.args.get('format') == 'csv':
+            def batches():
+                for records in generate():
+                    yield [dict(record, groups=';'.join(g['name'] for g in record['groups']))
+                           for record in records]
+        else:
+            batches = generate
+
+        return export_response(['id', 'english', 'german', 'groups'], batches)
+
+    @app.route('/api/export/study-sessions', methods=['GET'])
+    def export_study_sessions():
+        try:
+            condition, params, order_by = export_window()
+        except ValueError:
+            return jsonify({"error": "since must be an ISO 8601 date or time"}), 400
+        columns = ['id', 'group_id', 'study_activity_id', 'created_at', 'review_count', 'correct_count',
+                   'wrong_count', 'first_activity_at', 'last_activity_at', 'ended_at']
+        user_id = current_user_id()
+
+        def generate():
+            cursor = app.db.cursor()
+            cursor.execute(f'''
+                SELECT {', '.join(columns)}
+                FROM study_sessions
+                WHERE user_id = ? AND {condition}
+                ORDER BY {order_by}
+            ''', (user_id,) + params)
+            yield from fetch_batches(cursor)
+
+        return export_response(columns, generate)
+
+    @app.route('/api/export/review-items', methods=['GET'])
+    def export_review_items():
+        try:
+            condition, params, order_by = export_window()
+        except ValueError:
+            return jsonify({"error": "since must be an ISO 8601 date or time"}), 400
+        columns = ['id', 'word_id', 'study_session_id', 'correct', 'created_at']
+        user_id = current_user_id()
+
+        def generate():
+            cursor = app.db.cursor()
+            cursor.execute(f'''
+                SELECT {', '.join(columns)}
+                FROM word_review_items
+                WHERE user_id = ? AND {condition}
+                ORDER BY {order_by}
+            ''', (user_id,) + params)
+            yield from fetch_batches(cursor)
+
+        return export_response(columns, generate)
@@ -1,10 +1,18 @@
+import json
+
 from flask import request, jsonify
-from flask_cors import cross_origin
+
+from lib.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_condition
+from lib.serialization import records
+from lib.study_sessions import summary_columns
+from lib.users import current_user_id
+from lib.words import MAX_BATCH_IDS
+from routes.words import KEYSET_SORT_KEYS, SORT_EXPRESSIONS
 
 
 def load(app):
     @app.route('/api/groups', methods=['GET'])
-    @cross_origin()
+    @app.response_cache.cached
     def get_groups():
         try:
             cursor = app.db.cursor()
@@ -27,28 +35,19 @@ def load(app):
 
             # Query to fetch groups with sorting and the cached word count
             cursor.execute(f'''
-        SELECT id, name, words_count
+        SELECT id, name AS group_name, words_count AS word_count
         FROM groups
         ORDER BY {sort_by} {order}
         LIMIT ? OFFSET ?
       ''', (groups_per_page, offset))
 
-            groups = cursor.fetchall()
+            groups_data = records(cursor)
 
             # Query the total number of groups
             cursor.execute('SELECT COUNT(*) FROM groups')
             total_groups = cursor.fetchone()[0]
             total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
-            # Format the response
-            groups_data = []
-            for group in groups:
-                groups_data.append({
-                    "id": group["id"],
-                    "group_name": group["name"],
-                    "word_count": group["words_count"]
-                })
-
             # Return groups and pagination metadata
             return jsonify({
                 'groups': groups_data,
@@ -59,7 +58,7 @@ def load(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/groups/<int:id>', methods=['GET'])
-    @cross_origin()
+    @app.response_cache.cached
     def get_group(id):
         try:
             cursor = app.db.cursor()
@@ -84,7 +83,6 @@ def load(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/groups/<int:id>/words', methods=['GET'])
-    @cross_origin()
     def get_group_words(id):
         try:
             cursor = app.db.cursor()
@@ -105,45 +103,52 @@ def load(app):
             if order not in ['asc', 'desc']:
                 order = 'asc'
 
-            # First, check if the group exists
-            cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+            # First, check if the group exists; words_count is its cached word total
+            cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
             group = cursor.fetchone()
             if not group:
                 return jsonify({"error": "Group not found"}), 404
 
+            total_words = group["words_count"] or 0
+            total_pages = (total_words + words_per_page - 1) // words_per_page
+
+            # Pass `cursor` (empty for the first page) to use keyset pagination
+            keyset = 'cursor' in request.args
+            if keyset:
+                if sort_by not in KEYSET_SORT_KEYS:
+                    raise InvalidCursor('Cursor pagination only supports sorting by german or english')
+                position = decode_cursor(request.args['cursor'], sort_by, order)
+                condition, params = keyset_condition(SORT_EXPRESSIONS[sort_by], 'w.id', order, position)
+                limit_clause, limit_params = 'LIMIT ?', (words_per_page + 1,)
+            else:
+                condition, params = '1 = 1', ()
+                limit_clause, limit_params = 'LIMIT ? OFFSET ?', (words_per_page, offset)
+
             # Query to fetch words with pagination and sorting
             cursor.execute(f'''
-        SELECT w.*, 
-               COALESCE(wr.correct_count, 0) as correct_count,
-               COALESCE(wr.wrong_count, 0) as wrong_count
+        SELECT w.id, w.english, w.german,
+               COALESCE(r.correct_count, 0) as correct_count,
+               COALESCE(r.wrong_count, 0) as wrong_count
         FROM words w
         JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (id, words_per_page, offset))
-
-            words = cursor.fetchall()
-
-            # Get total words count for pagination
-            cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-            total_words = cursor.fetchone()[0]
-            total_pages = (total_words + words_per_page - 1) // words_per_page
-
-            # Format the response
-            words_data = []
-            for word in words:
-                words_data.append({
-                    "id": word["id"],
-                    "english": word["english"],
-                    "german": word["german"],
-                    "correct_count": word["correct_count"],
-                    "wrong_count": word["wrong_count"]
+        LEFT JOIN word_reviews r ON r.user_id = ? AND r.word_id = w.id
+        WHERE wg.group_id = ? AND {condition}
+        ORDER BY {SORT_EXPRESSIONS[sort_by]} {order}, w.id {order}
+        {limit_clause}
+      ''', (current_user_id(), id) + params + limit_params)
+
+            words = records(cursor)
+            words_data = words[:words_per_page]
+
+            if keyset:
+                next_cursor = None
+                if len(words) > words_per_page:
+                    last = words_data[-1]
+                    next_cursor = encode_cursor(sort_by, order, last[sort_by], last["id"])
+                return jsonify({
+                    'words': words_data,
+                    'next_cursor': next_cursor,
+                    'total_pages': total_pages
                 })
 
             return jsonify({
@@ -151,11 +156,13 @@ def load(app):
                 'total_pages': total_pages,
                 'current_page': page
             })
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/groups/<int:id>/words/raw', methods=['GET'])
-    @cross_origin()
+    @app.response_cache.cached
     def get_group_words_raw(id):
         try:
             cursor = app.db.cursor()
@@ -175,16 +182,7 @@ def load(app):
         ORDER BY w.german ASC
       ''', (id,))
 
-            words = cursor.fetchall()
-
-            # Format the response
-            words_data = []
-            for word in words:
-                words_data.append({
-                    "id": word["id"],
-                    "english": word["english"],
-                    "german": word["german"]
-                })
+            words_data = records(cursor)
 
             return jsonify({
                 'words': words_data,
@@ -194,7 +192,6 @@ def load(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/groups/<int:id>/study_sessions', methods=['GET'])
-    @cross_origin()
     def get_group_study_sessions(id):
         try:
             cursor = app.db.cursor()
@@ -210,72 +207,44 @@ def load(app):
 
             # Map frontend sort keys to database columns
             sort_mapping = {
-                'startTime': 'created_at',
-                'endTime': 'last_activity_time',
+                'startTime': 's.created_at',
+                'endTime': 'end_time',
                 'activityName': 'a.name',
                 'groupName': 'g.name',
-                'reviewItemsCount': 'review_count'
+                'reviewItemsCount': 's.review_count'
             }
 
             # Use mapped sort column or default to created_at
-            sort_column = sort_mapping.get(sort_by, 'created_at')
+            sort_column = sort_mapping.get(sort_by, 's.created_at')
+            if order not in ['asc', 'desc']:
+                order = 'desc'
 
             # Get total count for pagination
             cursor.execute('''
         SELECT COUNT(*)
         FROM study_sessions
-        WHERE group_id = ?
-      ''', (id,))
+        WHERE user_id = ? AND group_id = ?
+      ''', (current_user_id(), id))
             total_sessions = cursor.fetchone()[0]
             total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-            # Get study sessions for this group with dynamic calculations
+            # Review counts and end times come from the per-session summary columns
             cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
-          s.study_activity_id,
-          s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
-          a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          s.study_activity_id,
+          a.name as activity_name,{summary_columns('s')}
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
-        WHERE s.group_id = ?
+        WHERE s.user_id = ? AND s.group_id = ?
         ORDER BY {sort_column} {order}
         LIMIT ? OFFSET ?
-      ''', (id, sessions_per_page, offset))
-
-            sessions = cursor.fetchall()
-            sessions_data = []
-
-            for session in sessions:
-                # If there's no last_activity_time, use start_time + 30 minutes
-                end_time = session["last_activity_time"]
-                if not end_time:
-                    end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[
-                        0]
-
-                sessions_data.append({
-                    "id": session["id"],
-                    "group_id": session["group_id"],
-                    "group_name": session["group_name"],
-                    "study_activity_id": session["study_activity_id"],
-                    "activity_name": session["activity_name"],
-                    "start_time": session["start_time"],
-                    "end_time": end_time,
-                    "review_items_count": session["review_count"]
-                })
+      ''', (current_user_id(), id, sessions_per_page, offset))
+
+            sessions_data = records(cursor)
 
             return jsonify({
                 'study_sessions': sessions_data,
@@ -284,3 +253,94 @@ def load(app):
             })
         except Exception as e:
             return jsonify({"error": str(e)}), 500
+
+    # Group membership. Adding or removing any number of words is one statement;
+    # the word_groups triggers keep groups.words_count in step with it.
+    def change_membership(id, word_ids, add):
+        """Add or remove words and commit; None if the group does not exist."""
+        cursor = app.db.cursor()
+        if app.lookup_cache.group(cursor, id) is None:
+            return None
+
+        word_ids = json.dumps(word_ids)
+        if add:
+            cursor.execute('''
+        SELECT DISTINCT j.value
+        FROM json_each(?) j
+        WHERE NOT EXISTS (SELECT 1 FROM words w WHERE w.id = j.value)
+      ''', (word_ids,))
+            missing = [row[0] for row in cursor.fetchall()]
+            cursor.execute('''
+        INSERT INTO word_groups (group_id, word_id)
+        SELECT ?, w.id FROM words w WHERE w.id IN (SELECT value FROM json_each(?))
+        ON CONFLICT (group_id, word_id) DO NOTHING
+      ''', (id, word_ids))
+            result = {"added": cursor.rowcount, "missing": missing}
+        else:
+            cursor.execute('''
+        DELETE FROM word_groups
+        WHERE group_id = ? AND word_id IN (SELECT value FROM json_each(?))
+      ''', (id, word_ids))
+            result = {"removed": cursor.rowcount}
+
+        if result.get("added") or result.get("removed"):
+            app.db.bump_data_version(cursor)
+        cursor.execute('SELECT words_count FROM groups WHERE id = ?', (id,))
+        result["word_count"] = cursor.fetchone()[0]
+        app.db.commit()
+        return result
+
+    def membership_request(id, add):
+        try:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get('word_ids'), list):
+                return jsonify({"error": "No word ids provided"}), 400
+
+            word_ids = data['word_ids']
+            if len(word_ids) > MAX_BATCH_IDS:
+                return jsonify({"error": f"At most {MAX_BATCH_IDS} word ids per request"}), 413
+            if not all(isinstance(word_id, int) and not isinstance(word_id, bool) for word_id in word_ids):
+                return jsonify({"error": "word_ids must be integers"}), 400
+
+            result = change_membership(id, word_ids, add)
+            if result is None:
+                return jsonify({"error": "Group not found"}), 404
+            return jsonify(result)
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
+
+    # Body: {"word_ids": [1, 2, ...]}; words already in the group are skipped
+    @app.route('/api/groups/<int:id>/words', methods=['POST'])
+    def add_group_words(id):
+        return membership_request(id, add=True)
+
+    @app.route('/api/groups/<int:id>/words/remove', methods=['POST'])
+    def remove_group_words(id):
+        return membership_request(id, add=False)
+
+    @app.route('/api/groups/<int:id>/words/<int:word_id>', methods=['PUT'])
+    def add_group_word(id, word_id):
+        try:
+            result = change_membership(id, [word_id], add=True)
+            if result is None:
+                return jsonify({"error": "Group not found"}), 404
+            if result["missing"]:
+                return jsonify({"error": "Word not found"}), 404
+            return jsonify(result)
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/groups/<int:id>/words/<int:word_id>', methods=['DELETE'])
+    def remove_group_word(id, word_id):
+        try:
+            result = change_membership(id, [word_id], add=False)
+            if result is None:
+                return jsonify({"error": "Group not found"}), 404
+            if not result["removed"]:
+                return jsonify({"error": "Word not in group"}), 404
+            return jsonify(result)
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
@@ -0,0 +1,43 @@
+from flask import Response
+
+
+def load(app):
+    # Endpoint: GET /metrics in the Prometheus text format
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        pool = app.db.pool_stats()
+        cache = app.response_cache.stats()
+        lookups = sorted(app.lookup_cache.stats().items())
+        extra = [
+            ('db_pool_connections', 'gauge', 'Pooled SQLite connections by state.', [
+                ([('state', 'open')], pool['open']),
+                ([('state', 'checked_out')], pool['checked_out']),
+                ([('state', 'idle')], pool['idle']),
+            ]),
+            ('db_pool_checkouts_total', 'counter', 'Connection checkouts.', [([], pool['checkouts'])]),
+            ('db_pool_timeouts_total', 'counter', 'Checkouts that timed out.', [([], pool['timeouts'])]),
+            ('db_pool_wait_seconds_total', 'counter', 'Time spent waiting for a connection.',
+             [([], pool['wait_time_total'])]),
+            ('response_cache_entries', 'gauge', 'Cached responses.', [([], cache['entries'])]),
+            ('response_cache_hits_total', 'counter', 'Response cache hits.', [([], cache['hits'])]),
+            ('response_cache_misses_total', 'counter', 'Response cache misses.', [([], cache['misses'])]),
+            ('lookup_cache_entries', 'gauge', 'Cached lookups by table.',
+             [([('table', table)], stats['entries']) for table, stats in lookups]),
+            ('lookup_cache_hits_total', 'counter', 'Lookup cache hits.',
+             [([('table', table)], stats['hits']) for table, stats in lookups]),
+            ('lookup_cache_misses_total', 'counter', 'Lookup cache misses.',
+             [([('table', table)], stats['misses']) for table, stats in lookups]),
+            ('lookup_cache_evictions_total', 'counter', 'Lookups evicted to stay within LOOKUP_CACHE_SIZE.',
+             [([('table', table)], stats['evictions']) for table, stats in lookups]),
+        ]
+        if app.review_buffer is not None:
+            buffer = app.review_buffer.stats()
+            extra += [
+                ('review_buffer_pending', 'gauge', 'Reviews waiting to be written.', [([], buffer['pending'])]),
+                ('review_buffer_batches_total', 'counter', 'Group commits.', [([], buffer['batches'])]),
+                ('review_buffer_rows_written_total', 'counter', 'Buffered reviews written.',
+                 [([], buffer['rows_written'])]),
+                ('review_buffer_rows_dropped_total', 'counter', 'Buffered reviews that failed to write.',
+                 [([], buffer['rows_dropped'])]),
+            ]
+        return Response(app.metrics.render(extra), mimetype='text/plain; version=0.0.4')
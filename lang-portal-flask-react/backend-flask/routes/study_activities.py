@@ -1,12 +1,15 @@
 import math
 
 from flask import jsonify, request
-from flask_cors import cross_origin
+
+from lib.serialization import records
+from lib.study_sessions import summary_columns
+from lib.users import current_user_id
 
 
 def load(app):
     @app.route('/api/study-activities', methods=['GET'])
-    @cross_origin()
+    @app.response_cache.cached
     def get_study_activities():
         cursor = app.db.cursor()
         cursor.execute('SELECT id, name, url, preview_url FROM study_activities')
@@ -20,12 +23,8 @@ def load(app):
         } for activity in activities])
 
     @app.route('/api/study-activities/<int:id>', methods=['GET'])
-    @cross_origin()
     def get_study_activity(id):
-        cursor = app.db.cursor()
-        cursor.execute('SELECT id, name, url, preview_url FROM study_activities WHERE id = ?', (id,))
-        activity = cursor.fetchone()
-
+        activity = app.lookup_cache.study_activity(app.db.cursor(), id)
         if not activity:
             return jsonify({'error': 'Activity not found'}), 404
 
@@ -37,13 +36,11 @@ def load(app):
         })
 
     @app.route('/api/study-activities/<int:id>/sessions', methods=['GET'])
-    @cross_origin()
     def get_study_activity_sessions(id):
         cursor = app.db.cursor()
 
         # Verify activity exists
-        cursor.execute('SELECT id FROM study_activities WHERE id = ?', (id,))
-        if not cursor.fetchone():
+        if app.lookup_cache.study_activity(cursor, id) is None:
             return jsonify({'error': 'Activity not found'}), 404
 
         # Get pagination parameters
@@ -56,42 +53,29 @@ def load(app):
             SELECT COUNT(*) as count 
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
-            WHERE ss.study_activity_id = ?
-        ''', (id,))
+            WHERE ss.user_id = ? AND ss.study_activity_id = ?
+        ''', (current_user_id(), id))
         total_count = cursor.fetchone()['count']
 
-        # Get paginated sessions
-        cursor.execute('''
+        # Get paginated sessions with their precomputed summaries
+        cursor.execute(f'''
             SELECT 
                 ss.id,
                 ss.group_id,
                 g.name as group_name,
-                sa.name as activity_name,
-                ss.created_at,
                 ss.study_activity_id as activity_id,
-                COUNT(wri.id) as review_items_count
+                sa.name as activity_name,{summary_columns('ss')}
             FROM study_sessions ss
             JOIN groups g ON g.id = ss.group_id
             JOIN study_activities sa ON sa.id = ss.study_activity_id
-            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-            WHERE ss.study_activity_id = ?
-            GROUP BY ss.id, ss.group_id, g.name, sa.name, ss.created_at, ss.study_activity_id
+            WHERE ss.user_id = ? AND ss.study_activity_id = ?
             ORDER BY ss.created_at DESC
             LIMIT ? OFFSET ?
-        ''', (id, per_page, offset))
-        sessions = cursor.fetchall()
+        ''', (current_user_id(), id, per_page, offset))
+        sessions = records(cursor)
 
         return jsonify({
-            'items': [{
-                'id': session['id'],
-                'group_id': session['group_id'],
-                'group_name': session['group_name'],
-                'activity_id': session['activity_id'],
-                'activity_name': session['activity_name'],
-                'start_time': session['created_at'],
-                'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
-                'review_items_count': session['review_items_count']
-            } for session in sessions],
+            'items': sessions,
             'total': total_count,
             'page': page,
             'per_page': per_page,
@@ -99,20 +83,14 @@ def load(app):
         })
 
     @app.route('/api/study-activities/<int:id>/launch', methods=['GET'])
-    @cross_origin()
     def get_study_activity_launch_data(id):
         cursor = app.db.cursor()
 
-        # Get activity details
-        cursor.execute('SELECT id, name, url, preview_url FROM study_activities WHERE id = ?', (id,))
-        activity = cursor.fetchone()
-
+        # The activity and the available groups come from the lookup cache
+        activity = app.lookup_cache.study_activity(cursor, id)
         if not activity:
             return jsonify({'error': 'Activity not found'}), 404
-
-        # Get available groups
-        cursor.execute('SELECT id, name FROM groups')
-        groups = cursor.fetchall()
+        groups = app.lookup_cache.groups(cursor)
 
         return jsonify({
             'activity': {
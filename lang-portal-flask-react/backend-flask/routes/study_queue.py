@@ -0,0 +1,86 @@
+from flask import request, jsonify
+
+from lib.srs import now_timestamp
+from lib.users import current_user_id
+
+
+def load(app):
+    # Endpoint: GET /api/study-queue - the next words to study, most overdue first,
+    # topped up with words that were never reviewed
+    @app.route('/api/study-queue', methods=['GET'])
+    def get_study_queue():
+        try:
+            cursor = app.db.cursor()
+            user_id = current_user_id()
+
+            group_id = request.args.get('group_id', type=int)
+            limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+            include_new = request.args.get('include_new', 'true') != 'false'
+
+            if group_id is not None:
+                cursor.execute('SELECT id FROM groups WHERE id = ?', (group_id,))
+                if not cursor.fetchone():
+                    return jsonify({"error": "Group not found"}), 404
+                group_filter = 'AND EXISTS (SELECT 1 FROM word_groups wg WHERE wg.word_id = s.word_id AND wg.group_id = ?)'
+                group_params = (group_id,)
+            else:
+                group_filter, group_params = '', ()
+
+            # Due words come straight off the due_at index in due order
+            now = now_timestamp()
+            cursor.execute(f'''
+        SELECT w.id, w.english, w.german, s.due_at, s.interval_days, s.ease, s.repetitions
+        FROM word_schedules s
+        JOIN words w ON w.id = s.word_id
+        WHERE s.user_id = ? AND s.due_at <= ? {group_filter}
+        ORDER BY s.due_at
+        LIMIT ?
+      ''', (user_id, now) + group_params + (limit,))
+            items = [{
+                "id": word["id"],
+                "english": word["english"],
+                "german": word["german"],
+                "due_at": word["due_at"],
+                "interval_days": word["interval_days"],
+                "ease": word["ease"],
+                "repetitions": word["repetitions"],
+                "is_new": False
+            } for word in cursor.fetchall()]
+
+            # Fill the rest of the queue with words that have no schedule yet
+            if include_new and len(items) < limit:
+                if group_id is not None:
+                    cursor.execute('''
+            SELECT w.id, w.english, w.german
+            FROM word_groups wg
+            JOIN words w ON w.id = wg.word_id
+            WHERE wg.group_id = ?
+              AND NOT EXISTS (SELECT 1 FROM word_schedules s WHERE s.user_id = ? AND s.word_id = wg.word_id)
+            ORDER BY wg.word_id
+            LIMIT ?
+          ''', (group_id, user_id, limit - len(items)))
+                else:
+                    cursor.execute('''
+            SELECT w.id, w.english, w.german
+            FROM words w
+            WHERE NOT EXISTS (SELECT 1 FROM word_schedules s WHERE s.user_id = ? AND s.word_id = w.id)
+            ORDER BY w.id
+            LIMIT ?
+          ''', (user_id, limit - len(items)))
+                items.extend({
+                    "id": word["id"],
+                    "english": word["english"],
+                    "german": word["german"],
+                    "due_at": None,
+                    "interval_days": 0,
+                    "ease": None,
+                    "repetitions": 0,
+                    "is_new": True
+                } for word in cursor.fetchall())
+
+            return jsonify({
+                'items': items,
+                'count': len(items)
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -1,13 +1,17 @@
 import math
 
 from flask import request, jsonify
-from flask_cors import cross_origin
+
+from lib.reviews import MAX_BULK_REVIEWS, insert_reviews, validate_reviews
+from lib.serialization import records
+from lib.srs import now_timestamp
+from lib.study_sessions import close_session, summary_columns
+from lib.users import current_user_id
 
 
 def load(app):
     # IMPLEMENTED ENDPOINT
     @app.route('/api/study-sessions', methods=['POST'])
-    @cross_origin()
     def create_study_session():
         try:
             # Get and validate request data
@@ -17,26 +21,24 @@ def load(app):
 
             cursor = app.db.cursor()
 
-            # Verify group exists
-            cursor.execute('SELECT id FROM groups WHERE id = ?', (data['group_id'],))
-            if not cursor.fetchone():
+            # Verify group and study activity exist (usually answered by the lookup cache)
+            if app.lookup_cache.group(cursor, data['group_id']) is None:
                 return jsonify({"error": "Group not found"}), 404
-
-            # Verify study activity exists
-            cursor.execute('SELECT id FROM study_activities WHERE id = ?', (data['study_activity_id'],))
-            if not cursor.fetchone():
+            if app.lookup_cache.study_activity(cursor, data['study_activity_id']) is None:
                 return jsonify({"error": "Study activity not found"}), 404
 
             # Create the study session
             cursor.execute('''
-              INSERT INTO study_sessions (group_id, study_activity_id, created_at)
-              VALUES (?, ?, CURRENT_TIMESTAMP)
+              INSERT INTO study_sessions (user_id, group_id, study_activity_id, created_at)
+              VALUES (?, ?, ?, CURRENT_TIMESTAMP)
           ''', (
+                current_user_id(),
                 data['group_id'],
                 data['study_activity_id']
             ))
 
             session_id = cursor.lastrowid
+            app.db.bump_data_version(cursor)
             app.db.commit()
 
             return jsonify({
@@ -50,16 +52,17 @@ def load(app):
 
     # IMPLEMENTED ENDPOINT
     @app.route('/api/study-sessions/<id>/review', methods=['POST'])
-    @cross_origin()
     def review_study_session(id):
         try:
             cursor = app.db.cursor()
 
-            # Check if session exists
-            cursor.execute('SELECT id FROM study_sessions WHERE id = ?', (id,))
+            # Check if session exists (other users' sessions are not visible)
+            cursor.execute('SELECT id, ended_at FROM study_sessions WHERE id = ? AND user_id = ?', (id, current_user_id()))
             session = cursor.fetchone()
             if not session:
                 return jsonify({"error": "Study session not found"}), 404
+            if session["ended_at"] is not None:
+                return jsonify({"error": "Study session is closed"}), 409
 
             # Get review data from request
             data = request.get_json()
@@ -67,22 +70,21 @@ def load(app):
                 return jsonify({"error": "No review data provided"}), 400
 
             reviews = data['reviews']
+            if not isinstance(reviews, list):
+                return jsonify({"error": "Invalid review format"}), 400
+
+            # Validate the whole payload first so a bad item never leaves a half-applied batch
+            accepted, rejected = validate_reviews(cursor, reviews, app.lookup_cache)
+            if rejected:
+                return jsonify({"error": "Invalid review format", "rejected": rejected}), 400
 
-            # Insert each review
-            for review in reviews:
-                if 'word_id' not in review or 'is_correct' not in review:
-                    return jsonify({"error": "Invalid review format"}), 400
-
-                cursor.execute('''
-                  INSERT INTO word_review_items 
-                  (study_session_id, word_id, correct, created_at)
-                  VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-              ''', (
-                    id,
-                    review['word_id'],
-                    1 if review['is_correct'] else 0
-                ))
+            # With the review buffer enabled the reviews are written shortly after the response
+            if app.review_buffer is not None:
+                app.review_buffer.submit(current_user_id(), session["id"], accepted)
+                return jsonify({"message": "Reviews queued", "queued": len(accepted)}), 202
 
+            insert_reviews(cursor, current_user_id(), id, accepted)
+            app.db.bump_data_version(cursor)
             app.db.commit()
             return jsonify({"message": "Reviews recorded successfully"}), 200
 
@@ -90,8 +92,79 @@ def load(app):
             app.db.rollback()
             return jsonify({"error": str(e)}), 500
 
+    @app.route('/api/study-sessions/<id>/review/bulk', methods=['POST'])
+    def bulk_review_study_session(id):
+        try:
+            cursor = app.db.cursor()
+
+            # Check if session exists (other users' sessions are not visible)
+            cursor.execute('SELECT id, ended_at FROM study_sessions WHERE id = ? AND user_id = ?', (id, current_user_id()))
+            session = cursor.fetchone()
+            if not session:
+                return jsonify({"error": "Study session not found"}), 404
+            if session["ended_at"] is not None:
+                return jsonify({"error": "Study session is closed"}), 409
+
+            data = request.get_json()
+            if not data or not isinstance(data.get('reviews'), list):
+                return jsonify({"error": "No review data provided"}), 400
+
+            reviews = data['reviews']
+            if len(reviews) > MAX_BULK_REVIEWS:
+                return jsonify({"error": f"At most {MAX_BULK_REVIEWS} reviews per request"}), 413
+
+            # Valid items are stored in one transaction, invalid ones are reported back
+            accepted, rejected = validate_reviews(cursor, reviews, app.lookup_cache)
+            if app.review_buffer is not None:
+                app.review_buffer.submit(current_user_id(), session["id"], accepted)
+                return jsonify({
+                    "message": "Reviews queued",
+                    "accepted": len(accepted),
+                    "rejected": rejected
+                }), 202
+            if accepted:
+                insert_reviews(cursor, current_user_id(), id, accepted)
+                app.db.bump_data_version(cursor)
+                app.db.commit()
+
+            return jsonify({
+                "message": "Reviews recorded successfully",
+                "accepted": len(accepted),
+                "rejected": rejected
+            }), 200
+
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
+
+    # Ends the session: its end time is fixed and further reviews are rejected with 409
+    @app.route('/api/study-sessions/<id>/close', methods=['POST'])
+    def close_study_session(id):
+        try:
+            cursor = app.db.cursor()
+
+            cursor.execute('SELECT id FROM study_sessions WHERE id = ? AND user_id = ?', (id, current_user_id()))
+            session = cursor.fetchone()
+            if not session:
+                return jsonify({"error": "Study session not found"}), 404
+
+            # Reviews still queued for this session are written before it closes
+            if app.review_buffer is not None:
+                app.review_buffer.flush(app.db.get())
+
+            close_session(cursor, session["id"], now_timestamp())
+            app.db.bump_data_version(cursor)
+            app.db.commit()
+
+            cursor.execute(f'SELECT id,{summary_columns("ss")} FROM study_sessions ss WHERE ss.id = ?',
+                           (session["id"],))
+            return jsonify({"session": records(cursor)[0]}), 200
+
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
+
     @app.route('/api/study-sessions', methods=['GET'])
-    @cross_origin()
     def get_study_sessions():
         try:
             cursor = app.db.cursor()
@@ -107,40 +180,29 @@ def load(app):
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
+        WHERE ss.user_id = ?
+      ''', (current_user_id(),))
             total_count = cursor.fetchone()['count']
 
-            # Get paginated sessions
-            cursor.execute('''
+            # Get paginated sessions with their precomputed summaries
+            cursor.execute(f'''
         SELECT 
           ss.id,
           ss.group_id,
           g.name as group_name,
           sa.id as activity_id,
-          sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
+          sa.name as activity_name,{summary_columns('ss')}
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        GROUP BY ss.id
+        WHERE ss.user_id = ?
         ORDER BY ss.created_at DESC
         LIMIT ? OFFSET ?
-      ''', (per_page, offset))
-            sessions = cursor.fetchall()
+      ''', (current_user_id(), per_page, offset))
+            sessions = records(cursor)
 
             return jsonify({
-                'items': [{
-                    'id': session['id'],
-                    'group_id': session['group_id'],
-                    'group_name': session['group_name'],
-                    'activity_id': session['activity_id'],
-                    'activity_name': session['activity_name'],
-                    'start_time': session['created_at'],
-                    'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
-                    'review_items_count': session['review_items_count']
-                } for session in sessions],
+                'items': sessions,
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
@@ -150,30 +212,25 @@ def load(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/study-sessions/<id>', methods=['GET'])
-    @cross_origin()
     def get_study_session(id):
         try:
             cursor = app.db.cursor()
 
             # Get session details
-            cursor.execute('''
+            cursor.execute(f'''
         SELECT 
           ss.id,
           ss.group_id,
           g.name as group_name,
           sa.id as activity_id,
-          sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
+          sa.name as activity_name,{summary_columns('ss')}
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        WHERE ss.id = ?
-        GROUP BY ss.id
-      ''', (id,))
+        WHERE ss.id = ? AND ss.user_id = ?
+      ''', (id, current_user_id()))
 
-            session = cursor.fetchone()
+            session = next(iter(records(cursor)), None)
             if not session:
                 return jsonify({"error": "Study session not found"}), 404
 
@@ -185,9 +242,11 @@ def load(app):
             # Get the words reviewed in this session with their review status
             cursor.execute('''
         SELECT 
-          w.*,
-          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
-          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
+          w.id,
+          w.english,
+          w.german,
+          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as correct_count,
+          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as wrong_count
         FROM words w
         JOIN word_review_items wri ON wri.word_id = w.id
         WHERE wri.study_session_id = ?
@@ -196,7 +255,8 @@ def load(app):
         LIMIT ? OFFSET ?
       ''', (id, per_page, offset))
 
-            words = cursor.fetchall()
+            # Counts within this session only
+            words = records(cursor)
 
             # Get total count of words
             cursor.execute('''
@@ -209,23 +269,8 @@ def load(app):
             total_count = cursor.fetchone()['count']
 
             return jsonify({
-                'session': {
-                    'id': session['id'],
-                    'group_id': session['group_id'],
-                    'group_name': session['group_name'],
-                    'activity_id': session['activity_id'],
-                    'activity_name': session['activity_name'],
-                    'start_time': session['created_at'],
-                    'end_time': session['created_at'],  # For now, just use the same time
-                    'review_items_count': session['review_items_count']
-                },
-                'words': [{
-                    'id': word['id'],
-                    'english': word['english'],
-                    'german': word['german'],
-                    'correct_count': word['session_correct_count'],
-                    'wrong_count': word['session_wrong_count']
-                } for word in words],
+                'session': session,
+                'words': words,
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
@@ -234,20 +279,28 @@ def load(app):
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    # Starts clearing the user's history in the background; poll GET for its progress
     @app.route('/api/study-sessions/reset', methods=['POST'])
-    @cross_origin()
     def reset_study_sessions():
         try:
-            cursor = app.db.cursor()
+            # Only the requesting user's history is cleared
+            user_id = current_user_id()
 
-            # First delete all word review items since they have foreign key constraints
-            cursor.execute('DELETE FROM word_review_items')
+            # Write queued reviews first so none of them land after the reset
+            if app.review_buffer is not None:
+                app.review_buffer.flush(app.db.get())
 
-            # Then delete all study sessions
-            cursor.execute('DELETE FROM study_sessions')
-
-            app.db.commit()
-
-            return jsonify({"message": "Study history cleared successfully"}), 200
+            # Deletes in short batched transactions, so readers and other users'
+            # reviews are not blocked for the whole reset of a long history
+            status = app.history_resets.start(user_id)
+            return jsonify({"message": "Study history reset started", "reset": status}), 202
         except Exception as e:
+            app.db.rollback()
             return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/study-sessions/reset', methods=['GET'])
+    def get_study_sessions_reset():
+        status = app.history_resets.status(current_user_id())
+        if status is None:
+            return jsonify({"error": "No reset was started"}), 404
+        return jsonify({"reset": status})
@@ -0,0 +1,39 @@
+from flask import request, jsonify
+
+
+def load(app):
+    # Endpoint: POST /api/users to register a learner; send its id as X-User-Id afterwards
+    @app.route('/api/users', methods=['POST'])
+    def create_user():
+        try:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data.get('name'), str) or not data['name'].strip():
+                return jsonify({"error": "Missing required fields"}), 400
+
+            cursor = app.db.cursor()
+            # A trigger creates the user's dashboard_stats row
+            cursor.execute('INSERT INTO users (name) VALUES (?)', (data['name'].strip(),))
+            user_id = cursor.lastrowid
+            app.db.commit()
+
+            return jsonify({"id": user_id, "name": data['name'].strip()}), 201
+        except Exception as e:
+            app.db.rollback()
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/users/<int:id>', methods=['GET'])
+    def get_user(id):
+        try:
+            cursor = app.db.cursor()
+            cursor.execute('SELECT id, name, created_at FROM users WHERE id = ?', (id,))
+            user = cursor.fetchone()
+            if not user:
+                return jsonify({"error": "User not found"}), 404
+
+            return jsonify({
+                "id": user["id"],
+                "name": user["name"],
+                "created_at": user["created_at"]
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -1,11 +1,28 @@
 from flask import request, jsonify
-from flask_cors import cross_origin
+
+from lib.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_condition
+from lib.search import search_words
+from lib.serialization import records
+from lib.users import current_user_id
+from lib.words import MAX_BATCH_IDS, WORD_FIELDS, InvalidFields, fetch_words, parse_fields
+
+# SQL expressions behind each sortable column of the word listings
+SORT_EXPRESSIONS = {
+    'english': 'w.english',
+    'german': 'w.german',
+    'correct_count': 'COALESCE(r.correct_count, 0)',
+    'wrong_count': 'COALESCE(r.wrong_count, 0)'
+}
+
+# Sort columns with an index on words to walk, so keyset pages are index ranges.
+# The review counts are per user and default to 0, so no index can serve them.
+KEYSET_SORT_KEYS = ('german', 'english')
 
 
 def load(app):
     # Endpoint: GET /api/words with pagination (50 words per page)
+    # Pass `cursor` (empty for the first page) to use keyset pagination instead of page numbers
     @app.route('/api/words', methods=['GET'])
-    @cross_origin()
     def get_words():
         try:
             cursor = app.db.cursor()
@@ -28,33 +45,48 @@ def load(app):
             if order not in ['asc', 'desc']:
                 order = 'asc'
 
-            # Query to fetch words with sorting
+            # Total number of words comes from the counter cache instead of COUNT(*)
+            cursor.execute("SELECT value FROM counters WHERE name = 'words'")
+            total_words = cursor.fetchone()[0]
+            total_pages = (total_words + words_per_page - 1) // words_per_page
+
+            keyset = 'cursor' in request.args
+            if keyset:
+                if sort_by not in KEYSET_SORT_KEYS:
+                    raise InvalidCursor('Cursor pagination only supports sorting by german or english')
+                position = decode_cursor(request.args['cursor'], sort_by, order)
+                condition, params = keyset_condition(SORT_EXPRESSIONS[sort_by], 'w.id', order, position)
+                limit_clause, limit_params = 'LIMIT ?', (words_per_page + 1,)
+            else:
+                condition, params = '1 = 1', ()
+                limit_clause, limit_params = 'LIMIT ? OFFSET ?', (words_per_page, offset)
+
+            # Query to fetch words with sorting (id breaks ties so pages are stable)
             cursor.execute(f'''
         SELECT w.id, w.english, w.german,
             COALESCE(r.correct_count, 0) AS correct_count,
             COALESCE(r.wrong_count, 0) AS wrong_count
         FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        ORDER BY {sort_by} {order}
-        LIMIT ? OFFSET ?
-      ''', (words_per_page, offset))
-
-            words = cursor.fetchall()
-
-            # Query the total number of words
-            cursor.execute('SELECT COUNT(*) FROM words')
-            total_words = cursor.fetchone()[0]
-            total_pages = (total_words + words_per_page - 1) // words_per_page
-
-            # Format the response
-            words_data = []
-            for word in words:
-                words_data.append({
-                    "id": word["id"],
-                    "english": word["english"],
-                    "german": word["german"],
-                    "correct_count": word["correct_count"],
-                    "wrong_count": word["wrong_count"]
+        LEFT JOIN word_reviews r ON r.user_id = ? AND r.word_id = w.id
+        WHERE {condition}
+        ORDER BY {SORT_EXPRESSIONS[sort_by]} {order}, w.id {order}
+        {limit_clause}
+      ''', (current_user_id(),) + params + limit_params)
+
+            # The selected columns are the response fields
+            words = records(cursor)
+            words_data = words[:words_per_page]
+
+            if keyset:
+                next_cursor = None
+                if len(words) > words_per_page:
+                    last = words_data[-1]
+                    next_cursor = encode_cursor(sort_by, order, last[sort_by], last["id"])
+                return jsonify({
+                    "words": words_data,
+                    "next_cursor": next_cursor,
+                    "total_pages": total_pages,
+                    "total_words": total_words
                 })
 
             return jsonify({
@@ -64,57 +96,83 @@ def load(app):
                 "total_words": total_words
             })
 
+        except InvalidCursor as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # Endpoint: GET /api/words/search?q= for type-ahead search with a fuzzy fallback
+    @app.route('/api/words/search', methods=['GET'])
+    def search_words_endpoint():
+        try:
+            query = request.args.get('q', '').strip()
+            if not query:
+                return jsonify({"error": "Missing search query"}), 400
+
+            limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+            mode = request.args.get('mode', 'auto')
+            if mode not in ['auto', 'prefix', 'fuzzy']:
+                mode = 'auto'
+
+            words, mode_used = search_words(app.db.cursor(), current_user_id(), query, limit, mode)
+
+            return jsonify({
+                "words": [{
+                    "id": word["id"],
+                    "english": word["english"],
+                    "german": word["german"],
+                    "correct_count": word["correct_count"],
+                    "wrong_count": word["wrong_count"]
+                } for word in words],
+                "mode": mode_used,
+                "count": len(words)
+            })
         except Exception as e:
             return jsonify({"error": str(e)}), 500
-        finally:
-            app.db.close()
 
     # Endpoint: GET /api/words/:id to get a single word with its details
     @app.route('/api/words/<int:word_id>', methods=['GET'])
-    @cross_origin()
+    @app.response_cache.cached(per_user=True)
     def get_word(word_id):
         try:
             cursor = app.db.cursor()
 
-            # Query to fetch the word and its details
-            cursor.execute('''
-        SELECT w.id, w.english, w.german,
-               COALESCE(r.correct_count, 0) AS correct_count,
-               COALESCE(r.wrong_count, 0) AS wrong_count,
-               GROUP_CONCAT(DISTINCT g.id || '::' || g.name) as groups
-        FROM words w
-        LEFT JOIN word_reviews r ON w.id = r.word_id
-        LEFT JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN groups g ON wg.group_id = g.id
-        WHERE w.id = ?
-        GROUP BY w.id
-      ''', (word_id,))
+            words = fetch_words(cursor, current_user_id(), [word_id], list(WORD_FIELDS))
+            if word_id not in words:
+                return jsonify({"error": "Word not found"}), 404
 
-            word = cursor.fetchone()
+            return jsonify({"word": words[word_id]})
 
-            if not word:
-                return jsonify({"error": "Word not found"}), 404
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # Endpoint: POST /api/words/batch to fetch many words by id in one request
+    # Body: {"ids": [1, 2, ...], "fields": ["german", "groups"]}; `fields` may also
+    # be passed as ?fields=german,groups and defaults to every field of GET /api/words/:id
+    @app.route('/api/words/batch', methods=['POST'])
+    def get_words_batch():
+        try:
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict) or not isinstance(data.get('ids'), list):
+                return jsonify({"error": "No word ids provided"}), 400
+
+            ids = data['ids']
+            if len(ids) > MAX_BATCH_IDS:
+                return jsonify({"error": f"At most {MAX_BATCH_IDS} ids per request"}), 413
+            if not all(isinstance(word_id, int) and not isinstance(word_id, bool) for word_id in ids):
+                return jsonify({"error": "ids must be integers"}), 400
 
-            # Parse the groups string into a list of group objects
-            groups = []
-            if word["groups"]:
-                for group_str in word["groups"].split(','):
-                    group_id, group_name = group_str.split('::')
-                    groups.append({
-                        "id": int(group_id),
-                        "name": group_name
-                    })
+            fields = parse_fields(data.get('fields', request.args.get('fields')))
+            # Duplicates are dropped; words come back in the order they were asked for
+            ids = list(dict.fromkeys(ids))
+            words = fetch_words(app.db.cursor(), current_user_id(), ids, fields)
 
             return jsonify({
-                "word": {
-                    "id": word["id"],
-                    "english": word["english"],
-                    "german": word["german"],
-                    "correct_count": word["correct_count"],
-                    "wrong_count": word["wrong_count"],
-                    "groups": groups
-                }
+                "words": [words[word_id] for word_id in ids if word_id in words],
+                "missing": [word_id for word_id in ids if word_id not in words],
+                "count": len(words)
             })
-
+        except InvalidFields as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -0,0 +1,16 @@
+-- superseded-by: 0010_add_users
+-- word_reviews keeps one counter row per word, which lib/reviews.py upserts
+-- with ON CONFLICT (word_id). Databases created before that may hold several
+-- rows for a word: fold them into the oldest one, then enforce the key.
+-- 0010 rebuilds the table with a (user_id, word_id) key, so databases that
+-- already applied it record this migration without running it.
+UPDATE word_reviews
+SET correct_count = (SELECT SUM(d.correct_count) FROM word_reviews d WHERE d.word_id = word_reviews.word_id),
+    wrong_count   = (SELECT SUM(d.wrong_count) FROM word_reviews d WHERE d.word_id = word_reviews.word_id),
+    last_reviewed = (SELECT MAX(d.last_reviewed) FROM word_reviews d WHERE d.word_id = word_reviews.word_id)
+WHERE id IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id HAVING COUNT(*) > 1);
+
+DELETE FROM word_reviews
+WHERE id NOT IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
@@ -0,0 +1,15 @@
+-- Secondary indexes for the joins and filters used by the API routes.
+-- word_reviews(word_id) is already covered by the unique index of 0000.
+
+-- Review items are looked up per session (session listings, dashboard) and per word
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session ON word_review_items (study_session_id);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word ON word_review_items (word_id);
+
+-- Group word listings filter by group; word details look up groups by word
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_word ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_group ON word_groups (word_id, group_id);
+
+-- Session listings per group and per activity are ordered by start time
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created ON study_sessions (study_activity_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created ON study_sessions (created_at);
@@ -0,0 +1,115 @@
+-- Single-row materialization of the dashboard statistics, kept current by the
+-- triggers below as reviews and sessions are written. lib/dashboard_stats.py
+-- can recompute it from scratch and check it against the raw tables.
+CREATE TABLE IF NOT EXISTS dashboard_stats
+(
+    id                  INTEGER PRIMARY KEY CHECK (id = 1),
+    total_words_studied INTEGER NOT NULL DEFAULT 0, -- Words with at least one review
+    mastered_words      INTEGER NOT NULL DEFAULT 0, -- Words with >= 5 reviews and >= 80% correct
+    total_reviews       INTEGER NOT NULL DEFAULT 0,
+    correct_reviews     INTEGER NOT NULL DEFAULT 0,
+    total_sessions      INTEGER NOT NULL DEFAULT 0,
+    current_streak      INTEGER NOT NULL DEFAULT 0, -- Consecutive study days ending at last_study_date
+    last_study_date     DATE
+);
+
+INSERT OR IGNORE INTO dashboard_stats (id) VALUES (1);
+
+-- Backfill from the existing history. The streak is the island of consecutive study days
+-- holding the latest one: consecutive days share julianday(day) - ROW_NUMBER().
+UPDATE dashboard_stats
+SET total_words_studied = (SELECT COUNT(*) FROM word_reviews),
+    mastered_words      = (SELECT COUNT(*)
+                           FROM word_reviews
+                           WHERE correct_count + wrong_count >= 5
+                             AND correct_count * 1.0 / (correct_count + wrong_count) >= 0.8),
+    total_reviews       = (SELECT COUNT(*) FROM word_review_items),
+    correct_reviews     = (SELECT COUNT(*) FROM word_review_items WHERE correct = 1),
+    total_sessions      = (SELECT COUNT(*) FROM study_sessions),
+    current_streak      = (WITH study_days AS (SELECT DISTINCT date(created_at) AS study_date FROM study_sessions),
+                                islands AS (SELECT study_date,
+                                                   julianday(study_date) - ROW_NUMBER() OVER (ORDER BY study_date) AS island
+                                            FROM study_days)
+                           SELECT COUNT(*)
+                           FROM islands
+                           WHERE island = (SELECT island FROM islands ORDER BY study_date DESC LIMIT 1)),
+    last_study_date     = (SELECT date(MAX(created_at)) FROM study_sessions)
+WHERE id = 1;
+
+-- Words studied and mastered follow the word_reviews counter cache
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_insert
+    AFTER INSERT ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET total_words_studied = total_words_studied + 1,
+        mastered_words      = mastered_words + (NEW.correct_count + NEW.wrong_count >= 5 AND
+                                                NEW.correct_count * 1.0 / (NEW.correct_count + NEW.wrong_count) >= 0.8)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_update
+    AFTER UPDATE OF correct_count, wrong_count ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET mastered_words = mastered_words
+        + (NEW.correct_count + NEW.wrong_count >= 5 AND
+           NEW.correct_count * 1.0 / (NEW.correct_count + NEW.wrong_count) >= 0.8)
+        - (OLD.correct_count + OLD.wrong_count >= 5 AND
+           OLD.correct_count * 1.0 / (OLD.correct_count + OLD.wrong_count) >= 0.8)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_delete
+    AFTER DELETE ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET total_words_studied = total_words_studied - 1,
+        mastered_words      = mastered_words - (OLD.correct_count + OLD.wrong_count >= 5 AND
+                                                OLD.correct_count * 1.0 / (OLD.correct_count + OLD.wrong_count) >= 0.8)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_review_items_insert
+    AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE dashboard_stats
+    SET total_reviews   = total_reviews + 1,
+        correct_reviews = correct_reviews + (NEW.correct = 1)
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_review_items_delete
+    AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE dashboard_stats
+    SET total_reviews   = total_reviews - 1,
+        correct_reviews = correct_reviews - (OLD.correct = 1)
+    WHERE id = 1;
+END;
+
+-- A session on the day after the last study day extends the streak, a later one restarts it.
+-- Sessions dated before the last study day leave it alone until the next full refresh.
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_sessions_insert
+    AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE dashboard_stats
+    SET total_sessions  = total_sessions + 1,
+        current_streak  = CASE
+                              WHEN last_study_date IS NULL THEN 1
+                              WHEN date(NEW.created_at) <= last_study_date THEN current_streak
+                              WHEN date(NEW.created_at) = date(last_study_date, '+1 day') THEN current_streak + 1
+                              ELSE 1
+                          END,
+        last_study_date = CASE
+                              WHEN last_study_date IS NULL OR date(NEW.created_at) > last_study_date
+                                  THEN date(NEW.created_at)
+                              ELSE last_study_date
+                          END
+    WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_sessions_delete
+    AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE dashboard_stats SET total_sessions = total_sessions - 1 WHERE id = 1;
+END;
@@ -0,0 +1,31 @@
+-- Per-session review summary, maintained as review items are written so that
+-- session listings do not aggregate word_review_items per row.
+ALTER TABLE study_sessions ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN first_activity_at DATETIME; -- First review in the session
+ALTER TABLE study_sessions ADD COLUMN last_activity_at DATETIME;  -- Latest review in the session
+
+UPDATE study_sessions
+SET review_count      = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id),
+    first_activity_at = (SELECT MIN(created_at) FROM word_review_items WHERE study_session_id = study_sessions.id),
+    last_activity_at  = (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = study_sessions.id);
+
+CREATE TRIGGER IF NOT EXISTS study_session_summary_insert
+    AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE study_sessions
+    SET review_count      = review_count + 1,
+        first_activity_at = COALESCE(first_activity_at, NEW.created_at),
+        last_activity_at  = CASE
+                                WHEN last_activity_at IS NULL OR NEW.created_at > last_activity_at
+                                    THEN NEW.created_at
+                                ELSE last_activity_at
+                            END
+    WHERE id = NEW.study_session_id;
+END;
+
+-- Deleting review items only adjusts the count; the activity times keep their last known values
+CREATE TRIGGER IF NOT EXISTS study_session_summary_delete
+    AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE study_sessions SET review_count = review_count - 1 WHERE id = OLD.study_session_id;
+END;
@@ -0,0 +1,27 @@
+-- Counter cache for row counts that would otherwise need a full COUNT(*) scan,
+-- starting from the current number of words. The words counter is read by the
+-- word listings and the dashboard.
+CREATE TABLE IF NOT EXISTS counters
+(
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO counters (name, value)
+SELECT 'words', COUNT(*) FROM words;
+
+CREATE TRIGGER IF NOT EXISTS words_counter_insert
+    AFTER INSERT ON words
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_counter_delete
+    AFTER DELETE ON words
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'words';
+END;
+
+-- Global data version, bumped by every write that changes API responses.
+-- The HTTP response cache (lib/http_cache.py) drops entries built for an older version.
+INSERT OR IGNORE INTO counters (name, value) VALUES ('data_version', 0);
@@ -0,0 +1,2 @@
+-- Incremental exports (`since=`) filter review items by creation time
+CREATE INDEX IF NOT EXISTS idx_word_review_items_created ON word_review_items (created_at);
@@ -0,0 +1,57 @@
+-- Re-running the seed import used to duplicate words and groups. Merge the
+-- existing duplicates into their oldest row, then enforce uniqueness so the
+-- importer can rely on INSERT ... ON CONFLICT.
+
+-- Words: (german, english) identifies a word
+CREATE TEMP TABLE duplicate_words AS
+SELECT w.id AS word_id,
+       (SELECT MIN(k.id) FROM words k WHERE k.german = w.german AND k.english = w.english) AS keeper_id
+FROM words w;
+DELETE FROM duplicate_words WHERE word_id = keeper_id;
+
+UPDATE word_groups
+SET word_id = (SELECT keeper_id FROM duplicate_words WHERE duplicate_words.word_id = word_groups.word_id)
+WHERE word_id IN (SELECT word_id FROM duplicate_words);
+
+UPDATE word_review_items
+SET word_id = (SELECT keeper_id FROM duplicate_words WHERE duplicate_words.word_id = word_review_items.word_id)
+WHERE word_id IN (SELECT word_id FROM duplicate_words);
+
+-- Rebuild the review counters of every merged word from the remapped review items
+DELETE FROM word_reviews
+WHERE word_id IN (SELECT word_id FROM duplicate_words UNION SELECT keeper_id FROM duplicate_words);
+INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+SELECT word_id, SUM(correct = 1), SUM(correct = 0), MAX(created_at)
+FROM word_review_items
+WHERE word_id IN (SELECT keeper_id FROM duplicate_words)
+GROUP BY word_id;
+
+DELETE FROM words WHERE id IN (SELECT word_id FROM duplicate_words);
+DROP TABLE duplicate_words;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_words_german_english ON words (german, english);
+
+-- Groups: the name identifies a group
+CREATE TEMP TABLE duplicate_groups AS
+SELECT g.id AS group_id, (SELECT MIN(k.id) FROM groups k WHERE k.name = g.name) AS keeper_id
+FROM groups g;
+DELETE FROM duplicate_groups WHERE group_id = keeper_id;
+
+UPDATE word_groups
+SET group_id = (SELECT keeper_id FROM duplicate_groups WHERE duplicate_groups.group_id = word_groups.group_id)
+WHERE group_id IN (SELECT group_id FROM duplicate_groups);
+
+UPDATE study_sessions
+SET group_id = (SELECT keeper_id FROM duplicate_groups WHERE duplicate_groups.group_id = study_sessions.group_id)
+WHERE group_id IN (SELECT group_id FROM duplicate_groups);
+
+DELETE FROM groups WHERE id IN (SELECT group_id FROM duplicate_groups);
+DROP TABLE duplicate_groups;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_groups_name ON groups (name);
+
+-- Merging can leave the same word twice in a group
+DELETE FROM word_groups
+WHERE rowid NOT IN (SELECT MIN(rowid) FROM word_groups GROUP BY group_id, word_id);
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
@@ -0,0 +1,15 @@
+-- Spaced-repetition state per word (see lib/srs.py). Words without a row have
+-- never been reviewed. Existing history can be replayed with `invoke rebuild-schedules`.
+CREATE TABLE IF NOT EXISTS word_schedules
+(
+    word_id          INTEGER PRIMARY KEY,
+    ease             REAL     NOT NULL DEFAULT 2.5, -- SM-2 ease factor
+    interval_days    REAL     NOT NULL DEFAULT 0,   -- Current review interval
+    repetitions      INTEGER  NOT NULL DEFAULT 0,   -- Consecutive correct reviews
+    due_at           DATETIME NOT NULL,             -- When the word should be studied next
+    last_reviewed_at DATETIME,
+    FOREIGN KEY (word_id) REFERENCES words (id)
+);
+
+-- The study queue walks words in due order
+CREATE INDEX IF NOT EXISTS idx_word_schedules_due ON word_schedules (due_at);
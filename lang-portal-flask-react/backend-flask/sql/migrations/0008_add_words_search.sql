@@ -0,0 +1,42 @@
+-- Full-text search over words (see lib/search.py). words_fts serves token and
+-- prefix search, words_trigram the fuzzy fallback for typos. Both store the
+-- words with ß folded to ss so "strasse" finds "Straße"; the unicode61
+-- tokenizer additionally folds umlauts. Triggers keep both indexes in sync.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(german, english, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3');
+CREATE VIRTUAL TABLE IF NOT EXISTS words_trigram USING fts5(german, english, tokenize = 'trigram');
+
+INSERT INTO words_fts (rowid, german, english)
+SELECT id, replace(replace(german, 'ß', 'ss'), 'ẞ', 'SS'), replace(replace(english, 'ß', 'ss'), 'ẞ', 'SS')
+FROM words;
+
+INSERT INTO words_trigram (rowid, german, english)
+SELECT rowid, german, english FROM words_fts;
+
+CREATE TRIGGER IF NOT EXISTS words_search_insert
+    AFTER INSERT ON words
+BEGIN
+    INSERT INTO words_fts (rowid, german, english)
+    VALUES (NEW.id, replace(replace(NEW.german, 'ß', 'ss'), 'ẞ', 'SS'), replace(replace(NEW.english, 'ß', 'ss'), 'ẞ', 'SS'));
+    INSERT INTO words_trigram (rowid, german, english)
+    VALUES (NEW.id, replace(replace(NEW.german, 'ß', 'ss'), 'ẞ', 'SS'), replace(replace(NEW.english, 'ß', 'ss'), 'ẞ', 'SS'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_update
+    AFTER UPDATE OF german, english ON words
+BEGIN
+    UPDATE words_fts
+    SET german  = replace(replace(NEW.german, 'ß', 'ss'), 'ẞ', 'SS'),
+        english = replace(replace(NEW.english, 'ß', 'ss'), 'ẞ', 'SS')
+    WHERE rowid = NEW.id;
+    UPDATE words_trigram
+    SET german  = replace(replace(NEW.german, 'ß', 'ss'), 'ẞ', 'SS'),
+        english = replace(replace(NEW.english, 'ß', 'ss'), 'ẞ', 'SS')
+    WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_search_delete
+    AFTER DELETE ON words
+BEGIN
+    DELETE FROM words_fts WHERE rowid = OLD.id;
+    DELETE FROM words_trigram WHERE rowid = OLD.id;
+END;
@@ -0,0 +1,21 @@
+-- Version of the study_activities table, bumped by triggers on any change.
+-- The CORS origin registry (lib/cors.py) polls it to reload the allowed origins.
+INSERT OR IGNORE INTO counters (name, value) VALUES ('study_activities_version', 0);
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_insert
+    AFTER INSERT ON study_activities
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'study_activities_version';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_update
+    AFTER UPDATE OF url ON study_activities
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'study_activities_version';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_delete
+    AFTER DELETE ON study_activities
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'study_activities_version';
+END;
@@ -0,0 +1,190 @@
+-- Learners. The vocabulary (words, groups, study activities) stays shared;
+-- study sessions, review items, the word_reviews counters, spaced-repetition
+-- schedules and dashboard statistics now belong to one user. Requests select
+-- the user with the X-User-Id header (lib/users.py). Existing history is
+-- assigned to the default user 1.
+CREATE TABLE IF NOT EXISTS users
+(
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    name       TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO users (id, name) VALUES (1, 'default');
+
+-- The dashboard triggers are recreated per user below; drop them before the
+-- tables they reference are rebuilt.
+DROP TRIGGER IF EXISTS dashboard_stats_word_reviews_insert;
+DROP TRIGGER IF EXISTS dashboard_stats_word_reviews_update;
+DROP TRIGGER IF EXISTS dashboard_stats_word_reviews_delete;
+DROP TRIGGER IF EXISTS dashboard_stats_review_items_insert;
+DROP TRIGGER IF EXISTS dashboard_stats_review_items_delete;
+DROP TRIGGER IF EXISTS dashboard_stats_sessions_insert;
+DROP TRIGGER IF EXISTS dashboard_stats_sessions_delete;
+
+-- Review items carry their session's user so per-user aggregates and triggers
+-- do not need to join study_sessions.
+ALTER TABLE study_sessions ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1; -- REFERENCES users (id)
+ALTER TABLE word_review_items ADD COLUMN user_id INTEGER NOT NULL DEFAULT 1; -- REFERENCES users (id)
+
+-- Session listings, the dashboard and exports read one user's sessions by time
+DROP INDEX IF EXISTS idx_study_sessions_group_created;
+DROP INDEX IF EXISTS idx_study_sessions_activity_created;
+DROP INDEX IF EXISTS idx_study_sessions_created;
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_created ON study_sessions (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_group_created ON study_sessions (user_id, group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_user_activity_created ON study_sessions (user_id, study_activity_id, created_at);
+
+DROP INDEX IF EXISTS idx_word_review_items_created;
+CREATE INDEX IF NOT EXISTS idx_word_review_items_user_created ON word_review_items (user_id, created_at);
+
+-- word_reviews: one counter row per (user, word)
+CREATE TABLE word_reviews_new
+(
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       INTEGER NOT NULL DEFAULT 1,
+    word_id       INTEGER NOT NULL,
+    correct_count INTEGER   DEFAULT 0,
+    wrong_count   INTEGER   DEFAULT 0,
+    last_reviewed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, word_id),
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (word_id) REFERENCES words (id)
+);
+
+INSERT INTO word_reviews_new (id, user_id, word_id, correct_count, wrong_count, last_reviewed)
+SELECT id, 1, word_id, correct_count, wrong_count, last_reviewed FROM word_reviews;
+
+DROP TABLE word_reviews;
+ALTER TABLE word_reviews_new RENAME TO word_reviews;
+
+-- word_schedules: one spaced-repetition state per (user, word)
+CREATE TABLE word_schedules_new
+(
+    user_id          INTEGER  NOT NULL DEFAULT 1,
+    word_id          INTEGER  NOT NULL,
+    ease             REAL     NOT NULL DEFAULT 2.5, -- SM-2 ease factor
+    interval_days    REAL     NOT NULL DEFAULT 0,   -- Current review interval
+    repetitions      INTEGER  NOT NULL DEFAULT 0,   -- Consecutive correct reviews
+    due_at           DATETIME NOT NULL,             -- When the word should be studied next
+    last_reviewed_at DATETIME,
+    PRIMARY KEY (user_id, word_id),
+    FOREIGN KEY (user_id) REFERENCES users (id),
+    FOREIGN KEY (word_id) REFERENCES words (id)
+);
+
+INSERT INTO word_schedules_new (user_id, word_id, ease, interval_days, repetitions, due_at, last_reviewed_at)
+SELECT 1, word_id, ease, interval_days, repetitions, due_at, last_reviewed_at FROM word_schedules;
+
+DROP TABLE word_schedules;
+ALTER TABLE word_schedules_new RENAME TO word_schedules;
+
+-- The study queue walks one user's words in due order
+CREATE INDEX IF NOT EXISTS idx_word_schedules_user_due ON word_schedules (user_id, due_at);
+
+-- dashboard_stats: one materialized row per user
+CREATE TABLE dashboard_stats_new
+(
+    user_id             INTEGER PRIMARY KEY,
+    total_words_studied INTEGER NOT NULL DEFAULT 0, -- Words with at least one review
+    mastered_words      INTEGER NOT NULL DEFAULT 0, -- Words with >= 5 reviews and >= 80% correct
+    total_reviews       INTEGER NOT NULL DEFAULT 0,
+    correct_reviews     INTEGER NOT NULL DEFAULT 0,
+    total_sessions      INTEGER NOT NULL DEFAULT 0,
+    current_streak      INTEGER NOT NULL DEFAULT 0, -- Consecutive study days ending at last_study_date
+    last_study_date     DATE,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+INSERT INTO dashboard_stats_new (user_id, total_words_studied, mastered_words, total_reviews,
+                                 correct_reviews, total_sessions, current_streak, last_study_date)
+SELECT 1, total_words_studied, mastered_words, total_reviews,
+       correct_reviews, total_sessions, current_streak, last_study_date
+FROM dashboard_stats;
+
+INSERT OR IGNORE INTO dashboard_stats_new (user_id) SELECT id FROM users;
+
+DROP TABLE dashboard_stats;
+ALTER TABLE dashboard_stats_new RENAME TO dashboard_stats;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_users_insert
+    AFTER INSERT ON users
+BEGIN
+    INSERT OR IGNORE INTO dashboard_stats (user_id) VALUES (NEW.id);
+END;
+
+-- The triggers from 0002_add_dashboard_stats.sql, scoped to the row's user
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_insert
+    AFTER INSERT ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET total_words_studied = total_words_studied + 1,
+        mastered_words      = mastered_words + (NEW.correct_count + NEW.wrong_count >= 5 AND
+                                                NEW.correct_count * 1.0 / (NEW.correct_count + NEW.wrong_count) >= 0.8)
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_update
+    AFTER UPDATE OF correct_count, wrong_count ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET mastered_words = mastered_words
+        + (NEW.correct_count + NEW.wrong_count >= 5 AND
+           NEW.correct_count * 1.0 / (NEW.correct_count + NEW.wrong_count) >= 0.8)
+        - (OLD.correct_count + OLD.wrong_count >= 5 AND
+           OLD.correct_count * 1.0 / (OLD.correct_count + OLD.wrong_count) >= 0.8)
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_word_reviews_delete
+    AFTER DELETE ON word_reviews
+BEGIN
+    UPDATE dashboard_stats
+    SET total_words_studied = total_words_studied - 1,
+        mastered_words      = mastered_words - (OLD.correct_count + OLD.wrong_count >= 5 AND
+                                                OLD.correct_count * 1.0 / (OLD.correct_count + OLD.wrong_count) >= 0.8)
+    WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_review_items_insert
+    AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE dashboard_stats
+    SET total_reviews   = total_reviews + 1,
+        correct_reviews = correct_reviews + (NEW.correct = 1)
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_review_items_delete
+    AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE dashboard_stats
+    SET total_reviews   = total_reviews - 1,
+        correct_reviews = correct_reviews - (OLD.correct = 1)
+    WHERE user_id = OLD.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_sessions_insert
+    AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE dashboard_stats
+    SET total_sessions  = total_sessions + 1,
+        current_streak  = CASE
+                              WHEN last_study_date IS NULL THEN 1
+                              WHEN date(NEW.created_at) <= last_study_date THEN current_streak
+                              WHEN date(NEW.created_at) = date(last_study_date, '+1 day') THEN current_streak + 1
+                              ELSE 1
+                          END,
+        last_study_date = CASE
+                              WHEN last_study_date IS NULL OR date(NEW.created_at) > last_study_date
+                                  THEN date(NEW.created_at)
+                              ELSE last_study_date
+                          END
+    WHERE user_id = NEW.user_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS dashboard_stats_sessions_delete
+    AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE dashboard_stats SET total_sessions = total_sessions - 1 WHERE user_id = OLD.user_id;
+END;
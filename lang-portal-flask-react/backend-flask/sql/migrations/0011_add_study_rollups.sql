@@ -0,0 +1,96 @@
+-- Per-user study statistics bucketed by day and by week, for the dashboard
+-- charts (GET /dashboard/timeseries). Every bucket is kept for three
+-- dimensions: all of the user's studying ('total', key_id 0), per group
+-- ('group', key_id = group id) and per study activity ('activity', key_id =
+-- study activity id), so a chart reads exactly one row per period.
+--
+-- Periods are UTC dates like every created_at; weeks start on Monday. Reviews
+-- count towards the day they were made, sessions towards the day they began.
+-- Session counts are maintained by the trigger below, review counts by
+-- lib/rollups.py in the same transaction as the reviews.
+CREATE TABLE IF NOT EXISTS study_rollups
+(
+    user_id         INTEGER NOT NULL,
+    granularity     TEXT    NOT NULL,           -- 'day' or 'week'
+    dimension       TEXT    NOT NULL,           -- 'total', 'group' or 'activity'
+    key_id          INTEGER NOT NULL,           -- Group or study activity id, 0 for 'total'
+    period          DATE    NOT NULL,           -- First day of the bucket
+    sessions        INTEGER NOT NULL DEFAULT 0,
+    reviews         INTEGER NOT NULL DEFAULT 0,
+    correct_reviews INTEGER NOT NULL DEFAULT 0,
+    words_touched   INTEGER NOT NULL DEFAULT 0, -- Distinct words reviewed
+    PRIMARY KEY (user_id, granularity, dimension, key_id, period)
+) WITHOUT ROWID;
+
+-- The words already counted in words_touched, for buckets that can still
+-- receive reviews. Rows of past weeks are pruned (lib/rollups.py).
+CREATE TABLE IF NOT EXISTS study_rollup_words
+(
+    user_id     INTEGER NOT NULL,
+    granularity TEXT    NOT NULL,
+    dimension   TEXT    NOT NULL,
+    key_id      INTEGER NOT NULL,
+    period      DATE    NOT NULL,
+    word_id     INTEGER NOT NULL,
+    PRIMARY KEY (user_id, granularity, dimension, key_id, period, word_id)
+) WITHOUT ROWID;
+
+-- Backfill from the existing history
+INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period, reviews, correct_reviews, words_touched)
+SELECT wri.user_id,
+       g.granularity,
+       d.dimension,
+       CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+       CASE g.granularity WHEN 'day' THEN date(wri.created_at) ELSE date(wri.created_at, '-6 days', 'weekday 1') END,
+       COUNT(*),
+       SUM(wri.correct = 1),
+       COUNT(DISTINCT wri.word_id)
+FROM word_review_items wri
+JOIN study_sessions ss ON ss.id = wri.study_session_id
+CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+GROUP BY 1, 2, 3, 4, 5;
+
+INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period, sessions)
+SELECT ss.user_id,
+       g.granularity,
+       d.dimension,
+       CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+       CASE g.granularity WHEN 'day' THEN date(ss.created_at) ELSE date(ss.created_at, '-6 days', 'weekday 1') END,
+       COUNT(*)
+FROM study_sessions ss
+CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+WHERE true
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (user_id, granularity, dimension, key_id, period) DO UPDATE SET sessions = excluded.sessions;
+
+INSERT INTO study_rollup_words (user_id, granularity, dimension, key_id, period, word_id)
+SELECT DISTINCT
+       wri.user_id,
+       g.granularity,
+       d.dimension,
+       CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN ss.group_id ELSE ss.study_activity_id END,
+       CASE g.granularity WHEN 'day' THEN date(wri.created_at) ELSE date(wri.created_at, '-6 days', 'weekday 1') END,
+       wri.word_id
+FROM word_review_items wri
+JOIN study_sessions ss ON ss.id = wri.study_session_id
+CROSS JOIN (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+WHERE wri.created_at >= date('now', '-6 days', 'weekday 1');
+
+CREATE TRIGGER IF NOT EXISTS study_rollups_sessions_insert
+    AFTER INSERT ON study_sessions
+BEGIN
+    INSERT INTO study_rollups (user_id, granularity, dimension, key_id, period, sessions)
+    SELECT NEW.user_id,
+           g.granularity,
+           d.dimension,
+           CASE d.dimension WHEN 'total' THEN 0 WHEN 'group' THEN NEW.group_id ELSE NEW.study_activity_id END,
+           CASE g.granularity WHEN 'day' THEN date(NEW.created_at) ELSE date(NEW.created_at, '-6 days', 'weekday 1') END,
+           1
+    FROM (SELECT 'day' AS granularity UNION ALL SELECT 'week') g
+    CROSS JOIN (SELECT 'total' AS dimension UNION ALL SELECT 'group' UNION ALL SELECT 'activity') d
+    WHERE true
+    ON CONFLICT (user_id, granularity, dimension, key_id, period) DO UPDATE SET sessions = sessions + 1;
+END;
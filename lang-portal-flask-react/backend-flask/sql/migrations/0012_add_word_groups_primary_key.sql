@@ -0,0 +1,43 @@
+-- Group membership gets a (group_id, word_id) primary key so a word can only
+-- be in a group once, and groups.words_count is kept by triggers instead of
+-- being recounted by the importer. SQLite cannot add a primary key to an
+-- existing table, so word_groups is rebuilt without its duplicates.
+CREATE TABLE word_groups_new
+(
+    group_id INTEGER NOT NULL,
+    word_id  INTEGER NOT NULL,
+    PRIMARY KEY (group_id, word_id),
+    FOREIGN KEY (word_id) REFERENCES words (id),
+    FOREIGN KEY (group_id) REFERENCES groups (id)
+) WITHOUT ROWID;
+
+INSERT INTO word_groups_new (group_id, word_id)
+SELECT DISTINCT group_id, word_id FROM word_groups;
+
+DROP TABLE word_groups;
+ALTER TABLE word_groups_new RENAME TO word_groups;
+
+-- The primary key replaces idx_word_groups_group_word; lookups by word still need their index
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_group ON word_groups (word_id, group_id);
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_insert
+    AFTER INSERT ON word_groups
+BEGIN
+    UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_delete
+    AFTER DELETE ON word_groups
+BEGIN
+    UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_count_update
+    AFTER UPDATE OF group_id ON word_groups
+    WHEN NEW.group_id != OLD.group_id
+BEGIN
+    UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+    UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
@@ -0,0 +1,41 @@
+-- Session lifecycle: correct/wrong counters next to review_count, and the time
+-- a session was closed (POST /api/study-sessions/<id>/close). A session ends
+-- when it is closed, otherwise at its latest review, so every listing reads
+-- its end time and results from these columns.
+ALTER TABLE study_sessions ADD COLUMN correct_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN wrong_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE study_sessions ADD COLUMN ended_at DATETIME; -- NULL while the session is open
+
+UPDATE study_sessions
+SET correct_count = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id AND correct = 1),
+    wrong_count   = (SELECT COUNT(*) FROM word_review_items WHERE study_session_id = study_sessions.id AND correct = 0)
+WHERE review_count > 0;
+
+DROP TRIGGER IF EXISTS study_session_summary_insert;
+CREATE TRIGGER study_session_summary_insert
+    AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE study_sessions
+    SET review_count      = review_count + 1,
+        correct_count     = correct_count + (NEW.correct = 1),
+        wrong_count       = wrong_count + (NEW.correct = 0),
+        first_activity_at = COALESCE(first_activity_at, NEW.created_at),
+        last_activity_at  = CASE
+                                WHEN last_activity_at IS NULL OR NEW.created_at > last_activity_at
+                                    THEN NEW.created_at
+                                ELSE last_activity_at
+                            END
+    WHERE id = NEW.study_session_id;
+END;
+
+-- Deleting review items only adjusts the counts; the activity times keep their last known values
+DROP TRIGGER IF EXISTS study_session_summary_delete;
+CREATE TRIGGER study_session_summary_delete
+    AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE study_sessions
+    SET review_count  = review_count - 1,
+        correct_count = correct_count - (OLD.correct = 1),
+        wrong_count   = wrong_count - (OLD.correct = 0)
+    WHERE id = OLD.study_session_id;
+END;
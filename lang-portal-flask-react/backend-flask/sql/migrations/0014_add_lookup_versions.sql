@@ -0,0 +1,45 @@
+-- Versions of the groups and words tables, bumped by triggers like
+-- study_activities_version (0009). The lookup cache (lib/lookup_cache.py)
+-- polls them to drop entries that another process made stale.
+INSERT OR IGNORE INTO counters (name, value) VALUES ('groups_version', 0);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('words_version', 0);
+
+CREATE TRIGGER IF NOT EXISTS groups_version_insert
+    AFTER INSERT ON groups
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'groups_version';
+END;
+
+-- words_count changes with every membership change and is not cached
+CREATE TRIGGER IF NOT EXISTS groups_version_update
+    AFTER UPDATE OF id, name ON groups
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'groups_version';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_version_delete
+    AFTER DELETE ON groups
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'groups_version';
+END;
+
+-- Only the existence of words is cached
+CREATE TRIGGER IF NOT EXISTS words_version_insert
+    AFTER INSERT ON words
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'words_version';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_delete
+    AFTER DELETE ON words
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'words_version';
+END;
+
+-- Whole study activity rows are cached now, not only their origins
+DROP TRIGGER IF EXISTS study_activities_version_update;
+CREATE TRIGGER study_activities_version_update
+    AFTER UPDATE ON study_activities
+BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'study_activities_version';
+END;
@@ -0,0 +1,3 @@
+-- Keyset pagination of the word listings sorted by english walks this index
+-- (german uses idx_words_german_english); the rowid breaks ties
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english);
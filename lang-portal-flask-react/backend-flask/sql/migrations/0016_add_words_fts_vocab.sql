@@ -0,0 +1,4 @@
+-- Every (term, word, column, offset) entry of words_fts, in term order.
+-- Type-ahead reads a bounded range of the terms starting with the query
+-- (lib/search.py) instead of ranking every word a short prefix matches.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts_instance USING fts5vocab(words_fts, 'instance');
@@ -1,5 +1,6 @@
 from invoke import task
 from lib.db import db
+from lib.reviews import rebuild_word_reviews as rebuild_word_review_counts
 
 
 @task
@@ -8,3 +9,138 @@ def init_db(c):
     app = Flask(__name__)
     db.init(app)
     print("Database initialized successfully.")
+
+
+@task(help={'group': "Name of the group to add the words to", 'path': "JSON array or CSV file with german/english"})
+def import_words(c, group, path):
+    from flask import Flask
+    app = Flask(__name__)
+    with app.app_context():
+        db.import_word_json(cursor=db.cursor(), group_name=group, data_json_path=path)
+
+
+@task
+def migrate(c):
+    from flask import Flask
+    from lib.migrations import run_migrations
+    app = Flask(__name__)
+    with app.app_context():
+        applied = run_migrations(db.get())
+    print(f"Applied {len(applied)} migration(s).")
+
+
+@task
+def rebuild_word_reviews(c):
+    from flask import Flask
+    app = Flask(__name__)
+    with app.app_context():
+        cursor = db.cursor()
+        words = rebuild_word_review_counts(cursor)
+        db.commit()
+    print(f"Rebuilt {words} word review counters.")
+
+
+@task
+def rebuild_schedules(c):
+    from flask import Flask
+    from lib.srs import rebuild_schedules as replay_schedules
+    app = Flask(__name__)
+    with app.app_context():
+        cursor = db.cursor()
+        words = replay_schedules(cursor)
+        db.commit()
+    print(f"Rebuilt {words} spaced-repetition schedules.")
+
+
+@task(help={'repair': "Overwrite the stored statistics with the recomputed values"})
+def check_dashboard_stats(c, repair=False):
+    from flask import Flask
+    from lib.dashboard_stats import check_dashboard_stats as check, refresh_dashboard_stats
+    app = Flask(__name__)
+    with app.app_context():
+        cursor = db.cursor()
+        cursor.execute('SELECT id FROM users ORDER BY id')
+        drifted = 0
+        for user_id in [row[0] for row in cursor.fetchall()]:
+            drift = check(cursor, user_id)
+            for column, (stored, expected) in drift.items():
+                print(f"user {user_id} {column}: stored {stored}, expected {expected}")
+            if drift:
+                drifted += 1
+                if repair:
+                    refresh_dashboard_stats(cursor, user_id)
+        if not drifted:
+            print("Dashboard statistics are consistent.")
+        elif repair:
+            db.commit()
+            print(f"Dashboard statistics repaired for {drifted} users.")
+
+
+@task
+def rebuild_rollups(c):
+    from flask import Flask
+    from lib.rollups import rebuild_rollups as recompute_rollups
+    app = Flask(__name__)
+    with app.app_context():
+        cursor = db.cursor()
+        rows = recompute_rollups(cursor)
+        db.commit()
+    print(f"Rebuilt {rows} study rollup rows.")
+
+
+@task
+def prune_rollups(c):
+    from flask import Flask
+    from lib.rollups import prune_rollup_words
+    app = Flask(__name__)
+    with app.app_context():
+        cursor = db.cursor()
+        rows = prune_rollup_words(cursor)
+        db.commit()
+    print(f"Pruned {rows} counted words of past weeks.")
+
+
+@task(help={
+    'user': "Id of the user whose history is purged",
+    'group_id': "Only purge sessions of this group",
+    'activity_id': "Only purge sessions of this study activity",
+    'before': "Only purge sessions started before this date (YYYY-MM-DD)",
+    'batch_size': "Rows deleted per transaction",
+    'archive': "Append the deleted rows to this gzip-compressed NDJSON file first",
+    'vacuum': "Return the freed pages to the file system afterwards",
+})
+def purge_history(c, user=1, group_id=None, activity_id=None, before=None, batch_size=5000, archive=None,
+                  vacuum=True):
+    from flask import Flask
+    from lib.retention import incremental_vacuum, purge_history as purge
+
+    def progress(totals):
+        print(f"\r{totals['sessions']:,} sessions, {totals['review_items']:,} review items deleted", end='', flush=True)
+
+    # Reviews the API still has queued for a purged session are dropped by its review buffer
+    app = Flask(__name__)
+    with app.app_context():
+        totals = purge(db.get(), int(user),
+                       group_id=int(group_id) if group_id is not None else None,
+                       study_activity_id=int(activity_id) if activity_id is not None else None,
+                       before=before, batch_size=int(batch_size), archive_path=archive, progress=progress)
+        print(f"\rPurged {totals['sessions']:,} sessions and {totals['review_items']:,} review items.")
+        if vacuum:
+            pages = incremental_vacuum(db.get())
+            if pages is None:
+                print("auto_vacuum is not INCREMENTAL; run `invoke enable-incremental-vacuum` once to reclaim space.")
+            else:
+                print(f"Freed {pages:,} pages.")
+
+
+@task
+def enable_incremental_vacuum(c):
+    # Changing auto_vacuum on an existing database needs a full VACUUM, which rewrites the file
+    from flask import Flask
+    app = Flask(__name__)
+    with app.app_context():
+        connection = db.get()
+        connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.execute('VACUUM')
+        mode = connection.execute('PRAGMA auto_vacuum').fetchone()[0]
+    print("auto_vacuum is INCREMENTAL." if mode == 2 else "Could not enable incremental vacuum.")
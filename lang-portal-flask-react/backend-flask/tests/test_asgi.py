@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import pytest
+
+from app import create_app
+from asgi import PooledWsgiToAsgi
+from benchmarks.common import create_database
+
+
+@pytest.fixture
+def application(tmp_path):
+    database = str(tmp_path / 'asgi.db')
+    connection = create_database(database)
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [(f'Wort {i}', f'word {i}') for i in range(1, 6)])
+    connection.commit()
+    connection.close()
+
+    app = create_app({'DATABASE': database})
+    application = PooledWsgiToAsgi(app, threads=2)
+    yield application
+    application.executor.shutdown()
+    app.db.pool.close_all()
+
+
+def call(application, method, path, query=b'', body=b'', headers=()):
+    """Run one http request through the adapter; returns (status, headers, body chunks)."""
+    scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http', 'path': path,
+             'root_path': '', 'query_string': query, 'headers': list(headers),
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)}
+    # The body arrives in two messages, as a server may deliver it
+    messages = [{'type': 'http.request', 'body': body[:3], 'more_body': True},
+                {'type': 'http.request', 'body': body[3:], 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    assert start['type'] == 'http.response.start'
+    assert sent[-1] == {'type': 'http.response.body', 'body': b'', 'more_body': False}
+    return start['status'], dict(start['headers']), [message['body'] for message in sent[1:] if message['body']]
+
+
+def test_request_body_and_query_string(application):
+    body = json.dumps({'ids': [2, 1, 99], 'fields': ['german']}).encode()
+    status, headers, chunks = call(application, 'POST', '/api/words/batch', body=body,
+                                   headers=[(b'content-type', b'application/json'),
+                                            (b'content-length', str(len(body)).encode())])
+
+    assert status == 200
+    assert headers[b'content-type'] == b'application/json'
+    data = json.loads(b''.join(chunks))
+    assert [word['german'] for word in data['words']] == ['Wort 2', 'Wort 1']
+    assert data['missing'] == [99]
+
+    status, _, chunks = call(application, 'GET', '/api/words', query=b'sort_by=english&order=desc')
+    assert status == 200
+    assert json.loads(b''.join(chunks))['words'][0]['english'] == 'word 5'
+
+
+def test_streamed_export_is_sent_in_chunks(application):
+    status, headers, chunks = call(application, 'GET', '/api/export/words', query=b'since_id=1')
+
+    assert status == 200
+    assert headers[b'content-type'].startswith(b'application/x-ndjson')
+    lines = b''.join(chunks).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [2, 3, 4, 5]
@@ -0,0 +1,65 @@
+import time
+
+import requests
+
+# Base URL for your API
+BASE_URL = 'http://localhost:8000/api'
+
+
+def test_cors_allows_configured_origin():
+    """
+    Test that the frontend dev server origin is allowed
+    """
+    response = requests.get(f'{BASE_URL}/groups', headers={'Origin': 'http://localhost:8080'})
+
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8080'
+    assert 'Origin' in response.headers['Vary']
+
+
+def test_cors_rejects_unknown_origin():
+    """
+    Test that origins outside the registry get no CORS headers
+    """
+    response = requests.get(f'{BASE_URL}/groups', headers={'Origin': 'http://unknown.example'})
+
+    assert response.status_code == 200
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+
+def test_cors_preflight():
+    """
+    Test that preflight requests list the allowed methods and headers
+    """
+    response = requests.options(f'{BASE_URL}/study-sessions', headers={
+        'Origin': 'http://localhost:8080',
+        'Access-Control-Request-Method': 'POST',
+        'Access-Control-Request-Headers': 'Content-Type'
+    })
+
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:8080'
+    assert 'POST' in response.headers['Access-Control-Allow-Methods']
+    assert 'Content-Type' in response.headers['Access-Control-Allow-Headers']
+
+
+def test_cors_picks_up_new_study_activity(db_connection):
+    """
+    Test that a study activity added while the server runs is allowed without a restart
+    """
+    origin = 'http://new-activity.example:9000'
+    cursor = db_connection.cursor()
+    cursor.execute('INSERT INTO study_activities (name, url) VALUES (?, ?)', ('New activity', f'{origin}/play'))
+    db_connection.commit()
+    try:
+        # The registry re-checks the version counter about once per second
+        time.sleep(1.2)
+        response = requests.get(f'{BASE_URL}/groups', headers={'Origin': origin})
+        assert response.headers.get('Access-Control-Allow-Origin') == origin
+    finally:
+        cursor.execute('DELETE FROM study_activities WHERE url = ?', (f'{origin}/play',))
+        db_connection.commit()
+
+    time.sleep(1.2)
+    response = requests.get(f'{BASE_URL}/groups', headers={'Origin': origin})
+    assert 'Access-Control-Allow-Origin' not in response.headers
@@ -65,3 +65,75 @@ def test_get_study_stats():
     assert data['total_sessions'] >= 0
     assert data['active_groups'] >= 0
     assert data['current_streak'] >= 0
+
+
+def test_study_stats_follow_new_reviews(valid_group_id, valid_study_activity_id, valid_word_id):
+    """
+    Test that the materialized statistics are updated by new sessions and reviews
+    """
+    before = requests.get(f'{BASE_URL}/dashboard/stats').json()
+
+    session = requests.post(f'{BASE_URL}/api/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    requests.post(f'{BASE_URL}/api/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [{'word_id': valid_word_id, 'is_correct': True}]
+    })
+
+    after = requests.get(f'{BASE_URL}/dashboard/stats').json()
+    assert after['total_sessions'] == before['total_sessions'] + 1
+    assert after['total_words_studied'] >= 1
+    assert after['current_streak'] >= 1
+    assert after['active_groups'] >= 1
+
+
+def test_materialized_stats_match_raw_tables(db_connection):
+    """
+    Test that the incrementally maintained statistics match a full recomputation
+    """
+    from lib.dashboard_stats import check_dashboard_stats
+
+    assert check_dashboard_stats(db_connection.cursor(), 1) == {}
+
+
+def test_get_study_timeseries():
+    """
+    Test that the daily and weekly series count a new user's session and reviews
+    """
+    user = requests.post(f'{BASE_URL}/api/users', json={'name': 'Chart learner'}).json()
+    headers = {'X-User-Id': str(user['id'])}
+    session = requests.post(f'{BASE_URL}/api/study-sessions', headers=headers,
+                            json={'group_id': 1, 'study_activity_id': 1}).json()
+    requests.post(f"{BASE_URL}/api/study-sessions/{session['session_id']}/review", headers=headers, json={
+        'reviews': [{'word_id': 1, 'is_correct': True}, {'word_id': 1, 'is_correct': False},
+                    {'word_id': 2, 'is_correct': True}]
+    })
+
+    for granularity in ['day', 'week']:
+        response = requests.get(f'{BASE_URL}/dashboard/timeseries?granularity={granularity}', headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data['granularity'] == granularity
+        assert len(data['points']) == (30 if granularity == 'day' else 12)
+
+        latest = data['points'][-1]
+        assert latest['sessions'] == 1
+        assert latest['reviews'] == 3
+        assert latest['correct_reviews'] == 2
+        assert latest['words_touched'] == 2
+        assert sum(point['reviews'] for point in data['points']) == 3
+
+    # Series per group and per study activity
+    response = requests.get(f'{BASE_URL}/dashboard/timeseries?group_id=1', headers=headers)
+    assert response.json()['points'][-1]['reviews'] == 3
+    response = requests.get(f'{BASE_URL}/dashboard/timeseries?group_id=2', headers=headers)
+    assert response.json()['points'][-1]['reviews'] == 0
+
+
+def test_get_study_timeseries_invalid_parameters():
+    for query in ['granularity=month', 'from=yesterday', 'from=2025-02-01&to=2025-01-01',
+                  'from=2000-01-01&to=2025-01-01', 'group_id=1&study_activity_id=1']:
+        response = requests.get(f'{BASE_URL}/dashboard/timeseries?{query}')
+        assert response.status_code == 400, query
+        assert 'error' in response.json()
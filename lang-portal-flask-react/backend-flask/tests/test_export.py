@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+
+import requests
+
+from lib.db import bump_data_version
+from lib.rollups import recount_rollups, subtract_rollups
+
+# Base URL for your API
+BASE_URL = 'http://localhost:8000/api'
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_export_words_ndjson():
+    """
+    Test exporting every word with its groups as NDJSON
+    """
+    response = requests.get(f'{BASE_URL}/export/words', stream=True)
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('application/x-ndjson')
+
+    words = read_ndjson(response)
+    total_words = requests.get(f'{BASE_URL}/words').json()['total_words']
+    assert len(words) == total_words
+
+    ids = [word['id'] for word in words]
+    assert ids == sorted(ids)
+    for word in words:
+        assert 'english' in word
+        assert 'german' in word
+        for group in word['groups']:
+            assert 'id' in group
+            assert 'name' in group
+
+
+def test_export_words_since_id_csv():
+    """
+    Test incremental CSV export of words after a known id
+    """
+    words = read_ndjson(requests.get(f'{BASE_URL}/export/words'))
+    since_id = words[len(words) // 2]['id']
+
+    response = requests.get(f'{BASE_URL}/export/words', params={'format': 'csv', 'since_id': since_id})
+
+    assert response.status_code == 200
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(row['id']) for row in rows] == [word['id'] for word in words if word['id'] > since_id]
+
+
+def test_export_review_items(valid_group_id, valid_study_activity_id, valid_word_id):
+    """
+    Test exporting review items recorded after a given id
+    """
+    existing = read_ndjson(requests.get(f'{BASE_URL}/export/review-items'))
+    since_id = existing[-1]['id'] if existing else 0
+
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [{'word_id': valid_word_id, 'is_correct': True}, {'word_id': valid_word_id, 'is_correct': False}]
+    })
+
+    items = read_ndjson(requests.get(f'{BASE_URL}/export/review-items', params={'since_id': since_id}))
+    assert [item['correct'] for item in items] == [1, 0]
+    assert all(item['study_session_id'] == session['session_id'] for item in items)
+
+    sessions = read_ndjson(requests.get(f'{BASE_URL}/export/study-sessions', params={'since': '2000-01-01'}))
+    assert session['session_id'] in [s['id'] for s in sessions]
+
+
+def test_export_resumes_after_since_and_since_id(db_connection, valid_group_id, valid_study_activity_id):
+    """
+    Test that since + since_id resume after that row in (created_at, id) order
+    """
+    # The later session gets the lower id, as imported or buffered rows can
+    cursor = db_connection.cursor()
+    inserted = []
+    for created_at in ['2001-01-02 10:00:00', '2001-01-01 10:00:00']:
+        cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)',
+                       (valid_group_id, valid_study_activity_id, created_at))
+        inserted.append((cursor.lastrowid, created_at))
+    db_connection.commit()
+    try:
+        sessions = read_ndjson(requests.get(f'{BASE_URL}/export/study-sessions', params={'since': '2001-01-01'}))
+        first = sessions[0]
+        assert first['created_at'] == '2001-01-01 10:00:00'
+
+        resumed = read_ndjson(requests.get(f'{BASE_URL}/export/study-sessions', params={
+            'since': first['created_at'],
+            'since_id': first['id']
+        }))
+        assert [s['id'] for s in resumed] == [s['id'] for s in sessions[1:]]
+    finally:
+        # Leave words.db, rollups included, as the other tests expect it
+        cursor.executemany('DELETE FROM study_sessions WHERE id = ?', [(id,) for id, _ in inserted])
+        recount_rollups(cursor, subtract_rollups(cursor, 1, sessions=[
+            (valid_group_id, valid_study_activity_id, created_at) for _, created_at in inserted]))
+        bump_data_version(cursor)
+        db_connection.commit()
+
+
+def test_export_since_accepts_iso_timestamps(valid_group_id, valid_study_activity_id):
+    """
+    Test that an ISO 8601 since matches the stored timestamps, and anything else is rejected
+    """
+    requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    })
+    latest = read_ndjson(requests.get(f'{BASE_URL}/export/study-sessions', params={'since': '2000-01-01'}))[-1]
+
+    for since in [latest['created_at'], latest['created_at'].replace(' ', 'T'),
+                  latest['created_at'].replace(' ', 'T') + 'Z', latest['created_at'].replace(' ', 'T') + '+00:00']:
+        sessions = read_ndjson(requests.get(f'{BASE_URL}/export/study-sessions', params={'since': since}))
+        assert latest['id'] in [s['id'] for s in sessions]
+
+    response = requests.get(f'{BASE_URL}/export/review-items', params={'since': 'yesterday'})
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_export_invalid_format():
+    """
+    Test that unknown export formats are rejected
+    """
+    response = requests.get(f'{BASE_URL}/export/words', params={'format': 'xml'})
+
+    assert response.status_code == 400
+    assert 'error' in response.json()
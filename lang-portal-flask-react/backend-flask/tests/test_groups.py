@@ -55,6 +55,24 @@ def test_get_single_group(valid_group_id):
     assert data['id'] == valid_group_id
 
 
+def test_get_single_group_not_modified(valid_group_id):
+    """
+    Test that a repeated request with the ETag is answered with 304
+    """
+    response = requests.get(f'{BASE_URL}/groups/{valid_group_id}')
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+
+    cached = requests.get(f'{BASE_URL}/groups/{valid_group_id}', headers={
+        'If-None-Match': response.headers['ETag']
+    })
+
+    assert cached.status_code == 304
+    assert cached.content == b''
+
+
 def test_get_nonexistent_group():
     """
     Test retrieving a non-existent group
@@ -106,6 +124,38 @@ def test_get_group_words_pagination(valid_group_id):
     assert data['current_page'] == 2
 
 
+def test_get_group_words_cursor_pagination(valid_group_id):
+    """
+    Test walking a group's words with keyset pagination
+    """
+    group = requests.get(f'{BASE_URL}/groups/{valid_group_id}').json()
+
+    seen = []
+    params = {'cursor': '', 'sort_by': 'german', 'order': 'desc'}
+    while True:
+        response = requests.get(f'{BASE_URL}/groups/{valid_group_id}/words', params=params)
+        assert response.status_code == 200
+
+        data = response.json()
+        seen.extend(word['id'] for word in data['words'])
+        if not data['next_cursor']:
+            break
+        params['cursor'] = data['next_cursor']
+
+    assert len(seen) == len(set(seen)) == group['word_count']
+
+
+def test_get_group_words_cursor_requires_indexed_sort(valid_group_id):
+    """
+    Test that keyset pagination is rejected for the review count sorts
+    """
+    response = requests.get(f'{BASE_URL}/groups/{valid_group_id}/words',
+                            params={'cursor': '', 'sort_by': 'correct_count'})
+
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
 def test_get_nonexistent_group_words():
     """
     Test retrieving words for a non-existent group
@@ -178,3 +228,85 @@ def test_get_group_study_sessions_pagination(valid_group_id):
 
     data = response.json()
     assert data['current_page'] == 2
+
+
+def test_get_group_study_sessions_summary(valid_group_id, valid_study_activity_id, valid_word_id):
+    """
+    Test that the session listing reflects reviews recorded for a session
+    """
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [{'word_id': valid_word_id, 'is_correct': True}] * 3
+    })
+
+    response = requests.get(f'{BASE_URL}/groups/{valid_group_id}/study_sessions', params={
+        'sort_by': 'startTime',
+        'order': 'desc'
+    })
+
+    assert response.status_code == 200
+
+    sessions = {s['id']: s for s in response.json()['study_sessions']}
+    assert sessions[session['session_id']]['review_items_count'] == 3
+    assert sessions[session['session_id']]['end_time'] >= sessions[session['session_id']]['start_time']
+
+
+def test_group_membership_add_and_remove(db_connection, valid_group_id):
+    """
+    Test that bulk adding and removing words keeps the group's word count in step
+    """
+    cursor = db_connection.cursor()
+    cursor.execute('''
+        SELECT id FROM words
+        WHERE id NOT IN (SELECT word_id FROM word_groups WHERE group_id = ?)
+        LIMIT 3
+    ''', (valid_group_id,))
+    word_ids = [row[0] for row in cursor.fetchall()]
+    before = requests.get(f'{BASE_URL}/groups/{valid_group_id}').json()['word_count']
+
+    response = requests.post(f'{BASE_URL}/groups/{valid_group_id}/words', json={'word_ids': word_ids + [99999]})
+    assert response.status_code == 200
+    data = response.json()
+    assert data['added'] == len(word_ids)
+    assert data['missing'] == [99999]
+    assert data['word_count'] == before + len(word_ids)
+
+    # Adding the same words again changes nothing
+    response = requests.post(f'{BASE_URL}/groups/{valid_group_id}/words', json={'word_ids': word_ids})
+    assert response.json()['added'] == 0
+    assert requests.get(f'{BASE_URL}/groups/{valid_group_id}').json()['word_count'] == before + len(word_ids)
+
+    response = requests.post(f'{BASE_URL}/groups/{valid_group_id}/words/remove', json={'word_ids': word_ids})
+    assert response.status_code == 200
+    assert response.json()['removed'] == len(word_ids)
+    assert requests.get(f'{BASE_URL}/groups/{valid_group_id}').json()['word_count'] == before
+
+
+def test_group_membership_single_word(valid_group_id, db_connection):
+    """
+    Test adding and removing one word, and the 404s for unknown groups and words
+    """
+    cursor = db_connection.cursor()
+    cursor.execute('''
+        SELECT id FROM words
+        WHERE id NOT IN (SELECT word_id FROM word_groups WHERE group_id = ?)
+        LIMIT 1
+    ''', (valid_group_id,))
+    word_id = cursor.fetchone()[0]
+
+    response = requests.put(f'{BASE_URL}/groups/{valid_group_id}/words/{word_id}')
+    assert response.status_code == 200
+    assert response.json()['added'] == 1
+
+    response = requests.delete(f'{BASE_URL}/groups/{valid_group_id}/words/{word_id}')
+    assert response.status_code == 200
+    response = requests.delete(f'{BASE_URL}/groups/{valid_group_id}/words/{word_id}')
+    assert response.status_code == 404
+
+    assert requests.put(f'{BASE_URL}/groups/{valid_group_id}/words/99999').status_code == 404
+    assert requests.put(f'{BASE_URL}/groups/99999/words/{word_id}').status_code == 404
+    response = requests.post(f'{BASE_URL}/groups/{valid_group_id}/words', json={'word_ids': [True]})
+    assert response.status_code == 400
@@ -0,0 +1,102 @@
+import sqlite3
+
+import pytest
+
+from app import create_app
+from benchmarks.common import create_database
+from lib.lookup_cache import LRUCache
+
+
+@pytest.fixture
+def database(tmp_path):
+    # A separate database, so other connections can write to it during a test
+    database = str(tmp_path / 'lookups.db')
+    connection = create_database(database)
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)', [('gehen', 'to go'), ('gut', 'good')])
+    connection.execute("INSERT INTO groups (name) VALUES ('Core Verbs')")
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+    connection.commit()
+    connection.close()
+    return database
+
+
+def make_app(database, refresh_interval):
+    return create_app({'DATABASE': database, 'LOOKUP_CACHE_REFRESH_INTERVAL': refresh_interval})
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats() == {'entries': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_session_creation_and_reviews_use_cached_lookups(database):
+    app = make_app(database, refresh_interval=60)
+    client = app.test_client()
+    try:
+        for _ in range(3):
+            response = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+            assert response.status_code == 201
+        session_id = response.get_json()['session_id']
+        assert client.post('/api/study-sessions', json={'group_id': 99, 'study_activity_id': 1}).status_code == 404
+        assert client.post('/api/study-sessions', json={'group_id': 99, 'study_activity_id': 1}).status_code == 404
+
+        for _ in range(2):
+            response = client.post(f'/api/study-sessions/{session_id}/review/bulk',
+                                   json={'reviews': [{'word_id': 1, 'is_correct': True},
+                                                     {'word_id': 3, 'is_correct': True}]})
+            assert response.get_json()['accepted'] == 1
+
+        stats = app.lookup_cache.stats()
+        assert stats['groups']['misses'] == 2 and stats['groups']['hits'] == 3
+        assert stats['study_activities']['misses'] == 1 and stats['study_activities']['hits'] == 2
+        assert stats['words']['misses'] == 2 and stats['words']['hits'] == 2
+
+        body = client.get('/metrics').get_data(as_text=True)
+        assert 'lookup_cache_hits_total{table="groups"} 3' in body
+    finally:
+        app.db.pool.close_all()
+
+
+def test_writes_from_other_connections_are_picked_up(database):
+    app = make_app(database, refresh_interval=0)
+    client = app.test_client()
+    other = sqlite3.connect(database)
+    try:
+        launch = client.get('/api/study-activities/1/launch').get_json()
+        assert [group['name'] for group in launch['groups']] == ['Core Verbs']
+
+        # The triggers bump the tables' version counters, which the next lookup compares
+        other.execute("INSERT INTO groups (name) VALUES ('Core Adjectives')")
+        other.execute("UPDATE study_activities SET name = 'Cards' WHERE id = 1")
+        other.commit()
+
+        launch = client.get('/api/study-activities/1/launch').get_json()
+        assert launch['activity']['title'] == 'Cards'
+        assert [group['name'] for group in launch['groups']] == ['Core Verbs', 'Core Adjectives']
+    finally:
+        other.close()
+        app.db.pool.close_all()
+
+
+def test_invalidate_drops_entries_before_the_next_version_check(database):
+    app = make_app(database, refresh_interval=60)
+    client = app.test_client()
+    other = sqlite3.connect(database)
+    try:
+        assert client.get('/api/study-activities/1').get_json()['title'] == 'Flashcards'
+        other.execute("UPDATE study_activities SET name = 'Cards' WHERE id = 1")
+        other.commit()
+        assert client.get('/api/study-activities/1').get_json()['title'] == 'Flashcards'
+
+        app.lookup_cache.invalidate('study_activities')
+        assert client.get('/api/study-activities/1').get_json()['title'] == 'Cards'
+    finally:
+        other.close()
+        app.db.pool.close_all()
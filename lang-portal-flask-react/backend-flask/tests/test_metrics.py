@@ -0,0 +1,46 @@
+import logging
+import sqlite3
+
+import requests
+
+from lib.metrics import InstrumentedCursor, Metrics
+
+# Base URL for your API
+BASE_URL = 'http://localhost:8000'
+
+
+def test_metrics_record_route_and_query_timings():
+    """
+    Test that requests and their SQL statements show up in /metrics
+    """
+    assert requests.get(f'{BASE_URL}/api/words').status_code == 200
+
+    response = requests.get(f'{BASE_URL}/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain')
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/words",status="200"}' in body
+    assert 'sql_query_duration_seconds_count{route="/api/words",' in body
+    assert 'sql_query_rows_total{route="/api/words",' in body
+    assert 'db_pool_connections{state="open"}' in body
+
+
+def test_slow_query_is_logged_with_plan(caplog):
+    """
+    Test that statements over the threshold are logged with EXPLAIN QUERY PLAN
+    """
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+    connection.executemany('INSERT INTO items (name) VALUES (?)', [('a',), ('b',)])
+    metrics = Metrics(slow_query_threshold=0)
+    cursor = InstrumentedCursor(connection.cursor(), metrics)
+
+    with caplog.at_level(logging.WARNING, logger='lang_portal.slow_queries'):
+        cursor.execute('SELECT * FROM items WHERE name = ?', ('a',))
+        assert len(cursor.fetchall()) == 1
+        cursor.finish()
+
+    assert metrics.slow_queries == 1
+    assert 'SCAN items' in caplog.text
+    assert list(metrics.query_rows.values()) == [1]
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+
+import pytest
+
+from lib.dashboard_stats import check_dashboard_stats
+from lib.db import SETUP_FILES
+from lib.migrations import MIGRATIONS_DIR, run_migrations
+
+ALL_VERSIONS = sorted(f[:-len('.sql')] for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    # The setup scripts are the original schema; databases built before the
+    # migrations existed have only these tables, and may hold duplicates
+    connection = sqlite3.connect(str(tmp_path / 'baseline.db'))
+    for filename in SETUP_FILES:
+        with open(os.path.join('sql', filename)) as file:
+            connection.executescript(file.read())
+
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [('gehen', 'to go'), ('gut', 'good'), ('gehen', 'to go')])
+    connection.executemany('INSERT INTO groups (name, words_count) VALUES (?, ?)', [('Core Verbs', 2), ('Core Verbs', 1)])
+    connection.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', [(1, 1), (2, 1), (3, 2)])
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+    connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) "
+                       "VALUES (1, 1, '2025-01-01 10:00:00')")
+    # A two-day streak up to the first session, after a gap
+    connection.executemany('INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (1, 1, ?)',
+                           [('2024-12-31 09:00:00',), ('2024-12-28 09:00:00',)])
+    connection.executemany('INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) '
+                           'VALUES (?, 1, ?, ?)',
+                           [(1, 1, '2025-01-01 10:01:00'), (2, 0, '2025-01-01 10:02:00'),
+                            (3, 1, '2025-01-01 10:03:00')])
+    # Two counter rows for word 2, as the old read-modify-write code could leave
+    connection.executemany('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (?, ?, ?)',
+                           [(1, 1, 0), (2, 0, 1), (2, 1, 0), (3, 1, 0)])
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def test_upgrade_baseline_database_to_latest(baseline):
+    assert run_migrations(baseline, log=None) == ALL_VERSIONS
+    assert run_migrations(baseline, log=None) == []
+
+    # 0000 summed the two counter rows of word 2; 0006 merged the duplicate word and group
+    assert baseline.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 2
+    assert baseline.execute("SELECT value FROM counters WHERE name = 'words'").fetchone()[0] == 2
+    assert baseline.execute('SELECT id, words_count FROM groups').fetchall() == [(1, 2)]
+    assert baseline.execute('SELECT user_id, word_id, correct_count, wrong_count FROM word_reviews '
+                            'ORDER BY word_id').fetchall() == [(1, 1, 2, 0), (1, 2, 1, 1)]
+
+    # The summaries and statistics are backfilled from the existing history
+    assert baseline.execute('SELECT review_count, correct_count, wrong_count FROM study_sessions '
+                            'ORDER BY id').fetchall() == [(3, 2, 1), (0, 0, 0), (0, 0, 0)]
+    assert baseline.execute('SELECT current_streak FROM dashboard_stats').fetchone()[0] == 2
+    baseline.row_factory = sqlite3.Row
+    assert check_dashboard_stats(baseline.cursor(), 1) == {}
+
+
+def test_superseded_migration_is_recorded_without_running(baseline):
+    run_migrations(baseline, log=None)
+    baseline.execute("DELETE FROM schema_migrations WHERE version = '0000_add_word_reviews_word_key'")
+    baseline.commit()
+
+    # Per-user counters may repeat a word_id; the word_id key must not come back
+    baseline.execute('INSERT INTO users (id, name) VALUES (2, ?)', ('second',))
+    baseline.execute('INSERT INTO word_reviews (user_id, word_id, correct_count) VALUES (2, 1, 1)')
+    baseline.commit()
+
+    assert run_migrations(baseline, log=None) == []
+    assert baseline.execute("SELECT COUNT(*) FROM schema_migrations "
+                            "WHERE version = '0000_add_word_reviews_word_key'").fetchone()[0] == 1
+    assert baseline.execute('SELECT COUNT(*) FROM word_reviews WHERE word_id = 1').fetchone()[0] == 2
@@ -0,0 +1,116 @@
+"""
+EXPLAIN QUERY PLAN regression tests for the route queries.
+
+The routes run in-process against a small database, and the statements they
+execute are taken from the per-route SQL instrumentation (lib/metrics.py), so
+the plans checked are those of the SQL the routes actually run. Each route is
+checked against the tables (by alias) that must be reached through an index. A
+"SCAN" of one of them means an index from sql/migrations was dropped or a query
+stopped using it.
+"""
+import re
+import sqlite3
+
+import pytest
+
+from app import create_app
+from benchmarks.common import create_database
+from lib.pagination import encode_cursor
+from routes.words import KEYSET_SORT_KEYS
+
+# URL rule: (method, request URL, JSON body, tables that must not be scanned)
+ROUTE_REQUESTS = {
+    '/api/words': ('GET', '/api/words', None, ['r']),
+    '/api/words/<int:word_id>': ('GET', '/api/words/1', None, ['w', 'r', 'wg', 'g']),
+    '/api/words/batch': ('POST', '/api/words/batch', {'ids': [1, 2, 3], 'fields': ['german', 'groups']},
+                         ['w', 'wg', 'g']),
+    '/api/groups/<int:id>/words': ('GET', '/api/groups/1/words', None, ['w', 'wg', 'r']),
+    '/api/groups/<int:id>/words/raw': ('GET', '/api/groups/1/words/raw', None, ['w', 'wg']),
+    '/api/groups/<int:id>/study_sessions': ('GET', '/api/groups/1/study_sessions', None,
+                                            ['s', 'a', 'g', 'study_sessions']),
+    '/api/study-sessions': ('GET', '/api/study-sessions', None, ['ss', 'g', 'sa']),
+    '/api/study-sessions/<id>': ('GET', '/api/study-sessions/1', None, ['ss', 'g', 'sa', 'w', 'wri']),
+    '/api/study-activities/<int:id>/sessions': ('GET', '/api/study-activities/1/sessions', None,
+                                                ['ss', 'g', 'sa']),
+    '/dashboard/recent-session': ('GET', '/dashboard/recent-session', None, ['ss', 'sa']),
+    '/dashboard/stats': ('GET', '/dashboard/stats', None, ['study_sessions']),
+    '/dashboard/timeseries': ('GET', '/dashboard/timeseries', None, ['study_rollups']),
+    '/api/study-queue': ('GET', '/api/study-queue?group_id=1', None, ['s', 'w', 'wg']),
+}
+
+
+@pytest.fixture(scope='module')
+def route_statements(tmp_path_factory):
+    """Run every request in ROUTE_REQUESTS once; {URL rule: [SQL statements]}."""
+    database = str(tmp_path_factory.mktemp('plans') / 'plans.db')
+    connection = create_database(database)
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [(f'Wort {i}', f'word {i}') for i in range(20)])
+    connection.execute("INSERT INTO groups (name) VALUES ('Core Verbs')")
+    connection.execute('INSERT INTO word_groups (group_id, word_id) SELECT 1, id FROM words')
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+    connection.commit()
+    connection.close()
+
+    app = create_app({'DATABASE': database})
+    client = app.test_client()
+    # A session with reviews, so the session routes get past their existence checks
+    client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+    client.post('/api/study-sessions/1/review/bulk',
+                json={'reviews': [{'word_id': word_id, 'is_correct': True} for word_id in range(1, 6)]})
+
+    for method, url, body, _ in ROUTE_REQUESTS.values():
+        response = client.open(url, method=method, json=body)
+        assert response.status_code == 200, f'{method} {url}: {response.status_code}'
+
+    statements = {}
+    for route, query_id in app.metrics.queries:
+        statements.setdefault(route, []).append(app.metrics.statements[query_id])
+    yield database, statements
+    app.db.pool.close_all()
+
+
+def query_plan(connection, sql):
+    # The plan does not depend on the values, so every parameter is bound to NULL
+    return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}', [None] * sql.count('?'))]
+
+
+@pytest.mark.parametrize('route', sorted(ROUTE_REQUESTS))
+def test_route_queries_use_indexes(route_statements, route):
+    database, statements = route_statements
+    indexed_tables = ROUTE_REQUESTS[route][3]
+    selects = [sql for sql in statements.get(route, []) if re.match(r'(WITH|SELECT)\b', sql, re.IGNORECASE)]
+    assert selects, f'{route} ran no queries'
+
+    connection = sqlite3.connect(database)
+    try:
+        for sql in selects:
+            plan = query_plan(connection, sql)
+            for table in indexed_tables:
+                scans = [step for step in plan if re.match(rf'SCAN {table}\b', step)]
+                assert not scans, f'{route} scans {table}: {sql}\n{plan}'
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize('sort_by', KEYSET_SORT_KEYS)
+def test_keyset_pages_are_index_ranges(route_statements, sort_by):
+    database, _ = route_statements
+    app = create_app({'DATABASE': database})
+    try:
+        response = app.test_client().get('/api/words', query_string={
+            'sort_by': sort_by, 'order': 'desc', 'cursor': encode_cursor(sort_by, 'desc', 'Wort 5', 6)
+        })
+        assert response.status_code == 200
+        sql = next(app.metrics.statements[query_id] for route, query_id in app.metrics.queries
+                   if route == '/api/words' and 'ORDER BY' in app.metrics.statements[query_id])
+    finally:
+        app.db.pool.close_all()
+
+    connection = sqlite3.connect(database)
+    try:
+        plan = query_plan(connection, sql)
+    finally:
+        connection.close()
+    assert any(re.match(r'SEARCH w USING (COVERING )?INDEX', step) for step in plan), plan
+    assert 'USE TEMP B-TREE FOR ORDER BY' not in plan, plan
@@ -0,0 +1,166 @@
+import gzip
+import json
+import sqlite3
+import time
+
+import pytest
+
+from app import create_app
+from benchmarks.common import create_database
+from lib.dashboard_stats import check_dashboard_stats
+from lib import retention
+from lib.retention import incremental_vacuum, purge_history, reset_history
+from lib.reviews import insert_reviews
+from lib.rollups import rebuild_rollups
+
+
+@pytest.fixture
+def connection(tmp_path):
+    # A separate database so the purges do not touch the API tests' words.db
+    connection = create_database(str(tmp_path / 'retention.db'))
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [(f'Wort {i}', f'word {i}') for i in range(20)])
+    connection.executemany("INSERT INTO groups (name) VALUES (?)", [('Core Verbs',), ('Core Adjectives',)])
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+
+    # Two old sessions and two recent ones, in both groups
+    cursor = connection.cursor()
+    for group_id, created_at in [(1, '2024-03-01 10:00:00'), (2, '2024-03-02 10:00:00'),
+                                 (1, '2025-06-01 10:00:00'), (2, '2025-06-02 10:00:00')]:
+        cursor.execute('INSERT INTO study_sessions (user_id, group_id, study_activity_id, created_at) '
+                       'VALUES (1, ?, 1, ?)', (group_id, created_at))
+        insert_reviews(cursor, 1, cursor.lastrowid,
+                       [(word_id, word_id % 3 != 0) for word_id in range(1, 11)], created_at)
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def count(connection, table):
+    return connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+
+def test_purge_before_date_archives_and_keeps_counters_consistent(connection, tmp_path):
+    archive = tmp_path / 'archive.ndjson.gz'
+    batches = []
+
+    totals = purge_history(connection, 1, before='2025-01-01', batch_size=3, archive_path=str(archive),
+                           progress=lambda totals: batches.append(dict(totals)))
+
+    assert totals == {'sessions': 2, 'review_items': 20}
+    # 20 review items in batches of 3, then one batch of both sessions
+    assert len(batches) == 8
+    assert count(connection, 'study_sessions') == 2
+    assert count(connection, 'word_review_items') == 20
+
+    with gzip.open(archive) as file:
+        rows = [json.loads(line) for line in file]
+    assert sum(row['table'] == 'word_review_items' for row in rows) == 20
+    assert sum(row['table'] == 'study_sessions' for row in rows) == 2
+
+    # The counters and rollups follow the remaining reviews
+    assert check_dashboard_stats(connection.cursor(), 1) == {}
+    assert connection.execute('SELECT SUM(correct_count + wrong_count) FROM word_reviews').fetchone()[0] == 20
+    assert connection.execute("SELECT COUNT(*) FROM study_rollups WHERE period < '2025-01-01'").fetchone()[0] == 0
+    assert_rollups_match_rebuild(connection)
+
+
+def assert_rollups_match_rebuild(connection):
+    query = 'SELECT * FROM study_rollups ORDER BY 1, 2, 3, 4, 5'
+    rollups = [tuple(row) for row in connection.execute(query)]
+    rebuild_rollups(connection.cursor())
+    connection.commit()
+    assert rollups == [tuple(row) for row in connection.execute(query)]
+
+
+def test_purge_by_group(connection):
+    # A second session in group 1 on the same day shares the day's total buckets
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO study_sessions (user_id, group_id, study_activity_id, created_at) "
+                   "VALUES (1, 1, 1, '2025-06-02 12:00:00')")
+    insert_reviews(cursor, 1, cursor.lastrowid, [(1, True), (15, False)], '2025-06-02 12:00:00')
+    connection.commit()
+
+    totals = purge_history(connection, 1, group_id=2, batch_size=3)
+
+    assert totals == {'sessions': 2, 'review_items': 20}
+    assert [row[0] for row in connection.execute('SELECT DISTINCT group_id FROM study_sessions')] == [1]
+    assert check_dashboard_stats(connection.cursor(), 1) == {}
+    assert_rollups_match_rebuild(connection)
+
+
+def test_reset_history_and_vacuum(connection):
+    totals = reset_history(connection, 1, batch_size=7)
+
+    assert totals['sessions'] == 4
+    assert totals['review_items'] == 40
+    for table in ('study_sessions', 'word_review_items', 'word_reviews', 'word_schedules', 'study_rollups'):
+        assert count(connection, table) == 0
+    assert check_dashboard_stats(connection.cursor(), 1) == {}
+
+    # New databases are created with auto_vacuum = INCREMENTAL
+    assert incremental_vacuum(connection) >= 0
+    assert connection.execute('PRAGMA freelist_count').fetchone()[0] == 0
+
+
+def test_failed_purge_still_refreshes_dashboard_stats(connection):
+    def fail_after_sessions(totals):
+        if totals['sessions']:
+            raise RuntimeError('interrupted')
+
+    with pytest.raises(RuntimeError):
+        purge_history(connection, 1, group_id=2, progress=fail_after_sessions)
+
+    # The committed batches stay deleted, and the streak and last study date follow them
+    assert count(connection, 'study_sessions') == 2
+    assert check_dashboard_stats(connection.cursor(), 1) == {}
+
+
+def test_failed_refresh_keeps_the_purge_error(connection, monkeypatch):
+    def interrupt(totals):
+        raise RuntimeError('interrupted')
+
+    def locked(cursor, user_id):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(retention, 'refresh_dashboard_stats', locked)
+    with pytest.raises(RuntimeError, match='interrupted'):
+        purge_history(connection, 1, group_id=2, progress=interrupt)
+    assert not connection.in_transaction
+
+
+def test_purge_only_prunes_the_users_rollup_words(connection):
+    connection.execute("INSERT INTO study_rollup_words (user_id, granularity, dimension, key_id, period, word_id) "
+                       "VALUES (2, 'day', 'total', 0, '2024-03-01', 1)")
+    connection.commit()
+
+    purge_history(connection, 1, before='2025-01-01')
+
+    assert [row[0] for row in connection.execute('SELECT DISTINCT user_id FROM study_rollup_words')] == [2]
+
+
+def test_reset_route_runs_in_the_background(connection):
+    database = connection.execute('PRAGMA database_list').fetchone()[2]
+    app = create_app({'DATABASE': database})
+    client = app.test_client()
+    try:
+        assert client.get('/api/study-sessions/reset').status_code == 404
+
+        response = client.post('/api/study-sessions/reset')
+        assert response.status_code == 202
+        assert response.get_json()['reset']['state'] in ('running', 'done')
+
+        for _ in range(100):
+            status = client.get('/api/study-sessions/reset').get_json()['reset']
+            if status['state'] != 'running':
+                break
+            time.sleep(0.05)
+        assert status['state'] == 'done'
+        assert (status['sessions'], status['review_items']) == (4, 40)
+        assert status['finished_at'] is not None
+        assert count(connection, 'study_sessions') == 0
+        # The pages freed by the reset went back to the file system
+        assert status['vacuumed_pages'] >= 0
+        assert connection.execute('PRAGMA freelist_count').fetchone()[0] == 0
+    finally:
+        app.db.pool.close_all()
@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+from app import create_app
+from benchmarks.common import create_database
+
+
+@pytest.fixture
+def database(tmp_path):
+    # A separate database: queued reviews must not leak into the API tests' words.db
+    database = str(tmp_path / 'buffer.db')
+    connection = create_database(database)
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)', [('gehen', 'to go'), ('gut', 'good')])
+    connection.execute("INSERT INTO groups (name) VALUES ('Core Verbs')")
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+    connection.commit()
+    connection.close()
+    return database
+
+
+def make_app(database, **config):
+    return create_app({
+        'DATABASE': database,
+        'REVIEW_BUFFER': True,
+        # Long enough that nothing is written before the test flushes
+        'REVIEW_BUFFER_INTERVAL_MS': 60000,
+        **config,
+    })
+
+
+@pytest.fixture
+def buffered_app(database):
+    app = make_app(database)
+    yield app
+    app.review_buffer.close()
+    app.db.pool.close_all()
+
+
+def test_reviews_are_queued_and_group_committed(buffered_app):
+    client = buffered_app.test_client()
+    response = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+    session_id = response.get_json()['session_id']
+
+    for is_correct in (True, False, True):
+        response = client.post(f'/api/study-sessions/{session_id}/review',
+                               json={'reviews': [{'word_id': 1, 'is_correct': is_correct}]})
+        assert response.status_code == 202
+        assert response.get_json()['queued'] == 1
+
+    # Invalid payloads are still rejected before anything is queued
+    response = client.post(f'/api/study-sessions/{session_id}/review',
+                           json={'reviews': [{'word_id': 999, 'is_correct': True}]})
+    assert response.status_code == 400
+
+    assert buffered_app.review_buffer.stats()['pending'] == 3
+    assert client.get('/dashboard/stats').get_json()['total_words_studied'] == 0
+
+    assert buffered_app.review_buffer.flush() == 3
+    stats = buffered_app.review_buffer.stats()
+    assert stats['pending'] == 0
+    assert stats['batches'] == 1
+
+    response = client.get('/dashboard/stats').get_json()
+    assert response['total_words_studied'] == 1
+    assert response['success_rate'] == pytest.approx(2 / 3)
+    word = client.get('/api/words/1').get_json()['word']
+    assert (word['correct_count'], word['wrong_count']) == (2, 1)
+
+
+def test_flush_uses_the_request_connection_and_skips_purged_sessions(database):
+    # With a single pooled connection, closing a session must not wait for a second one
+    app = make_app(database, DB_POOL_SIZE=1, DB_POOL_TIMEOUT=0.5)
+    client = app.test_client()
+    try:
+        sessions = [client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1})
+                    .get_json()['session_id'] for _ in range(2)]
+        for session_id in sessions:
+            client.post(f'/api/study-sessions/{session_id}/review',
+                        json={'reviews': [{'word_id': 1, 'is_correct': True}]})
+
+        # A purge elsewhere deletes the second session while its review is queued
+        connection = sqlite3.connect(database)
+        connection.execute('DELETE FROM study_sessions WHERE id = ?', (sessions[1],))
+        connection.commit()
+        connection.close()
+
+        response = client.post(f'/api/study-sessions/{sessions[0]}/close')
+        assert response.status_code == 200
+        assert response.get_json()['session']['review_items_count'] == 1
+        stats = app.review_buffer.stats()
+        assert (stats['rows_written'], stats['rows_dropped']) == (1, 1)
+        assert client.get('/dashboard/stats').get_json()['total_words_studied'] == 1
+    finally:
+        app.review_buffer.close()
+        app.db.pool.close_all()
+
+
+def test_reviews_queued_while_the_session_closes_are_dropped(buffered_app, monkeypatch):
+    client = buffered_app.test_client()
+    session_id = client.post('/api/study-sessions', json={'group_id': 1, 'study_activity_id': 1}) \
+        .get_json()['session_id']
+    client.post(f'/api/study-sessions/{session_id}/review', json={'reviews': [{'word_id': 1, 'is_correct': True}]})
+
+    buffer = buffered_app.review_buffer
+    flush = buffer.flush
+
+    def flush_then_submit(connection=None):
+        written = flush(connection)
+        # A review request that passed its ended_at check before the close committed
+        buffer.submit(1, session_id, [(2, True)])
+        return written
+
+    monkeypatch.setattr(buffer, 'flush', flush_then_submit)
+    response = client.post(f'/api/study-sessions/{session_id}/close')
+    monkeypatch.undo()
+    assert response.status_code == 200
+    assert response.get_json()['session']['review_items_count'] == 1
+
+    assert buffer.flush() == 0
+    stats = buffer.stats()
+    assert (stats['rows_written'], stats['rows_dropped']) == (1, 1)
+    assert client.get('/dashboard/stats').get_json()['total_words_studied'] == 1
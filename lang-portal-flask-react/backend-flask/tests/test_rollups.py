@@ -0,0 +1,56 @@
+import pytest
+
+from benchmarks.common import create_database
+from lib.reviews import insert_reviews
+from lib.rollups import rebuild_rollups
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = create_database(str(tmp_path / 'rollups.db'))
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [(f'Wort {i}', f'word {i}') for i in range(10)])
+    connection.execute("INSERT INTO groups (name) VALUES ('Core Verbs')")
+    connection.execute("INSERT INTO study_activities (name, url) VALUES ('Flashcards', 'http://localhost:8081')")
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def review(connection, created_at, word_ids):
+    cursor = connection.cursor()
+    cursor.execute('INSERT INTO study_sessions (user_id, group_id, study_activity_id, created_at) '
+                   'VALUES (1, 1, 1, ?)', (created_at,))
+    insert_reviews(cursor, 1, cursor.lastrowid, [(word_id, True) for word_id in word_ids], created_at)
+    connection.commit()
+
+
+def rollup_words_periods(connection):
+    return [row[0] for row in connection.execute('SELECT DISTINCT period FROM study_rollup_words ORDER BY 1')]
+
+
+def test_first_reviews_of_a_week_prune_past_weeks(connection):
+    # Monday and Wednesday of one week, then the Monday after
+    review(connection, '2025-06-02 10:00:00', [1, 2])
+    review(connection, '2025-06-04 10:00:00', [2, 3])
+    assert rollup_words_periods(connection) == ['2025-06-02', '2025-06-04']
+
+    review(connection, '2025-06-09 10:00:00', [1])
+    assert rollup_words_periods(connection) == ['2025-06-09']
+
+    # Words are still counted once per bucket after the prune
+    review(connection, '2025-06-10 10:00:00', [1, 4])
+    assert connection.execute("SELECT words_touched FROM study_rollups WHERE granularity = 'week' "
+                              "AND dimension = 'total' AND period = '2025-06-09'").fetchone()[0] == 2
+
+
+def test_rebuild_matches_the_incremental_rollups(connection):
+    review(connection, '2025-06-02 10:00:00', [1, 2])
+    review(connection, '2025-06-04 10:00:00', [2, 3])
+    review(connection, '2025-06-09 10:00:00', [1])
+    query = 'SELECT * FROM study_rollups ORDER BY 1, 2, 3, 4, 5'
+    incremental = connection.execute(query).fetchall()
+
+    rebuild_rollups(connection.cursor())
+    connection.commit()
+    assert connection.execute(query).fetchall() == incremental
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from benchmarks.common import create_database
+from lib.search import search_words
+
+
+@pytest.fixture
+def cursor(tmp_path):
+    connection = create_database(str(tmp_path / 'search.db'))
+    connection.row_factory = sqlite3.Row
+    # 600 long matches for "haus", then the two best ones with the highest ids
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [(f'Hausaufgabe für die Schule Nummer {i}', f'homework for school number {i}')
+                            for i in range(600)])
+    connection.executemany('INSERT INTO words (german, english) VALUES (?, ?)',
+                           [('das Haus', 'the house'), ('Haus', 'house')])
+    connection.commit()
+    yield connection.cursor()
+    connection.close()
+
+
+def test_best_matches_are_found_among_many(cursor):
+    rows, mode = search_words(cursor, 1, 'haus', 2, 'prefix')
+    assert mode == 'prefix'
+    assert [row['german'] for row in rows] == ['Haus', 'das Haus']
+
+
+
+def test_several_tokens_match_as_prefixes(cursor):
+    rows, _ = search_words(cursor, 1, 'haus schu numm 59', 3, 'prefix')
+    assert [row['german'] for row in rows] == ['Hausaufgabe für die Schule Nummer 59',
+                                              'Hausaufgabe für die Schule Nummer 590',
+                                              'Hausaufgabe für die Schule Nummer 591']
@@ -0,0 +1,53 @@
+import requests
+
+# Base URL for your API
+BASE_URL = 'http://localhost:8000/api'
+
+
+def test_get_study_queue(valid_group_id):
+    """
+    Test retrieving the study queue for a group
+    """
+    response = requests.get(f'{BASE_URL}/study-queue', params={'group_id': valid_group_id, 'limit': 5})
+
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data['count'] == len(data['items'])
+    assert 0 < data['count'] <= 5
+
+    for item in data['items']:
+        assert 'id' in item
+        assert 'english' in item
+        assert 'german' in item
+        assert 'due_at' in item
+        assert 'is_new' in item
+
+
+def test_reviewed_word_leaves_queue(valid_group_id, valid_study_activity_id):
+    """
+    Test that a correctly answered word is scheduled into the future
+    """
+    queue = requests.get(f'{BASE_URL}/study-queue', params={'group_id': valid_group_id, 'limit': 200}).json()
+    word_id = queue['items'][0]['id']
+
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [{'word_id': word_id, 'is_correct': True}]
+    })
+
+    queue = requests.get(f'{BASE_URL}/study-queue', params={'group_id': valid_group_id, 'limit': 200}).json()
+    assert word_id not in [item['id'] for item in queue['items']]
+
+
+def test_get_study_queue_nonexistent_group():
+    """
+    Test retrieving the study queue for a non-existent group
+    """
+    response = requests.get(f'{BASE_URL}/study-queue', params={'group_id': 99999})
+
+    assert response.status_code == 404
+    assert response.json()['error'] == 'Group not found'
@@ -52,3 +52,107 @@ def test_create_study_session_nonexistent_activity():
     assert response.status_code == 404
     assert 'error' in response.json()
     assert 'Study activity not found' in response.json()['error']
+
+
+def test_review_updates_word_counters(valid_group_id, valid_study_activity_id, valid_word_id):
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    before = requests.get(f'{BASE_URL}/words/{valid_word_id}').json()['word']
+
+    response = requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [
+            {'word_id': valid_word_id, 'is_correct': True},
+            {'word_id': valid_word_id, 'is_correct': True},
+            {'word_id': valid_word_id, 'is_correct': False}
+        ]
+    })
+    assert response.status_code == 200
+
+    after = requests.get(f'{BASE_URL}/words/{valid_word_id}').json()['word']
+    assert after['correct_count'] == before['correct_count'] + 2
+    assert after['wrong_count'] == before['wrong_count'] + 1
+
+
+def test_review_invalid_item_rejects_whole_batch(valid_group_id, valid_study_activity_id, valid_word_id):
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+
+    response = requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [
+            {'word_id': valid_word_id, 'is_correct': True},
+            {'word_id': valid_word_id}
+        ]
+    })
+    assert response.status_code == 400
+    assert response.json()['rejected'] == [{'index': 1, 'error': 'Invalid review format'}]
+
+    session_data = requests.get(f'{BASE_URL}/study-sessions/{session["session_id"]}').json()
+    assert session_data['session']['review_items_count'] == 0
+
+
+def test_bulk_review_reports_rejections(valid_group_id, valid_study_activity_id, valid_word_id):
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+
+    reviews = [{'word_id': valid_word_id, 'is_correct': i % 2 == 0} for i in range(1000)]
+    reviews.append({'word_id': 99999999, 'is_correct': True})
+    reviews.append({'word_id': valid_word_id, 'is_correct': 'yes'})
+
+    response = requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review/bulk',
+                             json={'reviews': reviews})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data['accepted'] == 1000
+    assert [item['index'] for item in data['rejected']] == [1000, 1001]
+
+    session_data = requests.get(f'{BASE_URL}/study-sessions/{session["session_id"]}').json()
+    assert session_data['session']['review_items_count'] == 1000
+
+
+def test_close_study_session(valid_group_id, valid_study_activity_id, valid_word_id):
+    """
+    Test that closing a session fixes its end time and rejects further reviews
+    """
+    session_id = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()['session_id']
+    requests.post(f'{BASE_URL}/study-sessions/{session_id}/review', json={'reviews': [
+        {'word_id': valid_word_id, 'is_correct': True},
+        {'word_id': valid_word_id, 'is_correct': True},
+        {'word_id': valid_word_id, 'is_correct': False}
+    ]})
+
+    session = requests.get(f'{BASE_URL}/study-sessions/{session_id}').json()['session']
+    assert (session['review_items_count'], session['correct_count'], session['wrong_count']) == (3, 2, 1)
+    assert session['ended_at'] is None
+    assert session['end_time'] >= session['start_time']
+
+    response = requests.post(f'{BASE_URL}/study-sessions/{session_id}/close')
+    assert response.status_code == 200
+    closed = response.json()['session']
+    assert closed['ended_at'] is not None
+    assert closed['end_time'] == closed['ended_at']
+    assert closed['duration_seconds'] >= 0
+
+    response = requests.post(f'{BASE_URL}/study-sessions/{session_id}/review', json={
+        'reviews': [{'word_id': valid_word_id, 'is_correct': True}]
+    })
+    assert response.status_code == 409
+
+    # Closing again keeps the original end time
+    again = requests.post(f'{BASE_URL}/study-sessions/{session_id}/close').json()['session']
+    assert again['ended_at'] == closed['ended_at']
+
+    listed = {s['id']: s for s in requests.get(f'{BASE_URL}/study-sessions', params={'per_page': 100}).json()['items']}
+    assert listed[session_id]['end_time'] == closed['ended_at']
+    assert listed[session_id]['correct_count'] == 2
+
+    assert requests.post(f'{BASE_URL}/study-sessions/99999/close').status_code == 404
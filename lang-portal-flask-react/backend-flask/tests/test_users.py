@@ -0,0 +1,67 @@
+import requests
+
+# Base URL for your API
+BASE_URL = 'http://localhost:8000'
+
+
+def create_user(name='Test learner'):
+    response = requests.post(f'{BASE_URL}/api/users', json={'name': name})
+    assert response.status_code == 201
+    return {'X-User-Id': str(response.json()['id'])}
+
+
+def test_create_user():
+    response = requests.post(f'{BASE_URL}/api/users', json={'name': 'Anna'})
+
+    assert response.status_code == 201
+    user = response.json()
+    assert user['name'] == 'Anna'
+
+    response = requests.get(f"{BASE_URL}/api/users/{user['id']}")
+    assert response.status_code == 200
+    assert response.json()['name'] == 'Anna'
+
+
+def test_user_history_is_separate():
+    """
+    Test that sessions, reviews and dashboard stats only count towards the requesting user
+    """
+    default_stats = requests.get(f'{BASE_URL}/dashboard/stats').json()
+    headers = create_user()
+
+    stats = requests.get(f'{BASE_URL}/dashboard/stats', headers=headers).json()
+    assert stats['total_sessions'] == 0
+    assert stats['total_words_studied'] == 0
+
+    response = requests.post(f'{BASE_URL}/api/study-sessions', headers=headers,
+                             json={'group_id': 1, 'study_activity_id': 1})
+    assert response.status_code == 201
+    session_id = response.json()['session_id']
+
+    response = requests.post(f'{BASE_URL}/api/study-sessions/{session_id}/review', headers=headers, json={
+        'reviews': [{'word_id': 1, 'is_correct': True}, {'word_id': 2, 'is_correct': False}]
+    })
+    assert response.status_code == 200
+
+    stats = requests.get(f'{BASE_URL}/dashboard/stats', headers=headers).json()
+    assert stats['total_sessions'] == 1
+    assert stats['total_words_studied'] == 2
+    assert stats['success_rate'] == 0.5
+    assert requests.get(f'{BASE_URL}/dashboard/stats').json() == default_stats
+
+    # Other users can neither see nor review the session
+    assert requests.get(f'{BASE_URL}/api/study-sessions/{session_id}').status_code == 404
+    response = requests.post(f'{BASE_URL}/api/study-sessions/{session_id}/review', json={
+        'reviews': [{'word_id': 1, 'is_correct': True}]
+    })
+    assert response.status_code == 404
+    assert requests.get(f'{BASE_URL}/api/study-sessions/{session_id}', headers=headers).status_code == 200
+
+
+def test_invalid_user_header():
+    response = requests.get(f'{BASE_URL}/api/groups', headers={'X-User-Id': 'abc'})
+    assert response.status_code == 400
+
+    response = requests.get(f'{BASE_URL}/api/groups', headers={'X-User-Id': '999999'})
+    assert response.status_code == 404
+    assert response.json()['error'] == 'User not found'
@@ -79,3 +79,137 @@ def test_get_nonexistent_word():
     data = response.json()
     assert 'error' in data
     assert data['error'] == 'Word not found'
+
+
+def test_get_words_cursor_pagination():
+    """
+    Test walking all words with keyset pagination
+    """
+    seen = []
+    params = {'cursor': '', 'sort_by': 'english', 'order': 'desc'}
+    while True:
+        response = requests.get(f'{BASE_URL}/words', params=params)
+        assert response.status_code == 200
+
+        data = response.json()
+        seen.extend(word['id'] for word in data['words'])
+        if not data['next_cursor']:
+            break
+        params['cursor'] = data['next_cursor']
+
+    assert len(seen) == len(set(seen)) == data['total_words']
+
+
+def test_get_words_invalid_cursor():
+    """
+    Test that a cursor from a different sort order is rejected
+    """
+    first = requests.get(f'{BASE_URL}/words', params={'cursor': '', 'sort_by': 'german'}).json()
+
+    response = requests.get(f'{BASE_URL}/words', params={
+        'cursor': first['next_cursor'],
+        'sort_by': 'english'
+    })
+
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_single_word_etag_changes_after_review(valid_word_id, valid_group_id, valid_study_activity_id):
+    """
+    Test that a review write invalidates the cached word response
+    """
+    first = requests.get(f'{BASE_URL}/words/{valid_word_id}')
+    etag = first.headers['ETag']
+
+    assert requests.get(f'{BASE_URL}/words/{valid_word_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    session = requests.post(f'{BASE_URL}/study-sessions', json={
+        'group_id': valid_group_id,
+        'study_activity_id': valid_study_activity_id
+    }).json()
+    requests.post(f'{BASE_URL}/study-sessions/{session["session_id"]}/review', json={
+        'reviews': [{'word_id': valid_word_id, 'is_correct': True}]
+    })
+
+    response = requests.get(f'{BASE_URL}/words/{valid_word_id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json()['word']['correct_count'] == first.json()['word']['correct_count'] + 1
+
+
+def test_search_words_prefix_and_folding():
+    """
+    Test that search matches prefixes and folds ß and umlaut spellings
+    """
+    response = requests.get(f'{BASE_URL}/words/search', params={'q': 'grossart'})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['mode'] == 'prefix'
+    assert 'großartig' in [word['german'] for word in data['words']]
+
+    data = requests.get(f'{BASE_URL}/words/search', params={'q': 'schoen'}).json()
+    assert 'schön' in [word['german'] for word in data['words']]
+
+
+def test_search_words_fuzzy_fallback():
+    """
+    Test that a misspelled query falls back to trigram similarity
+    """
+    response = requests.get(f'{BASE_URL}/words/search', params={'q': 'hlefen'})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['mode'] == 'fuzzy'
+    assert data['words'][0]['german'] == 'helfen'
+    assert data['count'] == len(data['words'])
+
+
+def test_search_words_requires_query():
+    """
+    Test that an empty search query is rejected
+    """
+    response = requests.get(f'{BASE_URL}/words/search', params={'q': ' '})
+
+    assert response.status_code == 400
+    assert 'error' in response.json()
+
+
+def test_get_words_batch(db_connection):
+    """
+    Test fetching several words by id, in request order, with unknown ids reported
+    """
+    cursor = db_connection.cursor()
+    cursor.execute('SELECT id FROM words ORDER BY id DESC LIMIT 3')
+    ids = [row[0] for row in cursor.fetchall()]
+
+    response = requests.post(f'{BASE_URL}/words/batch', json={'ids': ids + [99999, ids[0]]})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [word['id'] for word in data['words']] == ids
+    assert data['missing'] == [99999]
+    assert data['count'] == 3
+
+    # Each word matches the single-word endpoint
+    single = requests.get(f'{BASE_URL}/words/{ids[0]}').json()['word']
+    assert data['words'][0]['german'] == single['german']
+    assert sorted(g['id'] for g in data['words'][0]['groups']) == sorted(g['id'] for g in single['groups'])
+
+
+def test_get_words_batch_fields(valid_word_id):
+    """
+    Test that a fields projection only returns the requested fields (plus id)
+    """
+    response = requests.post(f'{BASE_URL}/words/batch', params={'fields': 'german,groups'},
+                             json={'ids': [valid_word_id]})
+    assert response.status_code == 200
+    assert set(response.json()['words'][0]) == {'id', 'german', 'groups'}
+
+    response = requests.post(f'{BASE_URL}/words/batch', json={'ids': [valid_word_id], 'fields': ['nope']})
+    assert response.status_code == 400
+
+    response = requests.post(f'{BASE_URL}/words/batch', json={'ids': ['1']})
+    assert response.status_code == 400
@@ -20,12 +20,12 @@ export default function Settings() {
           throw new Error('Failed to reset history');
         }
 
-        // Reset was successful
+        // Reset was started; it continues on the server
         setShowResetDialog(false);
         setResetConfirmation('');
         
         // Show success message
-        alert('Study history has been cleared successfully');
+        alert('Study history is being cleared. This may take a moment for a long history.');
       } catch (error) {
         console.error('Error resetting history:', error);
         alert('Failed to reset history. Please try again.');